@@ -0,0 +1,45 @@
+"""full-text index for items.name / items.description
+
+Revision ID: 20261017_0003
+Revises: 14a28988231e
+Create Date: 2026-10-17 09:00
+
+· SQLite: tabla FTS5 external-content + triggers, con backfill ('rebuild').
+· PostgreSQL: índice GIN sobre to_tsvector('simple', …).
+"""
+from alembic import op
+
+from app.models import fts
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0003"
+down_revision = "14a28988231e"
+branch_labels = None
+depends_on = None
+
+
+# mismos DDL que crea ``create_all`` (tests / desarrollo): una sola fuente
+SQLITE_UPGRADE = [
+    *fts.SQLITE_CREATE,
+    # backfill de las filas existentes
+    "INSERT INTO items_fts(items_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = fts.SQLITE_DROP
+
+# el índice de expresión se rellena solo al crearse
+POSTGRES_UPGRADE = fts.POSTGRES_CREATE
+POSTGRES_DOWNGRADE = fts.POSTGRES_DROP
+
+
+def _run(statements: dict[str, list[str]]) -> None:
+    dialect = op.get_bind().dialect.name
+    for stmt in statements.get(dialect, []):
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE})
+
+
+def downgrade() -> None:
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE})
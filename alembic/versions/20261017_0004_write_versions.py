@@ -0,0 +1,28 @@
+"""write_versions: contadores de escritura para ETags / cachés
+
+Revision ID: 20261017_0004
+Revises: 20261017_0003
+Create Date: 2026-10-17 10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0004"
+down_revision = "20261017_0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    versions = op.create_table(
+        "write_versions",
+        sa.Column("scope", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.bulk_insert(versions, [{"scope": "items", "version": 0}, {"scope": "categories", "version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("write_versions")
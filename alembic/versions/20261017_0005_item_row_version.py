@@ -0,0 +1,27 @@
+"""items.version: versión de fila para la caché de fragmentos
+
+Revision ID: 20261017_0005
+Revises: 20261017_0004
+Create Date: 2026-10-17 11:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0005"
+down_revision = "20261017_0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "items",
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("items") as batch:
+        batch.drop_column("version")
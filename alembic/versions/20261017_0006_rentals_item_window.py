@@ -0,0 +1,22 @@
+"""índice compuesto rentals(item_id, start_at, end_at)
+
+Revision ID: 20261017_0006
+Revises: 20261017_0005
+Create Date: 2026-10-17 12:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0006"
+down_revision = "20261017_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_rentals_item_window", "rentals", ["item_id", "start_at", "end_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rentals_item_window", table_name="rentals")
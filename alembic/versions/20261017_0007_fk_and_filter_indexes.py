@@ -0,0 +1,50 @@
+"""índices de claves foráneas y filtros del listado
+
+Revision ID: 20261017_0007
+Revises: 20261017_0006
+Create Date: 2026-10-17 13:00
+
+rentals.item_id ya lo cubre ix_rentals_item_window (columna inicial).
+La revisión 14a28988231e quedó vacía, así que item_images se crea aquí si
+todavía no existe.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0007"
+down_revision = "20261017_0006"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_rentals_renter_id", "rentals", ["renter_id"]),
+    ("ix_item_images_item_id", "item_images", ["item_id"]),
+    ("ix_items_owner_id", "items", ["owner_id"]),
+    ("ix_items_available_price", "items", ["available", "price_per_h"]),
+    ("ix_item_categories_category_id", "item_categories", ["category_id"]),
+]
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("item_images"):
+        op.create_table(
+            "item_images",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "item_id",
+                sa.Integer(),
+                sa.ForeignKey("items.id", ondelete="CASCADE"),
+                nullable=False,
+            ),
+            sa.Column("url", sa.String(), nullable=False),
+        )
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
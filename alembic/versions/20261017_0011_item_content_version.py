@@ -0,0 +1,25 @@
+"""write_versions: ámbito item_content para los índices de autocompletado y similares
+
+Revision ID: 20261017_0011
+Revises: 20261017_0010
+Create Date: 2026-10-17 15:30
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0011"
+down_revision = "20261017_0010"
+branch_labels = None
+depends_on = None
+
+write_versions = sa.table("write_versions", sa.column("scope", sa.String), sa.column("version", sa.Integer))
+
+
+def upgrade() -> None:
+    op.bulk_insert(write_versions, [{"scope": "item_content", "version": 0}])
+
+
+def downgrade() -> None:
+    op.execute(write_versions.delete().where(write_versions.c.scope == "item_content"))
@@ -0,0 +1,24 @@
+"""índice items(price_per_h, id) para el keyset por precio sin filtros
+
+Revision ID: 20261017_0013
+Revises: 20261017_0012
+Create Date: 2026-10-17 16:30
+
+ix_items_available_price solo sirve la ordenación cuando se filtra por
+available; sin filtro cada página ordenaba la tabla entera.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0013"
+down_revision = "20261017_0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_items_price_id", "items", ["price_per_h", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_price_id", table_name="items")
@@ -0,0 +1,27 @@
+"""índices rentals(start_at) y rentals(end_at) para la sincronización incremental
+
+Revision ID: 20261017_0014
+Revises: 20261017_0013
+Create Date: 2026-10-17 17:30
+
+sync_availability solo recalcula los ítems cuyos alquileres empezaron o
+terminaron desde la pasada anterior; sin estos índices cada minuto recorría
+la tabla entera de alquileres.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0014"
+down_revision = "20261017_0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_rentals_start_at", "rentals", ["start_at"])
+    op.create_index("ix_rentals_end_at", "rentals", ["end_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rentals_end_at", table_name="rentals")
+    op.drop_index("ix_rentals_start_at", table_name="rentals")
@@ -0,0 +1,50 @@
+"""items con AUTOINCREMENT en SQLite; fuera el ámbito item_deletions
+
+Revision ID: 20261017_0015
+Revises: 20261017_0014
+Create Date: 2026-10-17 18:00
+
+Sin AUTOINCREMENT SQLite reasigna el id más alto borrado, y el alta heredaba
+el fragmento JSON cacheado de la baja (ambos en ``version`` 1).  Con ids
+únicos el sello de fragmentos ya no necesita la versión de bajas, que
+invalidaba todos los fragmentos de todos los workers en cada borrado.
+
+SQLite no altera la PK en sitio: la tabla se recrea (batch) y, como los
+triggers FTS se van con la tabla vieja, se vuelven a crear.  ``sqlite_sequence``
+arranca en el id más alto que queda; las cachés de fragmentos se vacían con el
+reinicio de los workers del despliegue.  PostgreSQL no cambia: las secuencias
+nunca reutilizan valores.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import fts
+
+# revision identifiers, used by Alembic.
+revision = "20261017_0015"
+down_revision = "20261017_0014"
+branch_labels = None
+depends_on = None
+
+write_versions = sa.table("write_versions", sa.column("scope", sa.String), sa.column("version", sa.Integer))
+
+
+def _recreate_items(autoincrement: bool) -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    with op.batch_alter_table(
+        "items", recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}
+    ):
+        pass
+    for stmt in fts.SQLITE_CREATE:
+        op.execute(stmt)
+
+
+def upgrade() -> None:
+    _recreate_items(True)
+    op.execute(write_versions.delete().where(write_versions.c.scope == "item_deletions"))
+
+
+def downgrade() -> None:
+    op.bulk_insert(write_versions, [{"scope": "item_deletions", "version": 0}])
+    _recreate_items(False)
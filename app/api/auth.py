@@ -1,36 +1,97 @@
 # app/api/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
-from app.deps import get_db
+from app.deps import get_async_db, get_current_user, oauth2_scheme
+from app.core.config import settings
 from app.core.security import create_access_token
 from app.schemas.token import Token
+from app.services.password_hasher import HasherBusy, hasher
+from app.services.principal_cache import principals
+from app.services.revocation import revocations
 
 router = APIRouter()
 
 
-@router.post("/signup", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
-def signup(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+def _busy() -> HTTPException:
+    return HTTPException(
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Servicio de autenticación saturado, reintenta en unos segundos",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+    )
+
+
+# La BD va por la sesión asíncrona y bcrypt al pool de procesos, así ninguna
+# petición ocupa un hilo durante el hash.  Antes de esperar al hash se
+# devuelve la conexión al pool (``db.close()``) para que una ráfaga de
+# logins no agote las conexiones del resto de rutas.
+
+
+def _lookup_credentials(db: Session, username: str) -> tuple[int, str, str] | None:
+    user = crud.get_user_by_username(db, username)
+    return (user.id, user.username, user.hashed_pw) if user else None
+
+
+def _check_signup(db: Session, user_in: schemas.UserCreate) -> None:
     if crud.get_user_by_username(db, user_in.username):
         raise HTTPException(400, "Nombre de usuario en uso")
     if crud.get_user_by_email(db, user_in.email):          # 🆕
         raise HTTPException(400, "Email ya registrado")
-    return crud.create_user(db, user_in)
+
+
+@router.post("/signup", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
+async def signup(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        await db.run_sync(_check_signup, user_in)
+    finally:
+        await db.close()
+    try:
+        hashed_pw = await hasher.hash(user_in.password)
+    except HasherBusy:
+        raise _busy()
+    user = await crud.aio.create_user(db, user_in, hashed_pw)
+    return await crud.aio.dump(db, schemas.UserOut, user)
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = crud.get_user_by_username(db, form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_pw):
+    credentials = await db.run_sync(_lookup_credentials, form_data.username)
+    await db.close()
+    try:
+        valid = credentials is not None and await hasher.verify(form_data.password, credentials[2])
+    except HasherBusy:
+        raise _busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(subject=user.username)
+    access_token = create_access_token(subject=credentials[1], user_id=credentials[0])
     return {"access_token": access_token}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user=Depends(get_current_user),      # token válido y no revocado
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Revoca el token actual hasta su ``exp``."""
+    claims = jwt.get_unverified_claims(token)    # firma ya comprobada
+    jti, exp = claims.get("jti"), claims.get("exp")
+    if not jti or not exp:
+        raise HTTPException(400, "Token sin jti/exp: no se puede revocar")
+    await crud.aio.revoke_token(db, jti, datetime.utcfromtimestamp(exp))
+    revocations.add(jti, exp)
+    principals.invalidate_token(token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
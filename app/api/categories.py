@@ -1,34 +1,53 @@
 # app/api/categories.py
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
-from app.deps import get_db
+from app.deps import get_async_db
+from app.services.category_cache import categories
 
 # ⬇⬇⬇  ¡SIN prefix aquí!  ⬇⬇⬇
 router = APIRouter(tags=["categories"])
 
 
-@router.get("/", response_model=List[schemas.CategoryOut])
-def list_categories(db: Session = Depends(get_db)):
-    """Lista todas las categorías ordenadas alfabéticamente."""
-    return crud.get_categories(db)
+@router.get(
+    "/",
+    response_model=List[schemas.CategoryOut],
+    responses={200: {"model": List[schemas.CategoryTree], "description": "Con `tree=true`"}},
+)
+async def list_categories(
+    tree: bool = Query(False, description="Devolver el árbol completo (raíces con `children`)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lista todas las categorías ordenadas alfabéticamente (desde la caché).
+    Con ``tree=true`` devuelve las raíces con sus subcategorías anidadas.
+    """
+    if tree:
+        return JSONResponse(jsonable_encoder(await db.run_sync(categories.tree)))
+    return await db.run_sync(categories.list)
 
 
 @router.post("/", response_model=schemas.CategoryOut,
              status_code=status.HTTP_201_CREATED)
-def create_category(cat_in: schemas.CategoryCreate,
-                    db: Session = Depends(get_db)):
-    """Crea una nueva categoría (nombre único)."""
-    return crud.create_category(db, cat_in)
+async def create_category(cat_in: schemas.CategoryCreate,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Crea una nueva categoría (nombre único), opcionalmente bajo *parent_id*."""
+    try:
+        category = await crud.aio.create_category(db, cat_in)
+    except crud.ParentCategoryNotFound as exc:
+        raise HTTPException(400, str(exc))
+    return await crud.aio.dump(db, schemas.CategoryOut, category)
 
 
 @router.get("/{cat_id}", response_model=schemas.CategoryOut)
-def get_category(cat_id: int, db: Session = Depends(get_db)):
+async def get_category(cat_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtiene una categoría por ID."""
-    cat = crud.get_category(db, cat_id)
+    cat = await crud.aio.get_category(db, cat_id)
     if not cat:
         raise HTTPException(404, "Categoría no encontrada")
-    return cat
+    return await crud.aio.dump(db, schemas.CategoryOut, cat)
@@ -1,4 +1,5 @@
 # app/api/items.py
+from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urlencode
 
@@ -11,13 +12,37 @@ from fastapi import (
     Response,
     status,
 )
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
-from app.deps import get_db, get_current_user
+from app.core import http_cache
+from app.core.config import settings
+from app.deps import get_async_db, get_current_user
+from app.services import bulk_import
+from app.services.item_fragments import fragments
+from app.services.category_cache import categories as category_cache
+from app.services.item_suggest import suggestions
+from app.services.similar_items import docs_from, similar_items
 
 router = APIRouter()
 
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    ``StreamingResponse`` que se envía mientras aún se lee el cuerpo de la
+    petición.  Con ASGI < 2.4 Starlette escucha ``http.disconnect`` en una
+    tarea aparte que compite por ``receive()`` con ``request.stream()`` y se
+    queda con el cuerpo; aquí la desconexión ya la detecta la lectura del
+    cuerpo (``ClientDisconnect``).
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 # ──────────────────────────────── Crear ──────────────────────────────────────
 
 
@@ -26,15 +51,65 @@ router = APIRouter()
     response_model=schemas.ItemOut,
     status_code=status.HTTP_201_CREATED,
 )
-def create_item(
+async def create_item(
     item_in: schemas.ItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Crea un ítem asociado al usuario autenticado.
     """
-    return crud.create_item(db, item_in, owner_id=current_user.id)
+    try:
+        db_item = await crud.aio.create_item(db, item_in, owner_id=current_user.id)
+    except ValueError as exc:   # categoría inexistente
+        raise HTTPException(400, str(exc))
+    return await crud.aio.dump(db, schemas.ItemOut, db_item)
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def bulk_create_items(
+    request: Request,
+    chunk_size: int = Query(
+        settings.BULK_IMPORT_CHUNK_SIZE,
+        ge=1,
+        le=10_000,
+        description="Filas por lote / commit",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Importa un catálogo completo en una sola petición.
+
+    Acepta un cuerpo **NDJSON** (``application/x-ndjson``, un ``ItemCreate``
+    por línea) o **CSV** (``text/csv``) leído en streaming, y devuelve en
+    NDJSON el estado de cada fila (``created`` con su id o ``error``).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in bulk_import.NDJSON_TYPES | bulk_import.CSV_TYPES:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            "Usa application/x-ndjson o text/csv",
+        )
+
+    statuses = bulk_import.import_items(
+        db,
+        request.stream(),
+        content_type,
+        owner_id=current_user.id,
+        chunk_size=chunk_size,
+    )
+    return _DuplexStreamingResponse(
+        bulk_import.ndjson(statuses),
+        media_type="application/x-ndjson",
+        # por si la petición entra por otra location de nginx: no acumular
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-store"},
+    )
 
 
 # ────────────────────── helpers paginación (RFC-5988) ────────────────────────
@@ -44,49 +119,95 @@ def _build_pagination_links(
     request: Request,
     skip: int,
     limit: int,
-    total: int,
+    total: Optional[int],
+    *,
+    has_next: Optional[bool] = None,
+    next_cursor: Optional[str] = None,
     **filters,
 ) -> str:
     """
     Devuelve la cabecera **Link** con rel="next" y/o rel="prev"
     siguiendo la RFC-5988.
+
+    · Modo offset: si no se conoce *total* se decide ``next`` con *has_next*.
+    · Modo cursor: solo se emite ``next`` con el *next_cursor* recibido.
     """
     links: list[str] = []
 
-    # eliminamos skip y limit existentes (solo se permite uno por llamada)
+    # eliminamos skip, limit y cursor existentes (solo se permite uno por llamada)
     base_url = request.url.remove_query_params("skip")
     base_url = base_url.remove_query_params("limit")
+    base_url = base_url.remove_query_params("cursor")
 
-    def _url(new_skip: int) -> str:
+    def _url(**page) -> str:
         # ► descartamos filtros cuyo valor sea None para no enviar "None" literal
         params = {k: v for k, v in filters.items() if v is not None}
 
         # urlencode con doseq=True para repetir parámetros como categories=1&categories=2
-        params.update({"skip": new_skip, "limit": limit})
+        params.update(page, limit=limit)
         return f"<{base_url}?{urlencode(params, doseq=True)}>"
 
+    # cursor
+    if next_cursor is not None:
+        return f'{_url(cursor=next_cursor)}; rel="next"'
+
     # next
-    if skip + limit < total:
-        links.append(f'{_url(skip + limit)}; rel="next"')
+    if total is not None:
+        has_next = skip + limit < total
+    if has_next:
+        links.append(f'{_url(skip=skip + limit)}; rel="next"')
 
     # prev
     if skip > 0:
         prev_skip = max(skip - limit, 0)
-        links.append(f'{_url(prev_skip)}; rel="prev"')
+        links.append(f'{_url(skip=prev_skip)}; rel="prev"')
 
     return ", ".join(links)
 
 
+# versiones de escritura que sellan todos los fragmentos (ver item_fragments)
+FRAGMENT_SCOPES = (crud.CATEGORIES,)
+
+
+async def _items_response(
+    db: AsyncSession,
+    items,
+    shared_versions: tuple[int, ...],
+    response: Optional[Response] = None,
+) -> Response:
+    """
+    Respuesta JSON montada con los fragmentos cacheados de cada ítem (ver
+    :mod:`app.services.item_fragments`).  Copia las cabeceras ya fijadas en
+    *response* porque FastAPI no las fusiona al devolver un ``Response``.
+    """
+    content = await crud.aio.within(db, fragments.render, items, shared_versions)
+    raw = Response(content=content, media_type="application/json")
+    if response is not None:
+        raw.headers.update(response.headers)
+    return raw
+
+
 # ──────────────────────────────── Leer ───────────────────────────────────────
 
 
 @router.get("/", response_model=List[schemas.ItemOut])
-def read_items(
+async def read_items(
     request: Request,
     response: Response,
     # ------------- paginación -------------
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(
+        None,
+        description=(
+            "Cursor opaco de la cabecera Link rel=\"next\". "
+            "Envía `cursor=` vacío para empezar a paginar en modo keyset"
+        ),
+    ),
+    with_total: Optional[bool] = Query(
+        None,
+        description="Calcular X-Total-Count (por defecto sí en modo offset, no en modo cursor)",
+    ),
     # ------------- filtros ---------------
     name: Optional[str] = None,
     min_price: Optional[float] = Query(None, ge=0),
@@ -94,13 +215,30 @@ def read_items(
     available: Optional[bool] = None,
     categories: Optional[List[int]] = Query(    # ← nuevo
         default=None,
-        description="IDs de categorías (cualquiera de ellas)",
+        description="IDs de categorías (ver `category_mode`)",
+    ),
+    category_mode: str = Query(
+        "any",
+        pattern="^(any|all)$",
+        description="Con varias `categories`: 'any' (alguna) o 'all' (todas)",
+    ),
+    exclude_categories: Optional[List[int]] = Query(
+        default=None,
+        description="IDs de categorías que el ítem no debe tener",
+    ),
+    available_from: Optional[datetime] = Query(
+        None,
+        description="Libre desde (sin alquileres activos que se solapen); por defecto ahora",
+    ),
+    available_to: Optional[datetime] = Query(
+        None,
+        description="Libre hasta (franja abierta si se omite)",
     ),
     # ------------- ordenación ------------
     order_by: Optional[str] = Query(
         None,
-        pattern="^(price|name|id)$",
-        description="Campo de ordenación ('price'|'name'|'id')",
+        pattern="^(price|name|id|relevance)$",
+        description="Campo de ordenación ('price'|'name'|'id'|'relevance')",
     ),
     order_dir: Optional[str] = Query(
         None,
@@ -108,107 +246,304 @@ def read_items(
         description="Dirección ('asc'|'desc')",
     ),
     # dependencia DB
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Lista pública de ítems con filtros, paginación y soporte de ordenación.
 
     Devuelve además cabeceras **X-Total-Count** y **Link** para facilitar la
-    integración con front-ends SPA.
+    integración con front-ends SPA.  Con ``cursor`` se pagina por keyset:
+    latencia constante por página y sin ``COUNT`` salvo que se pida.
+
+    Responde ``304`` si ``If-None-Match`` coincide con el ETag actual (que
+    depende de las versiones de escritura y de la query string y, si se
+    filtra por disponibilidad, de la franja horaria).
     """
-    items, total = crud.get_items(
-        db,
-        skip=skip,
-        limit=limit,
+    versions = await crud.aio.get_versions(db, crud.ITEMS, *FRAGMENT_SCOPES)
+    max_age, extra = settings.ITEMS_CACHE_MAX_AGE, ()
+    if available is not None or available_from is not None or available_to is not None:
+        # la disponibilidad cambia con la hora (franjas que empiezan o acaban)
+        bucket, max_age = http_cache.time_bucket(settings.ITEMS_CACHE_MAX_AGE)
+        max_age, extra = min(max_age, settings.ITEMS_CACHE_MAX_AGE), (bucket,)
+    etag = http_cache.weak_etag(versions, request, *extra)
+    cache = http_cache.cache_headers(etag, max_age)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(cache)
+    response.headers.update(cache)
+    shared_versions = versions[1:]
+
+    filters = dict(
         name=name,
         min_price=min_price,
         max_price=max_price,
         available=available,
         categories=categories,
+        category_mode=category_mode,
+        exclude_categories=exclude_categories,
+        available_from=available_from,
+        available_to=available_to,
         order_by=order_by,
         order_dir=order_dir,
     )
 
+    # ► modo cursor (keyset)
+    if cursor is not None:
+        try:
+            items, next_cursor, total = await crud.aio.get_items_keyset(
+                db,
+                limit=limit,
+                cursor=cursor,
+                with_total=bool(with_total),
+                **filters,
+            )
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+
+        if total is not None:
+            response.headers["X-Total-Count"] = str(total)
+        if next_cursor:
+            response.headers["Link"] = _build_pagination_links(
+                request,
+                skip,
+                limit,
+                total,
+                next_cursor=next_cursor,
+                with_total=with_total,
+                **filters,
+            )
+        return await _items_response(db, items, shared_versions, response)
+
+    # ► modo offset
+    want_total = with_total is not False
+    try:
+        items, total = await crud.aio.get_items(
+            db,
+            skip=skip,
+            limit=limit,
+            with_total=want_total,
+            **filters,
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
     # ► cabeceras
-    response.headers["X-Total-Count"] = str(total)
-    if total:
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    if total or (total is None and items):
         link = _build_pagination_links(
             request,
             skip,
             limit,
             total,
+            has_next=len(items) == limit,
+            with_total=with_total,
+            **filters,
+        )
+        if link:
+            response.headers["Link"] = link
+
+    return await _items_response(db, items, shared_versions, response)
+
+
+# ──────────────────────────────── Facetas ────────────────────────────────────
+
+
+@router.get("/facets", response_model=schemas.ItemFacets)
+async def read_item_facets(
+    name: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    available: Optional[bool] = None,
+    categories: Optional[List[int]] = Query(
+        default=None,
+        description="IDs de categorías (ver `category_mode`)",
+    ),
+    category_mode: str = Query("any", pattern="^(any|all)$"),
+    exclude_categories: Optional[List[int]] = Query(default=None),
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    price_bucket: float = Query(10, gt=0, description="Ancho de cada tramo de precio"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Recuentos por categoría, disponibilidad e histograma de precios para los
+    mismos filtros que el listado, calculados en una única consulta.
+    """
+    try:
+        return await crud.aio.get_item_facets(
+            db,
             name=name,
             min_price=min_price,
             max_price=max_price,
             available=available,
             categories=categories,
-            order_by=order_by,
-            order_dir=order_dir,
+            category_mode=category_mode,
+            exclude_categories=exclude_categories,
+            available_from=available_from,
+            available_to=available_to,
+            price_bucket=price_bucket,
         )
-        if link:
-            response.headers["Link"] = link
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
 
-    return items
+# ───────────────────────────── Autocompletado ────────────────────────────────
+
+
+@router.get("/suggest", response_model=List[schemas.ItemSuggestion])
+async def suggest_items(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Nombres e ids de ítems cuyo nombre (o alguna de sus palabras) empieza
+    por *q*, sin distinguir mayúsculas ni tildes.  Se responde desde un
+    índice de prefijos en memoria; la BD solo se consulta para detectar
+    escrituras de otros workers (ver :mod:`app.services.item_suggest`).
+    """
+    await db.run_sync(suggestions.refresh_if_due)
+    return [{"id": item_id, "name": name} for item_id, name in suggestions.suggest(q, limit)]
 
 
 # ───────────────────────── Mis ítems ─────────────────────────────────────────
 
 
 @router.get("/me", response_model=List[schemas.ItemOut])
-def read_my_items(
-    db: Session = Depends(get_db),
+async def read_my_items(
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
     """
     Devuelve todos los ítems publicados por el usuario autenticado.
     """
-    return crud.get_items_by_owner(db, current_user.id)
+    items = await crud.aio.get_items_by_owner(db, current_user.id)
+    shared_versions = await crud.aio.get_versions(db, *FRAGMENT_SCOPES)
+    return await _items_response(db, items, shared_versions)
+
+
+# ──────────────────────────── Detalle ────────────────────────────────────────
+
+
+@router.get("/{item_id}", response_model=schemas.ItemOut)
+async def read_item(
+    item_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Detalle público de un ítem, cacheable por nginx / navegador y con
+    soporte de ``If-None-Match``.
+    """
+    versions = await crud.aio.get_versions(db, crud.ITEMS, crud.CATEGORIES)
+    etag = http_cache.weak_etag(versions, request)
+    cache = http_cache.cache_headers(etag, settings.ITEMS_CACHE_MAX_AGE)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(cache)
+
+    db_item = await crud.aio.get_item(db, item_id)
+    if not db_item:
+        raise HTTPException(404, "Item no encontrado")
+    response.headers.update(cache)
+    return await crud.aio.dump(db, schemas.ItemOut, db_item)
+
+
+def _similar_ids(db: Session, item_id: int, limit: int) -> Optional[List[int]]:
+    """Ids del top-*limit* del índice vectorial; ``None`` si el ítem no existe."""
+    similar_items.refresh_if_due(db)
+    ids = similar_items.similar(item_id, limit)
+    if ids is not None:
+        return ids
+    # recién creado en otro worker y aún sin refrescar (o borrado entre
+    # medias): se vectoriza aparte a partir de la fila, si sigue existiendo
+    db_item = crud.get_item(db, item_id)
+    if not db_item:
+        return None
+    doc = docs_from([db_item])[item_id]
+    return similar_items.similar(item_id, limit, doc, category_cache.snapshot(db))
+
+
+@router.get("/{item_id}/similar", response_model=List[schemas.ItemOut])
+async def read_similar_items(
+    item_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(8, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ítems parecidos (texto, categorías y precio) desde el índice vectorial
+    en memoria (ver :mod:`app.services.similar_items`); solo se leen de la
+    BD, por PK, los ítems que se devuelven.
+    """
+    versions = await crud.aio.get_versions(db, crud.ITEMS, *FRAGMENT_SCOPES)
+    etag = http_cache.weak_etag(versions, request)
+    cache = http_cache.cache_headers(etag, settings.ITEMS_CACHE_MAX_AGE)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(cache)
+
+    ids = await db.run_sync(_similar_ids, item_id, limit)
+    if ids is None:
+        raise HTTPException(404, "Item no encontrado")
+
+    response.headers.update(cache)
+    items = await crud.aio.get_items_by_ids(db, ids)
+    return await _items_response(db, items, versions[1:], response)
 
 
 # ──────────────────────────── Actualizar ─────────────────────────────────────
 
 
 @router.patch("/{item_id}", response_model=schemas.ItemOut)
-def partial_update_item(
+async def partial_update_item(
     item_id: int,
     item_in: schemas.ItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    db_item = crud.get_item(db, item_id)
+    db_item = await crud.aio.get_item(db, item_id)
     if not db_item or db_item.owner_id != current_user.id:
         raise HTTPException(404, "Item no encontrado")
-    return crud.update_item(db, db_item, item_in)
+    try:
+        db_item = await crud.aio.update_item(db, db_item, item_in)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return await crud.aio.dump(db, schemas.ItemOut, db_item)
 
 
 @router.put("/{item_id}", response_model=schemas.ItemOut)
-def full_update_item(
+async def full_update_item(
     item_id: int,
     item_in: schemas.ItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    db_item = crud.get_item(db, item_id)
+    db_item = await crud.aio.get_item(db, item_id)
     if not db_item or db_item.owner_id != current_user.id:
         raise HTTPException(404, "Item no encontrado")
     # Reutilizamos la lógica de PATCH convirtiendo ItemCreate → ItemUpdate
-    return crud.update_item(
-        db,
-        db_item,
-        schemas.ItemUpdate(**item_in.model_dump()),
-    )
+    try:
+        db_item = await crud.aio.update_item(
+            db,
+            db_item,
+            schemas.ItemUpdate(**item_in.model_dump()),
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return await crud.aio.dump(db, schemas.ItemOut, db_item)
 
 
 # ──────────────────────────── Eliminar ───────────────────────────────────────
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_item(
+async def delete_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    db_item = crud.get_item(db, item_id)
+    db_item = await crud.aio.get_item(db, item_id)
     if not db_item or db_item.owner_id != current_user.id:
         raise HTTPException(404, "Item no encontrado")
-    crud.delete_item(db, db_item)
+    await crud.aio.delete_item(db, db_item)
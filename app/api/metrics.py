@@ -0,0 +1,37 @@
+# app/api/metrics.py
+"""
+Métricas de los servicios en memoria de este worker (cachés, pools).
+Cada worker responde con sus propios contadores.
+
+Sin autenticación: es un endpoint interno.  nginx lo bloquea hacia fuera
+(``frontend/nginx.conf``); se consulta desde la red de los contenedores
+contra ``backend:8000``.
+"""
+from fastapi import APIRouter
+
+from app.services.category_cache import categories
+from app.services.category_index import category_index
+from app.services.image_variants import renderer
+from app.services.item_fragments import fragments
+from app.services.item_suggest import suggestions
+from app.services.similar_items import similar_items
+from app.services.password_hasher import hasher
+from app.services.principal_cache import principals
+from app.services.revocation import revocations
+
+router = APIRouter()
+
+
+@router.get("/")
+def read_metrics():
+    return {
+        "password_hasher": hasher.stats(),
+        "item_fragments": fragments.stats(),
+        "image_variants": renderer.stats(),
+        "categories": categories.stats(),
+        "category_index": category_index.stats(),
+        "item_suggest": suggestions.stats(),
+        "similar_items": similar_items.stats(),
+        "principal_cache": principals.stats(),
+        "revocations": revocations.stats(),
+    }
@@ -1,33 +1,38 @@
 # app/api/rentals.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app import crud, schemas
-from app.deps import get_db, get_current_user
+from app.deps import get_async_db, get_current_user
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.RentalOut, status_code=status.HTTP_201_CREATED)
-def rent_item(rent_in: schemas.RentalCreate,
-              db: Session = Depends(get_db),
-              current_user=Depends(get_current_user)):
-    # comprueba que el ítem está libre
-    item = crud.get_item(db, rent_in.item_id)
-    if not item or not item.available:
-        raise HTTPException(400, "Item no disponible")
-    return crud.create_rental(db, current_user.id, rent_in)
+async def rent_item(rent_in: schemas.RentalCreate,
+                    db: AsyncSession = Depends(get_async_db),
+                    current_user=Depends(get_current_user)):
+    # la comprobación de solapes va dentro de la propia inserción (atómica)
+    try:
+        rental = await crud.aio.create_rental(db, current_user.id, rent_in)
+    except crud.ItemNotFound:
+        raise HTTPException(404, "Item no encontrado")
+    except crud.RentalConflict as exc:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(exc))
+    return await crud.aio.dump(db, schemas.RentalOut, rental)
 
 @router.get("/me", response_model=List[schemas.RentalOut])
-def read_my_rentals(db: Session = Depends(get_db),
-                    current_user=Depends(get_current_user)):
-    return crud.get_rentals_by_user(db, current_user.id)
+async def read_my_rentals(db: AsyncSession = Depends(get_async_db),
+                          current_user=Depends(get_current_user)):
+    rentals = await crud.aio.get_rentals_by_user(db, current_user.id)
+    return await crud.aio.dump(db, schemas.RentalOut, rentals)
 
 @router.post("/{rental_id}/return", response_model=schemas.RentalOut)
-def return_item(rental_id: int,
-                db: Session = Depends(get_db),
-                current_user=Depends(get_current_user)):
-    rental = crud.get_rental(db, rental_id)
+async def return_item(rental_id: int,
+                      db: AsyncSession = Depends(get_async_db),
+                      current_user=Depends(get_current_user)):
+    rental = await crud.aio.get_rental(db, rental_id)
     if not rental or rental.renter_id != current_user.id:
         raise HTTPException(404, "Alquiler no encontrado")
-    return crud.mark_returned(db, rental)
+    rental = await crud.aio.mark_returned(db, rental)
+    return await crud.aio.dump(db, schemas.RentalOut, rental)
@@ -1,37 +1,327 @@
 # app/api/upload.py
-import os
-import shutil
-import uuid
-from fastapi import APIRouter, UploadFile, Depends, HTTPException, Request
-from starlette.status import HTTP_201_CREATED
+from email.utils import formatdate
+from typing import AsyncIterator
 
+import multipart
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_423_LOCKED,
+)
+
+from app import schemas
+from app.core.config import settings
+from app.core.resumable import OffsetMismatch, SessionBusy, SessionNotFound, UploadSession, sessions
+from app.core.storage import CONTENT_TYPES, LocalStorage, storage
+from app.core.uploads import (
+    SNIFF_BYTES,
+    DigestMismatch,
+    UnsupportedImage,
+    UploadTooLarge,
+    sniff_image,
+)
 from app.deps import get_current_user
+from app.services.image_variants import renderer
 
-UPLOAD_DIR = "./uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# margen para cabeceras / boundaries del multipart al validar Content-Length
+_MULTIPART_OVERHEAD = 16 * 1024
 
 router = APIRouter()
 
-@router.post("/", status_code=HTTP_201_CREATED)
+
+class _FilePartReader:
+    """
+    Parser multipart incremental que solo conserva los bytes del campo
+    ``file``.  A diferencia de ``UploadFile`` no vuelca antes el cuerpo
+    entero a un temporal: cada fragmento se entrega según llega.  Un cuerpo
+    que acaba antes del boundary final lanza ``MultipartParseError``.
+    """
+
+    def __init__(self, boundary: bytes):
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file = False
+        self.found = False
+        self._complete = False
+        self._pending: list[bytes] = []
+        self._parser = multipart.MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_end": self._on_end,
+            },
+        )
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._in_file = not self.found and options.get(b"name") == b"file" and b"filename" in options
+        self.found = self.found or self._in_file
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
+
+    def _on_end(self) -> None:
+        self._complete = True
+
+    async def chunks(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for raw in stream:
+            self._parser.write(raw)
+            pending, self._pending = self._pending, []
+            for chunk in pending:
+                yield chunk
+        # finalize() aún no comprueba el estado (python-multipart): lo hacemos
+        # aquí, antes de que store_stream dé el fichero por bueno
+        self._parser.finalize()
+        if not self._complete:
+            raise MultipartParseError("Cuerpo multipart truncado")
+
+
+@router.post("/", status_code=HTTP_201_CREATED, response_model=schemas.UploadOut)
 async def upload_image(
-    file: UploadFile,
+    request: Request,
+    background: BackgroundTasks,
+    user=Depends(get_current_user),
+):
+    """Subida clásica a través de la API (multipart con el campo ``file``)."""
+    # ───── validación previa (sin leer el cuerpo) ─────
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Se espera multipart/form-data con el campo file")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Archivo demasiado grande")
+
+    # ───── guardado (streaming, temporal + rename) ─────
+    reader = _FilePartReader(params[b"boundary"])
+    try:
+        key = await storage.store_stream(reader.chunks(request.stream()), settings.UPLOAD_MAX_BYTES)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="Cuerpo multipart incompleto o mal formado")
+    except UnsupportedImage as exc:
+        if not reader.found:
+            raise HTTPException(status_code=HTTP_422_UNPROCESSABLE_ENTITY, detail="Falta el campo file")
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return _registered(request, background, key)
+
+
+# ─────────────────── subida directa al almacenamiento ────────────────────────
+
+
+@router.post("/presign", response_model=schemas.PresignOut)
+async def presign_upload(
+    upload_in: schemas.PresignIn,
     request: Request,
     user=Depends(get_current_user),
 ):
-    # ───── validación simple ─────
-    if file.content_type.split("/")[0] != "image":
+    """
+    Paso 1: URL prefirmada para que el navegador haga ``PUT`` del fichero
+    directamente al almacenamiento.  La clave es ``<sha256>.<ext>``; si ese
+    contenido ya existe se devuelve ``upload: null`` y basta con completar
+    (se renueva su fecha para que el GC no lo borre entretanto).
+    """
+    ext = CONTENT_TYPES.get(upload_in.content_type)
+    if ext is None:
         raise HTTPException(status_code=400, detail="Solo se permiten imágenes")
+    if upload_in.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Archivo demasiado grande")
+
+    key = f"{upload_in.sha256}.{ext}"
+    upload = None
+    if not await run_in_threadpool(storage.touch, key):
+        upload = await run_in_threadpool(
+            storage.presign_put, request, key, upload_in.content_type, upload_in.size, upload_in.sha256
+        )
+    return {"key": key, "upload": upload, "expires_in": settings.UPLOAD_PRESIGN_EXPIRES}
+
 
-    # ───── guardado en disco ─────
-    ext  = os.path.splitext(file.filename)[1]
-    name = f"{uuid.uuid4()}{ext}"
-    path = os.path.join(UPLOAD_DIR, name)
+@router.put("/direct/{token}", name="upload_direct", include_in_schema=False)
+async def upload_direct(token: str, request: Request):
+    """
+    Destino de las URLs "prefirmadas" del backend local (el equivalente al
+    PUT de S3).  El token firmado fija clave, tamaño y sha256.
+    """
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    try:
+        claims = storage.verify_direct_token(token)
+        key = await storage.store_stream(request.stream(), claims["size"], claims["sha256"])
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    except (UnsupportedImage, DigestMismatch, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if key != claims["key"]:
+        raise HTTPException(status_code=400, detail="El tipo del fichero no coincide con el declarado")
+    return Response(status_code=200)
 
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
-    # ───── URL pública del archivo ─────
-    # Genera la ruta absoluta basándose en el mount StaticFiles →  /uploads/…
-    url = request.url_for("uploads", path=name)      # http://<host>:<port>/uploads/<uuid>.<ext>
+@router.post("/complete", response_model=schemas.UploadOut)
+async def complete_upload(
+    complete_in: schemas.CompleteIn,
+    request: Request,
+    background: BackgroundTasks,
+    user=Depends(get_current_user),
+):
+    """
+    Paso 2: comprueba el objeto subido (existe, tamaño, firma de imagen) y
+    devuelve su URL pública para usarla en ``image_urls``.
+    """
+    key = complete_in.key
+    found = await run_in_threadpool(storage.head, key, SNIFF_BYTES)
+    if found is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="El objeto no se ha subido")
+    size, head = found
+    if size > settings.UPLOAD_MAX_BYTES or sniff_image(head) != key.rsplit(".", 1)[1]:
+        await run_in_threadpool(storage.delete, key)
+        raise HTTPException(status_code=400, detail="El objeto subido no es una imagen válida")
+    # puede ser un contenido antiguo deduplicado: el GC cuenta desde ahora
+    await run_in_threadpool(storage.touch, key)
+    return _registered(request, background, key)
+
+
+# ──────────────────── subida reanudable (estilo tus 1.0) ──────────────────────
+#
+#   POST  /sessions          Upload-Length: N           → 201 + Location
+#   HEAD  /sessions/{id}                                → Upload-Offset
+#   PATCH /sessions/{id}     Upload-Offset: k + bytes   → 204 + Upload-Offset
+#   POST  /sessions/{id}/finalize                       → {"url": …}
+
+TUS_VERSION = "1.0.0"
+OFFSET_STREAM = "application/offset+octet-stream"
+
+
+def _tus_headers(session: UploadSession) -> dict:
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "Upload-Offset": str(session.offset),
+        "Upload-Length": str(session.length),
+        "Upload-Expires": formatdate(session.expires_at, usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def _header_int(request: Request, name: str) -> int:
+    value = request.headers.get(name, "")
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail=f"Falta la cabecera {name}")
+    return int(value)
+
+
+def _get_session(session_id: str, user) -> UploadSession:
+    try:
+        return sessions.get(session_id, user.id)
+    except SessionNotFound:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Sesión de subida no encontrada o caducada")
+
+
+@router.post("/sessions", status_code=HTTP_201_CREATED)
+async def create_upload_session(request: Request, user=Depends(get_current_user)):
+    """Abre una subida reanudable de ``Upload-Length`` bytes."""
+    length = _header_int(request, "Upload-Length")
+    if not 0 < length <= settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Archivo demasiado grande")
+    session = await run_in_threadpool(sessions.create, user.id, length)
+    location = request.url_for("upload_session", session_id=session.id)
+    return Response(
+        status_code=HTTP_201_CREATED,
+        headers={**_tus_headers(session), "Location": str(location)},
+    )
+
+
+@router.head("/sessions/{session_id}", name="upload_session")
+async def upload_session_status(session_id: str, user=Depends(get_current_user)):
+    """Progreso: el cliente reanuda desde ``Upload-Offset``."""
+    session = await run_in_threadpool(_get_session, session_id, user)
+    return Response(headers=_tus_headers(session))
+
+
+@router.patch("/sessions/{session_id}", status_code=HTTP_204_NO_CONTENT)
+async def upload_session_chunk(session_id: str, request: Request, user=Depends(get_current_user)):
+    """Añade un trozo en ``Upload-Offset`` (debe coincidir con lo recibido)."""
+    if request.headers.get("content-type", "").split(";")[0].strip() != OFFSET_STREAM:
+        raise HTTPException(status_code=HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Usa {OFFSET_STREAM}")
+    offset = _header_int(request, "Upload-Offset")
+    session = await run_in_threadpool(_get_session, session_id, user)
+    try:
+        await sessions.append(session, offset, request.stream())
+    except OffsetMismatch as exc:
+        raise HTTPException(status_code=HTTP_409_CONFLICT, detail=str(exc), headers=_tus_headers(session))
+    except SessionBusy:
+        raise HTTPException(status_code=HTTP_423_LOCKED, detail="Ya hay un PATCH en curso para esta sesión")
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+
+    # rechazo temprano: en cuanto hay bytes suficientes se comprueba la firma
+    if session.offset >= SNIFF_BYTES and offset < SNIFF_BYTES:
+        head = await run_in_threadpool(sessions.read_head, session, SNIFF_BYTES)
+        if sniff_image(head) is None:
+            await run_in_threadpool(sessions.delete, session.id)
+            raise HTTPException(status_code=400, detail="Solo se permiten imágenes")
+    return Response(status_code=HTTP_204_NO_CONTENT, headers=_tus_headers(session))
+
+
+@router.post("/sessions/{session_id}/finalize", response_model=schemas.UploadOut)
+async def finalize_upload_session(
+    session_id: str,
+    request: Request,
+    background: BackgroundTasks,
+    user=Depends(get_current_user),
+):
+    """Pasa la subida completa al almacenamiento normal y cierra la sesión."""
+    session = await run_in_threadpool(_get_session, session_id, user)
+    if not session.complete:
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail=f"Faltan {session.length - session.offset} bytes",
+            headers=_tus_headers(session),
+        )
+    try:
+        key = await run_in_threadpool(storage.store_file, sessions.part_path(session))
+    except UnsupportedImage as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        await run_in_threadpool(sessions.delete, session.id)
+    return _registered(request, background, key)
+
 
-    return {"url": str(url)}
+def _registered(request: Request, background: BackgroundTasks, key: str) -> dict:
+    # miniaturas / WebP en el pool de procesos, tras responder (backend local)
+    if isinstance(storage, LocalStorage):
+        background.add_task(renderer.render_all, storage.directory, key)
+    return {"url": storage.public_url(request, key)}
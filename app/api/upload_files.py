@@ -0,0 +1,85 @@
+# app/api/upload_files.py
+"""
+Servidor de ``/uploads``.
+
+Los nombres son direccionados por contenido (``<sha256>.<ext>``) y las
+variantes derivan de ellos, así que una URL nunca cambia de bytes:
+
+· ``Cache-Control: public, max-age=31536000, immutable`` en todo.
+· ETag **fuerte** sacado del propio nombre (igual en todos los workers y
+  réplicas); ``If-None-Match`` → 304 y ``Range`` / ``If-Range`` → 206 los
+  resuelve ``FileResponse``.
+· Si ``UPLOADS_X_ACCEL_PREFIX`` está definido, Python solo valida (y
+  genera la variante si falta) y responde con ``X-Accel-Redirect``: nginx
+  envía los bytes desde su ``location internal`` (ver ``frontend/nginx.conf``).
+"""
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.config import settings
+from app.core.images import parse_variant_path
+from app.core.uploads import IMMUTABLE
+from app.services.image_variants import renderer
+
+_SHA256_NAME = re.compile(r"^([0-9a-f]{64})\.\w+$")
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def upload_etag(relpath: str, stat_result: os.stat_result) -> str:
+    """ETag fuerte: el hash del nombre si es por contenido, si no nombre+tamaño."""
+    variant = parse_variant_path(relpath)
+    name = variant[1] if variant else relpath
+    match = _SHA256_NAME.match(name)
+    if match:
+        tag = match.group(1)
+    else:   # subidas antiguas <uuid>.<ext>: también inmutables
+        tag = hashlib.blake2b(f"{name}:{stat_result.st_size}".encode(), digest_size=16).hexdigest()
+    return f'"{tag}-{variant[0]}"' if variant else f'"{tag}"'
+
+
+class UploadFiles(StaticFiles):
+    """``StaticFiles`` inmutable que genera bajo demanda las variantes que falten."""
+
+    async def get_response(self, path: str, scope):
+        # .sessions/ (subidas reanudables) y los .part en curso no se sirven
+        if any(part.startswith(".") for part in path.replace(os.sep, "/").split("/")):
+            raise HTTPException(status_code=404)
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as exc:
+            parsed = parse_variant_path(path.replace(os.sep, "/"))
+            if exc.status_code != 404 or parsed is None:
+                raise
+        variant, name = parsed
+        try:
+            await renderer.ensure(str(self.directory), name, variant)
+        except Exception:  # noqa: BLE001  → sin original, corrupto o formato no soportado
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        relpath = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+        headers = {"Cache-Control": IMMUTABLE, "ETag": upload_etag(relpath, stat_result)}
+
+        if settings.UPLOADS_X_ACCEL_PREFIX:
+            media_type = mimetypes.guess_type(relpath)[0] or "application/octet-stream"
+            headers["X-Accel-Redirect"] = settings.UPLOADS_X_ACCEL_PREFIX.rstrip("/") + "/" + quote(relpath)
+            response = Response(status_code=status_code, headers=headers, media_type=media_type)
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
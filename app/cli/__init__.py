@@ -0,0 +1 @@
+# app/cli: comandos de mantenimiento (python -m app.cli.<comando>)
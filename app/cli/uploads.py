@@ -0,0 +1,109 @@
+# app/cli/uploads.py
+"""
+Mantenimiento del directorio ``uploads/``.
+
+    python -m app.cli.uploads migrate [--dry-run]
+        Renombra los ficheros antiguos (``<uuid>.<ext>``) a su nombre por
+        contenido (``<sha256>.<ext>``), fusiona duplicados y reescribe las
+        URLs en la BD.  Es idempotente.
+
+    python -m app.cli.uploads gc [--grace-hours H] [--dry-run]
+        Borra los ficheros (y sus variantes) que ya no referencia ningún
+        ítem y las subidas reanudables caducadas.  Pensado para un cron diario.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.resumable import sessions
+from app.core.uploads import (
+    SNIFF_BYTES,
+    collect_garbage,
+    content_name,
+    file_digest,
+    remove_variants,
+    sniff_image,
+)
+from app.models.database import SessionLocal
+
+
+def migrate_uploads(db: Session, directory: str, dry_run: bool = False) -> Dict[str, str]:
+    """
+    Pasa *directory* a direccionamiento por contenido.  El nuevo nombre se
+    crea (enlace duro o copia) antes de tocar la BD y el viejo se borra
+    después del commit, así que ninguna URL apunta nunca a un fichero que
+    no existe.  Devuelve ``{viejo: nuevo}``.
+    """
+    renames: Dict[str, str] = {}
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if not entry.is_file() or entry.name.startswith("."):
+            continue
+        with open(entry.path, "rb") as fh:
+            ext = sniff_image(fh.read(SNIFF_BYTES))
+        ext = ext or os.path.splitext(entry.name)[1].lstrip(".").lower() or "bin"
+        new = content_name(file_digest(entry.path), ext)
+        if new != entry.name:
+            renames[entry.name] = new
+    if dry_run or not renames:
+        return renames
+
+    for old, new in renames.items():
+        target = os.path.join(directory, new)
+        if not os.path.exists(target):
+            try:
+                os.link(os.path.join(directory, old), target)
+            except OSError:
+                shutil.copy2(os.path.join(directory, old), target)
+
+    crud.rename_upload_urls(db, renames)
+
+    for old in renames:
+        os.remove(os.path.join(directory, old))
+    remove_variants(directory, set(renames))
+    return renames
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.uploads", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=settings.UPLOAD_DIR, help="directorio de subidas (backend local)")
+    parser.add_argument("--dry-run", action="store_true", help="solo informa, no modifica nada")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="renombra a <sha256>.<ext> y reescribe URLs")
+    gc = sub.add_parser("gc", help="borra ficheros sin referencias")
+    gc.add_argument(
+        "--grace-hours",
+        type=float,
+        default=settings.UPLOAD_GC_GRACE_HOURS,
+        help="no borra ficheros más recientes que esto",
+    )
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.command == "migrate":
+            renames = migrate_uploads(db, args.dir, args.dry_run)
+            for old, new in renames.items():
+                print(f"{old} → {new}")
+            print(f"{len(renames)} fichero(s) {'a renombrar' if args.dry_run else 'renombrados'}")
+        else:
+            removed = collect_garbage(
+                args.dir,
+                crud.get_referenced_uploads(db),
+                args.grace_hours * 3600,
+                dry_run=args.dry_run,
+            )
+            for path in removed:
+                print(path)
+            print(f"{len(removed)} fichero(s) {'a borrar' if args.dry_run else 'borrados'}")
+            if not args.dry_run:
+                print(f"{sessions.sweep()} sesión(es) de subida reanudable caducada(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,41 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str           # p. ej. sqlite:///./rental.db
+    ASYNC_DATABASE_URL: str | None = None  # routers; None = DATABASE_URL con aiosqlite / asyncpg
+    SQL_ECHO: bool = False      # True en dev para ver el SQL en consola (ambos engines)
     SECRET_KEY: str             # usa algo largo y aleatorio
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    ITEMS_CACHE_MAX_AGE: int = 30   # s que nginx / navegador reutilizan listados
+    AVAILABILITY_SYNC_SECONDS: int = 60     # cada cuánto se recalcula items.available (franjas que empiezan/acaban)
+    AVAILABILITY_SYNC_LOCK: str | None = None  # flock del worker que sincroniza (None = <tmp>/rental-availability.lock)
+    ITEM_FRAGMENT_CACHE_SIZE: int = 10_000  # fragmentos JSON de ItemOut por worker
+    BULK_IMPORT_CHUNK_SIZE: int = 500       # filas por commit en /api/items/bulk
+    PASSWORD_HASH_WORKERS: int | None = None  # procesos bcrypt (None = núcleos, 0 = threadpool)
+    PASSWORD_HASH_QUEUE: int = 32           # peticiones en espera antes de responder 503
+    PASSWORD_HASH_RETRY_AFTER: int = 1      # s sugeridos en Retry-After
+    PRINCIPAL_CACHE_TTL: int = 60           # s que get_current_user reutiliza un token
+    PRINCIPAL_CACHE_SIZE: int = 10_000      # tokens verificados por worker
+    REVOCATION_REFRESH_SECONDS: int = 5     # cada cuánto lee un worker los logouts de otros
+    REVOCATION_BLOOM_BITS: int = 1 << 20    # tamaño del filtro de Bloom (128 KiB)
+    CATEGORY_INDEX_MAX_IDS: int = 5_000     # ids máx. en el IN del índice de categorías
+    ITEM_SUGGEST_REFRESH_SECONDS: int = 5   # cada cuánto ve el autocompletado escrituras de otros workers
+    SIMILAR_REFRESH_SECONDS: int = 5        # ídem para el índice de ítems similares
+    SIMILAR_TEXT_DIM: int = 256             # columnas del TF-IDF por hashing (~1 KiB por ítem)
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # tope por imagen en /api/upload
+    UPLOAD_DIR: str = "./uploads"           # backend local de imágenes
+    STORAGE_BACKEND: str = "local"          # local | s3
+    S3_BUCKET: str | None = None
+    S3_ENDPOINT_URL: str | None = None      # MinIO / R2 / …; None = AWS
+    S3_REGION: str = "us-east-1"
+    S3_PUBLIC_BASE_URL: str | None = None   # CDN delante del bucket
+    UPLOAD_PRESIGN_EXPIRES: int = 600       # s de validez de las URLs prefirmadas
+    UPLOAD_SESSIONS_DIR: str | None = None  # subidas reanudables; None = <UPLOAD_DIR>/.sessions (mismo volumen)
+    UPLOAD_SESSION_TTL: int = 24 * 3600     # s sin actividad antes de caducar
+    IMAGE_VARIANT_WORKERS: int | None = None  # procesos para miniaturas (None = núcleos)
+    UPLOAD_GC_GRACE_HOURS: float = 24       # el GC no toca subidas más recientes
+    UPLOADS_X_ACCEL_PREFIX: str | None = None  # p. ej. /_uploads/ → nginx envía los ficheros
+    PUBLIC_BASE_URL: str | None = None      # origen público (https://rental.example.com); variantes solo para sus /uploads/
 
     class Config:
         env_file = ".env"
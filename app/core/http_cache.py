@@ -0,0 +1,52 @@
+# app/core/http_cache.py
+"""
+Helpers de caché HTTP: ETags débiles a partir de las versiones de
+escritura y evaluación de ``If-None-Match`` sin tocar el ORM.
+"""
+import hashlib
+import time
+
+from fastapi import Request, Response
+
+
+def weak_etag(versions: tuple[int, ...], request: Request, *extra) -> str:
+    """
+    ETag débil = versiones + parámetros de la petición (ordenados, para que
+    ``?a=1&b=2`` y ``?b=2&a=1`` compartan entrada).  Es débil porque nginx
+    puede re-comprimir el cuerpo.
+    """
+    params = sorted(request.query_params.multi_items())
+    key = repr((request.url.path, params, extra)).encode()
+    digest = hashlib.blake2b(key, digest_size=8).hexdigest()
+    return f'W/"{"-".join(map(str, versions))}-{digest}"'
+
+
+def time_bucket(seconds: int) -> tuple[int, int]:
+    """
+    ``(franja, segundos que le quedan)`` para respuestas que dependen de la
+    hora: con la franja en el ETag y ``max-age`` ≤ lo que queda de ella,
+    ni el navegador ni nginx la sirven cuando ya ha cambiado.
+    """
+    seconds = max(1, seconds)
+    now = int(time.time())
+    return now // seconds, seconds - now % seconds
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True si el cliente ya tiene *etag* (comparación débil, RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def cache_headers(etag: str, max_age: int, private: bool = False) -> dict[str, str]:
+    scope = "private" if private else "public"
+    return {"ETag": etag, "Cache-Control": f"{scope}, max-age={max_age}"}
+
+
+def not_modified_response(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
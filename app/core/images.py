@@ -0,0 +1,79 @@
+# app/core/images.py
+"""
+Variantes derivadas de las imágenes subidas (miniaturas WebP/AVIF).
+
+Las variantes son una función determinista del nombre del original, así
+que no necesitan tabla propia: el disco es el registro.  Se guardan junto
+a los originales, en ``uploads/_v/<variante>/<original>.<formato>`` (p. ej.
+``_v/thumb/3f2a….png.webp``), y se
+sirven por el mismo ``/uploads`` (generándose al vuelo si faltan).
+"""
+from __future__ import annotations
+
+import posixpath
+from typing import Dict, NamedTuple
+from urllib.parse import SplitResult, urlsplit, urlunsplit
+
+from app.core.config import settings
+
+VARIANTS_DIR = "_v"
+UPLOADS_PREFIX = "/uploads/"
+
+
+class VariantSpec(NamedTuple):
+    max_side: int     # px del lado mayor
+    format: str       # formato Pillow
+    quality: int
+
+
+VARIANTS: Dict[str, VariantSpec] = {
+    "thumb": VariantSpec(320, "webp", 75),
+    "medium": VariantSpec(960, "webp", 80),
+    "thumb_avif": VariantSpec(320, "avif", 60),
+}
+
+
+def variant_relpath(name: str, variant: str) -> str:
+    """Ruta (relativa a ``uploads/``) de *variant* para el original *name*."""
+    return posixpath.join(VARIANTS_DIR, variant, f"{name}.{VARIANTS[variant].format}")
+
+
+def parse_variant_path(path: str) -> tuple[str, str] | None:
+    """
+    Inversa de :func:`variant_relpath`: ``(variante, original)`` o None si
+    *path* no es una ruta de variante válida.
+    """
+    parts = path.split("/")
+    if len(parts) != 3 or parts[0] != VARIANTS_DIR or parts[1] not in VARIANTS:
+        return None
+    name, ext = posixpath.splitext(parts[2])
+    if not name or name.startswith(".") or ext != f".{VARIANTS[parts[1]].format}":
+        return None
+    return parts[1], name
+
+
+def _is_own_origin(parts: SplitResult) -> bool:
+    """URL relativa o del origen público de la app (``PUBLIC_BASE_URL``)."""
+    if not parts.scheme and not parts.netloc:
+        return True
+    if not settings.PUBLIC_BASE_URL:
+        return False
+    own = urlsplit(settings.PUBLIC_BASE_URL)
+    return (parts.scheme.lower(), parts.netloc.lower()) == (own.scheme.lower(), own.netloc.lower())
+
+
+def variant_urls(url: str) -> Dict[str, str]:
+    """
+    URLs de las variantes de *url*; vacío si no es una subida propia (otro
+    host cuya ruta empiece por ``/uploads/`` no es nuestro).
+    """
+    parts = urlsplit(url)
+    if not _is_own_origin(parts) or not parts.path.startswith(UPLOADS_PREFIX):
+        return {}
+    name = parts.path[len(UPLOADS_PREFIX):]
+    if not name or name.startswith(VARIANTS_DIR + "/"):
+        return {}
+    return {
+        variant: urlunsplit(parts._replace(path=UPLOADS_PREFIX + variant_relpath(name, variant)))
+        for variant in VARIANTS
+    }
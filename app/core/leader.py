@@ -0,0 +1,42 @@
+# app/core/leader.py
+"""
+Un único worker para las tareas periódicas.
+
+``uvicorn --workers N`` arranca N procesos con el mismo lifespan; lo que solo
+debe correr una vez por máquina (p. ej. la sincronización de disponibilidad)
+toma antes un ``flock`` no bloqueante sobre un fichero compartido.  El sistema
+lo suelta si el proceso muere y otro worker lo coge en su siguiente intento.
+"""
+import os
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: en desarrollo hay un solo proceso
+    fcntl = None
+
+
+class LeaderLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        """True si este proceso es (o acaba de ser elegido) líder."""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)        # cerrar el descriptor suelta el flock
+        self._fd = None
@@ -0,0 +1,185 @@
+# app/core/resumable.py
+"""
+Sesiones de subida reanudable (al estilo tus 1.0).
+
+Cada sesión son dos ficheros en ``UPLOAD_SESSIONS_DIR`` (compartido por
+todos los workers; por defecto ``<UPLOAD_DIR>/.sessions`` para que
+finalizar sea un ``rename`` dentro del mismo volumen): ``<id>.json`` con
+los metadatos y ``<id>.part`` con los bytes recibidos.  El *offset* es siempre el tamaño real de ``.part``:
+si la conexión se corta a mitad de un ``PATCH`` lo escrito se conserva y
+el cliente reanuda desde ahí tras consultar ``HEAD``.
+
+Las sesiones caducan ``UPLOAD_SESSION_TTL`` segundos después de su última
+actividad; :meth:`SessionStore.sweep` las borra (se llama al crear
+sesiones y desde ``python -m app.cli.uploads gc``).
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator
+
+import anyio
+
+from app.core.config import settings
+from app.core.uploads import UploadTooLarge
+
+_ID = re.compile(r"^[A-Za-z0-9_-]{22}$")
+
+
+class SessionNotFound(LookupError):
+    """La sesión no existe, caducó o pertenece a otro usuario."""
+
+
+class OffsetMismatch(ValueError):
+    """El ``Upload-Offset`` del cliente no coincide con lo recibido."""
+
+
+class SessionBusy(RuntimeError):
+    """Otro ``PATCH`` está escribiendo en la misma sesión."""
+
+
+@dataclass
+class UploadSession:
+    id: str
+    owner_id: int
+    length: int
+    expires_at: float
+    offset: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+
+class SessionStore:
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _paths(self, session_id: str) -> tuple[str, str]:
+        if not _ID.match(session_id):
+            raise SessionNotFound(session_id)
+        base = os.path.join(self.directory, session_id)
+        return base + ".json", base + ".part"
+
+    def _save(self, session: UploadSession) -> None:
+        meta, _ = self._paths(session.id)
+        data = {k: v for k, v in asdict(session).items() if k != "offset"}
+        tmp = f"{meta}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, meta)
+
+    # ──────────────────────────── ciclo de vida ──────────────────────────────
+
+    def create(self, owner_id: int, length: int) -> UploadSession:
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+        session = UploadSession(
+            id=secrets.token_urlsafe(16),
+            owner_id=owner_id,
+            length=length,
+            expires_at=time.time() + self.ttl,
+        )
+        open(self._paths(session.id)[1], "xb").close()
+        self._save(session)
+        return session
+
+    def get(self, session_id: str, owner_id: int) -> UploadSession:
+        meta, part = self._paths(session_id)
+        try:
+            with open(meta) as fh:
+                session = UploadSession(**json.load(fh))
+            session.offset = os.path.getsize(part)
+        except (FileNotFoundError, ValueError, TypeError):
+            raise SessionNotFound(session_id)
+        if session.expires_at < time.time():
+            self.delete(session_id)
+            raise SessionNotFound(session_id)
+        if session.owner_id != owner_id:
+            raise SessionNotFound(session_id)
+        return session
+
+    async def append(self, session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Añade *chunks* en *offset* y devuelve el nuevo offset.  Un ``PATCH``
+        que se pasaría de ``length`` se descarta entero.
+        """
+        _, part = self._paths(session.id)
+        async with await anyio.open_file(part, "ab") as out:
+            fd = out.wrapped.fileno()
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SessionBusy(session.id)
+            current = os.fstat(fd).st_size
+            if current != offset:
+                raise OffsetMismatch(f"Upload-Offset {offset} ≠ {current}")
+            written = current
+            try:
+                async for chunk in chunks:
+                    if written + len(chunk) > session.length:
+                        await anyio.to_thread.run_sync(os.truncate, fd, current)
+                        raise UploadTooLarge("Se supera el Upload-Length declarado")
+                    await out.write(chunk)
+                    written += len(chunk)
+            finally:
+                await out.flush()
+        session.offset = written
+        session.expires_at = time.time() + self.ttl
+        await anyio.to_thread.run_sync(self._save, session)
+        return written
+
+    def read_head(self, session: UploadSession, n: int) -> bytes:
+        with open(self._paths(session.id)[1], "rb") as fh:
+            return fh.read(n)
+
+    def part_path(self, session: UploadSession) -> str:
+        return self._paths(session.id)[1]
+
+    def delete(self, session_id: str) -> None:
+        for path in self._paths(session_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sweep(self) -> int:
+        """Borra las sesiones caducadas (y ``.part`` huérfanos antiguos)."""
+        if not os.path.isdir(self.directory):
+            return 0
+        now = time.time()
+        removed = 0
+        for entry in list(os.scandir(self.directory)):
+            session_id, ext = os.path.splitext(entry.name)
+            if ext == ".json":
+                try:
+                    with open(entry.path) as fh:
+                        expired = json.load(fh)["expires_at"] < now
+                except (OSError, ValueError, KeyError):
+                    expired = True
+            elif ext == ".part":
+                try:
+                    expired = (
+                        not os.path.exists(os.path.join(self.directory, session_id + ".json"))
+                        and entry.stat().st_mtime < now - self.ttl
+                    )
+                except FileNotFoundError:   # ya borrado junto a su .json
+                    continue
+            else:
+                continue
+            if expired and _ID.match(session_id):
+                self.delete(session_id)
+                removed += 1
+        return removed
+
+
+SESSIONS_DIR = settings.UPLOAD_SESSIONS_DIR or os.path.join(settings.UPLOAD_DIR, ".sessions")
+
+sessions = SessionStore(SESSIONS_DIR, settings.UPLOAD_SESSION_TTL)
@@ -1,10 +1,13 @@
 # app/core/security.py
+import uuid
 from datetime import datetime, timedelta
 from jose import jwt
 from app.core.config import settings
 
-def create_access_token(subject: str) -> str:
-    to_encode = {"sub": subject}
+def create_access_token(subject: str, user_id: int | None = None) -> str:
+    to_encode = {"sub": subject, "jti": uuid.uuid4().hex}   # jti → logout
+    if user_id is not None:
+        to_encode["uid"] = user_id      # el principal se resuelve por PK
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -0,0 +1,294 @@
+# app/core/storage.py
+"""
+Almacenamiento de las imágenes subidas.
+
+· ``local`` (por defecto): ficheros en ``UPLOAD_DIR``, servidos por
+  ``/uploads``.  Sus URLs "prefirmadas" apuntan a ``PUT /api/upload/direct``
+  con un token firmado (sirve para desarrollo y tests).
+· ``s3``: cualquier servicio compatible (AWS, MinIO, R2… vía
+  ``S3_ENDPOINT_URL``).  El navegador sube directamente al bucket con una URL
+  prefirmada; los workers de uvicorn no ven ni un byte.  Necesita ``boto3``
+  (``pip install boto3``), que solo se importa con este backend.
+
+En ambos la clave es ``<sha256>.<ext>``: la URL prefirmada exige ese
+checksum (S3 rechaza el PUT si el contenido no coincide), así que el
+direccionamiento por contenido y la deduplicación se mantienen.
+"""
+from __future__ import annotations
+
+import base64
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from urllib.parse import quote
+
+from fastapi import Request
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.uploads import (
+    IMMUTABLE,
+    SNIFF_BYTES,
+    UnsupportedImage,
+    commit_file,
+    content_name,
+    file_digest,
+    sniff_image,
+    store_stream,
+)
+
+
+def _content_key(path: str) -> str:
+    with open(path, "rb") as fh:
+        ext = sniff_image(fh.read(SNIFF_BYTES))
+    if ext is None:
+        raise UnsupportedImage("Solo se permiten imágenes")
+    return content_name(file_digest(path), ext)
+
+# tipos admitidos en subidas directas → extensión (debe cuadrar con sniff_image)
+CONTENT_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
+
+_DIRECT_AUDIENCE = "upload-direct"
+
+
+class Storage(ABC):
+    """Operaciones que necesita la API sobre el almacén de imágenes."""
+
+    name: str
+
+    @abstractmethod
+    def head(self, key: str, n: int) -> tuple[int, bytes] | None:
+        """``(tamaño, primeros n bytes)`` del objeto, o None si no existe."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def public_url(self, request: Request, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def presign_put(self, request: Request, key: str, content_type: str, size: int, sha256_hex: str) -> dict:
+        """``{"url", "method", "headers"}`` para que el cliente suba *key*."""
+
+    @abstractmethod
+    async def store_stream(self, chunks: AsyncIterator[bytes], max_bytes: int) -> str:
+        """Guarda un cuerpo recibido por la API y devuelve su clave."""
+
+    @abstractmethod
+    def store_file(self, path: str) -> str:
+        """
+        Incorpora el fichero local *path* (ya completo) y devuelve su clave.
+        *path* deja de existir.  Lanza ``UnsupportedImage`` si no es imagen.
+        """
+
+    @abstractmethod
+    def touch(self, key: str) -> bool:
+        """
+        Marca *key* como recién subido, para que el GC respete el periodo de
+        gracia con un contenido ya existente que se vuelve a registrar.
+        False si no existe.
+        """
+
+    def exists(self, key: str) -> bool:
+        return self.head(key, 0) is not None
+
+
+# ─────────────────────────────── local ────────────────────────────────────────
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if "/" in key or key.startswith("."):
+            raise ValueError(f"Clave no válida: {key!r}")
+        return os.path.join(self.directory, key)
+
+    def head(self, key: str, n: int) -> tuple[int, bytes] | None:
+        try:
+            with open(self._path(key), "rb") as fh:
+                return os.fstat(fh.fileno()).st_size, fh.read(n)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def touch(self, key: str) -> bool:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def public_url(self, request: Request, key: str) -> str:
+        return str(request.url_for("uploads", path=key))
+
+    def presign_put(self, request: Request, key: str, content_type: str, size: int, sha256_hex: str) -> dict:
+        token = jwt.encode(
+            {
+                "aud": _DIRECT_AUDIENCE,
+                "key": key,
+                "size": size,
+                "sha256": sha256_hex,
+                "exp": int(time.time()) + settings.UPLOAD_PRESIGN_EXPIRES,
+            },
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM,
+        )
+        return {
+            "url": str(request.url_for("upload_direct", token=token)),
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    def verify_direct_token(self, token: str) -> dict:
+        """Claims del token de :meth:`presign_put` (ValueError si no vale)."""
+        try:
+            return jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], audience=_DIRECT_AUDIENCE
+            )
+        except JWTError as exc:
+            raise ValueError("URL de subida caducada o no válida") from exc
+
+    async def store_stream(
+        self, chunks: AsyncIterator[bytes], max_bytes: int, expected_sha256: str | None = None
+    ) -> str:
+        return await store_stream(chunks, self.directory, max_bytes, expected_sha256)
+
+    def store_file(self, path: str) -> str:
+        key = _content_key(path)
+        commit_file(path, self._path(key))
+        return key
+
+
+# ──────────────────────────────── S3 ──────────────────────────────────────────
+
+
+class S3Storage(Storage):
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str | None, region: str, public_base_url: str | None):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:  # pragma: no cover - depende del entorno
+            raise RuntimeError("STORAGE_BACKEND=s3 necesita boto3 (pip install boto3)") from exc
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+        base = public_base_url or f"{(endpoint_url or f'https://s3.{region}.amazonaws.com').rstrip('/')}/{bucket}"
+        self.public_base_url = base.rstrip("/")
+        self._not_found = self.client.exceptions.ClientError
+
+    def head(self, key: str, n: int) -> tuple[int, bytes] | None:
+        try:
+            if n == 0:
+                return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"], b""
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{n - 1}")
+        except self._not_found as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        size = int(obj["ContentRange"].rsplit("/", 1)[1]) if "ContentRange" in obj else obj["ContentLength"]
+        return size, obj["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def touch(self, key: str) -> bool:
+        # copia sobre sí mismo: renueva LastModified (reglas de ciclo de vida)
+        content_type = next(ct for ct, ext in CONTENT_TYPES.items() if key.endswith(f".{ext}"))
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket,
+                Key=key,
+                CopySource={"Bucket": self.bucket, "Key": key},
+                MetadataDirective="REPLACE",
+                ContentType=content_type,
+                CacheControl=IMMUTABLE,
+            )
+        except self._not_found as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def public_url(self, request: Request, key: str) -> str:
+        return f"{self.public_base_url}/{quote(key)}"
+
+    def presign_put(self, request: Request, key: str, content_type: str, size: int, sha256_hex: str) -> dict:
+        checksum = base64.b64encode(bytes.fromhex(sha256_hex)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE,
+            },
+            ExpiresIn=settings.UPLOAD_PRESIGN_EXPIRES,
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {
+                "Content-Type": content_type,
+                "Cache-Control": IMMUTABLE,
+                "x-amz-checksum-sha256": checksum,
+            },
+        }
+
+    async def store_stream(self, chunks: AsyncIterator[bytes], max_bytes: int) -> str:
+        # /api/upload clásico: se valida en un temporal local y se sube al bucket
+        with tempfile.TemporaryDirectory(prefix="upload-") as tmp:
+            key = await store_stream(chunks, tmp, max_bytes)
+            await run_in_threadpool(self._upload, os.path.join(tmp, key), key)
+        return key
+
+    def store_file(self, path: str) -> str:
+        key = _content_key(path)
+        if not self.exists(key):
+            self._upload(path, key)
+        os.remove(path)
+        return key
+
+    def _upload(self, path: str, key: str) -> None:
+        content_type = next(ct for ct, ext in CONTENT_TYPES.items() if key.endswith(f".{ext}"))
+        self.client.upload_file(
+            path,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type, "CacheControl": IMMUTABLE},
+        )
+
+
+def build_storage() -> Storage:
+    """Backend según ``STORAGE_BACKEND``."""
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 necesita S3_BUCKET")
+        return S3Storage(settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.S3_REGION, settings.S3_PUBLIC_BASE_URL)
+    return LocalStorage(settings.UPLOAD_DIR)
+
+
+storage = build_storage()
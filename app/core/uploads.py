@@ -0,0 +1,215 @@
+# app/core/uploads.py
+"""
+Escritura de subidas en streaming sin bloquear el event loop.
+
+· El tipo se decide por los *magic bytes* del primer fragmento, no por el
+  ``Content-Type`` ni la extensión que manda el cliente.
+· Se corta en cuanto se supera ``max_bytes`` (no se espera al final).
+· Se escribe en ``.<uuid>.part`` dentro del mismo directorio y se renombra
+  con ``os.replace`` (atómico): ``/uploads`` nunca sirve un fichero a medias.
+· El nombre final es el SHA-256 del contenido (``<sha256>.<ext>``),
+  calculado mientras llega: subir dos veces la misma foto ocupa una sola
+  vez en disco.
+
+Como varios ítems pueden compartir fichero, no se borra nada al editar o
+eliminar ítems: :func:`collect_garbage` hace *mark & sweep* contra las URLs
+que siguen en la BD (ver ``python -m app.cli.uploads gc``).
+"""
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, Iterable
+
+import anyio
+
+from app.core.images import VARIANTS_DIR
+
+SNIFF_BYTES = 12
+IMMUTABLE = "public, max-age=31536000, immutable"   # los nombres nunca cambian de bytes
+HASH_CHUNK = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """El cuerpo supera el tamaño máximo permitido."""
+
+
+class UnsupportedImage(ValueError):
+    """Los primeros bytes no corresponden a ningún formato admitido."""
+
+
+class DigestMismatch(ValueError):
+    """El contenido recibido no coincide con el SHA-256 anunciado."""
+
+
+def sniff_image(head: bytes) -> str | None:
+    """Extensión (``jpg``, ``png``, ``gif``, ``webp``) según la firma de *head*."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+async def store_stream(
+    chunks: AsyncIterator[bytes],
+    directory: str,
+    max_bytes: int,
+    expected_sha256: str | None = None,
+) -> str:
+    """
+    Vuelca *chunks* en *directory* y devuelve el nombre final del fichero.
+    Cada escritura va a un hilo (``anyio.open_file``); el loop sigue libre.
+    Con *expected_sha256* (subidas prefirmadas) se rechaza otro contenido.
+    """
+    tmp = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    ext: str | None = None
+    try:
+        async with await anyio.open_file(tmp, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"El archivo supera {max_bytes} bytes")
+                if ext is None:
+                    head += chunk
+                    if len(head) < SNIFF_BYTES:
+                        continue
+                    ext = sniff_image(head)
+                    if ext is None:
+                        raise UnsupportedImage("Solo se permiten imágenes")
+                    chunk = head
+                digest.update(chunk)
+                await out.write(chunk)
+            if ext is None:                      # fichero más corto que SNIFF_BYTES
+                ext = sniff_image(head)
+                if ext is None:
+                    raise UnsupportedImage("Solo se permiten imágenes")
+                digest.update(head)
+                await out.write(head)
+
+        if expected_sha256 is not None and digest.hexdigest() != expected_sha256:
+            raise DigestMismatch("El contenido no coincide con el sha256 firmado")
+        name = content_name(digest.hexdigest(), ext)
+        await anyio.to_thread.run_sync(commit_file, tmp, os.path.join(directory, name))
+        return name
+    except BaseException:
+        await anyio.to_thread.run_sync(_remove_quietly, tmp)
+        raise
+
+
+def content_name(hexdigest: str, ext: str) -> str:
+    return f"{hexdigest}.{ext}"
+
+
+def commit_file(tmp: str, final: str) -> None:
+    """Mueve *tmp* a *final* o, si ese contenido ya existe, lo reutiliza."""
+    if os.path.exists(final):
+        os.remove(tmp)
+        os.utime(final)      # recién "subido": el GC respeta el periodo de gracia
+    else:
+        _move(tmp, final)
+
+
+def _move(src: str, dst: str) -> None:
+    """
+    ``os.replace`` y, si *src* está en otro sistema de ficheros (``EXDEV``:
+    p. ej. sesiones fuera del volumen de subidas), copia a un temporal junto
+    a *dst*, ``fsync`` y ``rename`` atómico antes de borrar *src*.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    staging = os.path.join(os.path.dirname(dst), f".{uuid.uuid4().hex}.part")
+    try:
+        with open(src, "rb") as fin, open(staging, "wb") as fout:
+            shutil.copyfileobj(fin, fout, HASH_CHUNK)
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.replace(staging, dst)
+    except BaseException:
+        _remove_quietly(staging)
+        raise
+    os.remove(src)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ─────────────────────────── mantenimiento ───────────────────────────────────
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _variant_files(directory: str) -> Iterable[tuple[str, str]]:
+    """``(ruta, original)`` de cada variante bajo ``_v/<variante>/``."""
+    root = os.path.join(directory, VARIANTS_DIR)
+    if not os.path.isdir(root):
+        return
+    for variant in os.scandir(root):
+        if variant.is_dir():
+            for entry in os.scandir(variant.path):
+                yield entry.path, os.path.splitext(entry.name)[0]
+
+
+def remove_variants(directory: str, names: set[str]) -> None:
+    """Borra las variantes derivadas de los originales *names*."""
+    for path, original in list(_variant_files(directory)):
+        if original in names:
+            _remove_quietly(path)
+
+
+def collect_garbage(
+    directory: str,
+    referenced: set[str],
+    grace_seconds: float,
+    dry_run: bool = False,
+) -> list[str]:
+    """
+    *Sweep*: borra los originales que ninguna URL de la BD referencia
+    (*referenced*, el *mark*), sus variantes y los ``.part`` abandonados.
+    Solo toca ficheros con más de *grace_seconds* de antigüedad: una imagen
+    recién subida aún no está asociada a ningún ítem.  Devuelve las rutas
+    relativas eliminadas.
+    """
+    cutoff = time.time() - grace_seconds
+    removed: list[str] = []
+    kept: set[str] = set()
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        if entry.name in referenced or entry.stat().st_mtime > cutoff:
+            kept.add(entry.name)
+            continue
+        removed.append(entry.name)
+        if not dry_run:
+            _remove_quietly(entry.path)
+    for path, original in list(_variant_files(directory)):
+        if original not in kept:
+            removed.append(os.path.relpath(path, directory))
+            if not dry_run:
+                _remove_quietly(path)
+    return removed
@@ -15,8 +15,12 @@ from .user import (           # noqa: F401  (re-export)
 from .item import (           # noqa: F401
     get_item,
     get_items,
+    get_items_keyset,
     get_items_by_owner,
+    get_items_by_ids,
+    get_item_facets,
     create_item,
+    create_items_bulk,
     update_item,
     delete_item,
 )
@@ -27,15 +31,47 @@ from .rental import (         # noqa: F401
     get_rentals_by_user,
     create_rental,
     mark_returned,
+    sync_availability,
+    ItemNotFound,
+    RentalConflict,
 )
 
 # ───────────────────────── categories ─────────────────────────────────────
 from .category import (       # noqa: F401
     get_category,
     get_categories,
+    get_category_ids,
     create_category,
+    ParentCategoryNotFound,
 )
 
+# ───────────────────────── ficheros subidos ───────────────────────────────
+from .upload import (         # noqa: F401
+    upload_name,
+    get_referenced_uploads,
+    rename_upload_urls,
+)
+
+# ───────────────────────── tokens revocados ───────────────────────────────
+from .token import (          # noqa: F401
+    get_revoked_since,
+    revoke_token,
+    prune_revoked_tokens,
+)
+
+# ─────────────────────── versiones de escritura ───────────────────────────
+from .version import (        # noqa: F401
+    ITEMS,
+    CATEGORIES,
+    ITEM_CATEGORIES,
+    ITEM_CONTENT,
+    get_versions,
+    bump_version,
+)
+
+# ─────────────────── gemelas async (AsyncSession) ─────────────────────────
+from . import aio             # noqa: F401  (crud.aio.get_item, …)
+
 __all__: list[str] = [
     # users
     "get_user_by_username",
@@ -45,8 +81,12 @@ __all__: list[str] = [
     # items
     "get_item",
     "get_items",
+    "get_items_keyset",
     "get_items_by_owner",
+    "get_items_by_ids",
+    "get_item_facets",
     "create_item",
+    "create_items_bulk",
     "update_item",
     "delete_item",
     # rentals
@@ -54,8 +94,30 @@ __all__: list[str] = [
     "get_rentals_by_user",
     "create_rental",
     "mark_returned",
+    "sync_availability",
+    "ItemNotFound",
+    "RentalConflict",
     # categories
     "get_category",
     "get_categories",
+    "get_category_ids",
     "create_category",
+    "ParentCategoryNotFound",
+    # ficheros subidos
+    "upload_name",
+    "get_referenced_uploads",
+    "rename_upload_urls",
+    # tokens revocados
+    "get_revoked_since",
+    "revoke_token",
+    "prune_revoked_tokens",
+    # versiones
+    "ITEMS",
+    "CATEGORIES",
+    "ITEM_CATEGORIES",
+    "ITEM_CONTENT",
+    "get_versions",
+    "bump_version",
+    # async
+    "aio",
 ]
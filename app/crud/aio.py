@@ -0,0 +1,92 @@
+# app/crud/aio.py
+"""
+Gemelas ``async`` de las funciones de :mod:`app.crud` para los routers, que
+trabajan con ``AsyncSession`` (aiosqlite / asyncpg).
+
+No se duplica la lógica: cada función se ejecuta con
+``AsyncSession.run_sync``, que le pasa la ``Session`` síncrona ligada a la
+conexión asíncrona; en cada ida a la BD se cede el event loop en lugar de
+ocupar un hilo del threadpool.  Misma firma que la versión síncrona::
+
+    item = await crud.aio.get_item(db, item_id)
+
+Fuera de ``run_sync`` los objetos ORM no pueden cargar atributos perezosos
+(relaciones, o todo tras un ``commit``), así que se serializan con
+:func:`dump` o dentro de :func:`within`.
+"""
+from __future__ import annotations
+
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import category, item, rental, token, upload, user, version
+
+T = TypeVar("T")
+M = TypeVar("M", bound=BaseModel)
+
+
+def _async(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs) -> T:
+        return await db.run_sync(fn, *args, **kwargs)
+
+    return wrapper
+
+
+async def within(db: AsyncSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    """``fn(*args, **kwargs)`` donde los objetos de *db* pueden cargarse de forma perezosa."""
+    return await db.run_sync(lambda _session: fn(*args, **kwargs))
+
+
+async def dump(db: AsyncSession, schema: type[M], obj: Any) -> M | list[M]:
+    """*obj* (o una lista) validado como *schema* dentro de la sesión."""
+    if isinstance(obj, (list, tuple)):
+        return await within(db, lambda: [schema.model_validate(o) for o in obj])
+    return await within(db, schema.model_validate, obj)
+
+
+# ───────────────────────────── users ──────────────────────────────────────
+get_user_by_username = _async(user.get_user_by_username)
+get_user_by_email = _async(user.get_user_by_email)
+create_user = _async(user.create_user)
+
+# ───────────────────────────── items ──────────────────────────────────────
+get_item = _async(item.get_item)
+get_items = _async(item.get_items)
+get_items_keyset = _async(item.get_items_keyset)
+get_items_by_owner = _async(item.get_items_by_owner)
+get_items_by_ids = _async(item.get_items_by_ids)
+get_item_facets = _async(item.get_item_facets)
+create_item = _async(item.create_item)
+create_items_bulk = _async(item.create_items_bulk)
+update_item = _async(item.update_item)
+delete_item = _async(item.delete_item)
+
+# ─────────────────────────── rentals ──────────────────────────────────────
+get_rental = _async(rental.get_rental)
+get_rentals_by_user = _async(rental.get_rentals_by_user)
+create_rental = _async(rental.create_rental)
+mark_returned = _async(rental.mark_returned)
+sync_availability = _async(rental.sync_availability)
+
+# ───────────────────────── categories ─────────────────────────────────────
+get_category = _async(category.get_category)
+get_categories = _async(category.get_categories)
+get_category_ids = _async(category.get_category_ids)
+create_category = _async(category.create_category)
+
+# ───────────────────────── ficheros subidos ───────────────────────────────
+get_referenced_uploads = _async(upload.get_referenced_uploads)
+rename_upload_urls = _async(upload.rename_upload_urls)
+
+# ───────────────────────── tokens revocados ───────────────────────────────
+get_revoked_since = _async(token.get_revoked_since)
+revoke_token = _async(token.revoke_token)
+prune_revoked_tokens = _async(token.prune_revoked_tokens)
+
+# ─────────────────────── versiones de escritura ───────────────────────────
+get_versions = _async(version.get_versions)
+bump_version = _async(version.bump_version)
@@ -1,10 +1,19 @@
 # app/crud/category.py
-from typing import List, Optional
+from typing import List, Optional, Set
 
+from sqlalchemy import insert, literal, select
 from sqlalchemy.orm import Session
 
-from app.models.models import Category
+from app.models.models import Category, CategoryClosure
 from app.schemas.category import CategoryCreate
+from app.services.category_cache import categories
+from app.services.item_fragments import fragments
+
+from .version import CATEGORIES, bump_version
+
+
+class ParentCategoryNotFound(ValueError):
+    """La categoría padre indicada no existe."""
 
 
 def get_category(db: Session, category_id: int) -> Optional[Category]:
@@ -15,9 +24,41 @@ def get_categories(db: Session) -> List[Category]:
     return db.query(Category).order_by(Category.name).all()
 
 
+def get_category_ids(db: Session) -> Set[int]:
+    """Ids de todas las categorías (validación en bloque, p. ej. importaciones)."""
+    return set(categories.snapshot(db).by_id)
+
+
 def create_category(db: Session, cat_in: CategoryCreate) -> Category:
+    """
+    Crea la categoría y sus filas en ``category_closure``: la propia
+    (profundidad 0) y una por cada antecesor del padre, copiadas con un
+    ``INSERT … SELECT``.
+    """
+    if cat_in.parent_id is not None and db.get(Category, cat_in.parent_id) is None:
+        raise ParentCategoryNotFound(f"Categoría padre inexistente: {cat_in.parent_id}")
+
     db_cat = Category(**cat_in.model_dump())
     db.add(db_cat)
+    db.flush()
+
+    closure = CategoryClosure.__table__
+    db.execute(insert(closure).values(ancestor_id=db_cat.id, descendant_id=db_cat.id, depth=0))
+    if db_cat.parent_id is not None:
+        db.execute(
+            insert(closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    closure.c.ancestor_id,
+                    literal(db_cat.id),
+                    closure.c.depth + 1,
+                ).where(closure.c.descendant_id == db_cat.parent_id),
+            )
+        )
+
+    bump_version(db, CATEGORIES)
     db.commit()
     db.refresh(db_cat)
+    fragments.clear()   # el sello ya cambia; liberamos memoria de este worker
+    categories.clear()  # el resto de workers lo detecta por la versión
     return db_cat
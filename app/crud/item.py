@@ -1,94 +1,437 @@
 # app/crud/item.py
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+import base64
+import json
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Integer,
+    and_,
+    asc,
+    cast,
+    desc,
+    exists,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.fts import TS_CONFIG, items_fts, items_tsvector
+from app.models.models import Category, CategoryClosure, Item, ItemImage, Rental, item_categories
+from app.schemas.item import ItemCreate, ItemUpdate
 
-from sqlalchemy import asc, desc, or_
-from sqlalchemy.orm import Session, joinedload
+from app.core.config import settings
+from app.services.category_cache import categories as category_cache
+from app.services.category_index import category_index
+from app.services.item_fragments import fragments
+from app.services.item_suggest import suggestions
+from app.services.similar_items import ItemDoc, docs_from, similar_items
 
-from app.models.models import Category, Item, ItemImage
-from app.schemas.item import ItemCreate, ItemUpdate
+from .version import ITEM_CATEGORIES, ITEM_CONTENT, ITEMS, bump_version
 
 # ───────────────────────── helpers privados ────────────────────────────────
 def _get_categories_or_400(db: Session, ids: list[int]) -> list[Category]:
     """
     Devuelve la lista de categorías cuyo id esté en *ids* o lanza ValueError
-    si alguna no existe.
+    si alguna no existe.  Se resuelve contra la caché de categorías, sin
+    consultar la tabla.
     """
-    cats = db.query(Category).filter(Category.id.in_(ids)).all()
-    if len(cats) != len(ids):
-        missing = set(ids) - {c.id for c in cats}
-        raise ValueError(f"Categoría(s) inexistente(s): {', '.join(map(str, missing))}")
-    return cats
+    return category_cache.lookup(db, ids)
+
 
+_ORDER_COLUMNS = {
+    "price": Item.price_per_h,
+    "name": Item.name,
+    "id": Item.id,  # comodín por si acaso
+}
 
-def _apply_ordering(query, order_by: str | None, order_dir: str | None):
+
+def _apply_ordering(query, order_by: str | None, order_dir: str | None, rank=None):
     """
     Aplica la ordenación solicitada.  El frontend envía:
-      · order_by  ∈ {"price", "name"}
+      · order_by  ∈ {"price", "name", "relevance"}
       · order_dir ∈ {"asc", "desc"}
+
+    ``relevance`` solo tiene efecto si hay búsqueda de texto (*rank*); el
+    orden va siempre de más a menos relevante.
     """
     if not order_by:
         return query  # sin ordenación
 
-    mapping = {
-        "price": Item.price_per_h,
-        "name": Item.name,
-        "id": Item.id,  # comodín por si acaso
-    }
-    column = mapping.get(order_by, Item.id)
+    if order_by == "relevance":
+        return query.order_by(rank) if rank is not None else query
+
+    column = _ORDER_COLUMNS.get(order_by, Item.id)
     return query.order_by(asc(column) if order_dir == "asc" else desc(column))
 
 
+# ───────────────────────── cursores (keyset) ───────────────────────────────
+def _keyset_order(order_by: str | None, order_dir: str | None) -> tuple[str, bool]:
+    """
+    Normaliza la ordenación para paginación keyset.  Sin ``order_by`` se
+    recorre por id ascendente; con él se respeta la regla de
+    :func:`_apply_ordering` (``desc`` salvo que se pida ``asc``).
+    """
+    if not order_by:
+        return "id", True
+    if order_by == "relevance":
+        raise ValueError("La paginación por cursor no admite order_by=relevance")
+    key = order_by if order_by in _ORDER_COLUMNS else "id"
+    return key, order_dir == "asc"
+
+
+def encode_cursor(order_by: str, ascending: bool, key, item_id: int) -> str:
+    """Serializa (orden, última clave, último id) en un token opaco url-safe."""
+    raw = json.dumps([order_by, "asc" if ascending else "desc", key, item_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, bool, object, int]:
+    """
+    Inverso de :func:`encode_cursor`.  Lanza ValueError si el token está
+    corrupto o manipulado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_by, direction, key, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as exc:  # noqa: BLE001
+        raise ValueError("Cursor inválido") from exc
+    key_types = {"price": (int, float), "name": str, "id": int}
+    if (
+        order_by not in key_types
+        or direction not in ("asc", "desc")
+        or not isinstance(key, key_types[order_by])
+        or not isinstance(item_id, int)
+    ):
+        raise ValueError("Cursor inválido")
+    return order_by, direction == "asc", key, item_id
+
+
+def _apply_keyset(query, order_by: str, ascending: bool, after: tuple | None):
+    """
+    Ordena por (columna, id) y, si hay cursor, filtra las filas posteriores
+    a la última clave vista.  Al no usar OFFSET el coste por página es
+    constante sea cual sea la profundidad.
+    """
+    column = _ORDER_COLUMNS[order_by]
+    if after is not None:
+        key, last_id = after
+        if column is Item.id:
+            cond = Item.id > last_id if ascending else Item.id < last_id
+        elif ascending:
+            cond = or_(column > key, and_(column == key, Item.id > last_id))
+        else:
+            cond = or_(column < key, and_(column == key, Item.id < last_id))
+        query = query.filter(cond)
+
+    direction = asc if ascending else desc
+    if column is Item.id:
+        return query.order_by(direction(Item.id))
+    return query.order_by(direction(column), direction(Item.id))
+
+
+# ─────────────────────────── búsqueda full-text ─────────────────────────────
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _apply_search(db: Session, query, term: str):
+    """
+    Filtra por *term* usando el índice full-text del motor y devuelve
+    ``(query, rank)``, donde *rank* es la expresión para ordenar por
+    relevancia (ya con su dirección).  Cada palabra se busca como prefijo
+    y todas deben aparecer.
+
+    Motores sin índice (o términos sin palabras) caen al ILIKE clásico.
+    """
+    words = _WORD_RE.findall(term)
+    dialect = db.get_bind().dialect.name
+
+    if words and dialect == "sqlite":
+        match = " ".join(f'"{w}"*' for w in words)
+        query = query.join(items_fts, items_fts.c.rowid == Item.id).filter(
+            items_fts.c.items_fts.op("MATCH")(match)
+        )
+        return query, asc(items_fts.c.rank)
+
+    if words and dialect == "postgresql":
+        tsquery = func.to_tsquery(TS_CONFIG, " & ".join(f"{w}:*" for w in words))
+        vector = items_tsvector()
+        query = query.filter(vector.op("@@")(tsquery))
+        return query, desc(func.ts_rank(vector, tsquery))
+
+    pattern = f"%{term}%"
+    return query.filter(or_(Item.name.ilike(pattern), Item.description.ilike(pattern))), None
+
+
+# ───────────────────── filas ligeras (solo lectura) ─────────────────────────
+class CategoryRow:
+    """Categoría proyectada para listados (sin identity map)."""
+
+    __slots__ = ("id", "name", "parent_id")
+
+    def __init__(self, id: int, name: str, parent_id: Optional[int] = None):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+
+
+class ItemRow:
+    """
+    Ítem proyectado con exactamente los atributos que necesita ``ItemOut``.
+    Mucho más barato que una entidad ORM: sin estado de sesión ni
+    colecciones instrumentadas.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "description",
+        "price_per_h",
+        "image_url",
+        "owner_id",
+        "available",
+        "version",
+        "categories",
+        "image_urls",
+    )
+
+    def __init__(self, row):
+        (
+            self.id,
+            self.name,
+            self.description,
+            self.price_per_h,
+            self.image_url,
+            self.owner_id,
+            self.available,
+            self.version,
+        ) = row
+        self.categories: list[CategoryRow] = []
+        self.image_urls: list[str] = []
+
+
+_LIST_COLUMNS = (
+    Item.id,
+    Item.name,
+    Item.description,
+    Item.price_per_h,
+    Item.image_url,
+    Item.owner_id,
+    Item.available,
+    Item.version,
+)
+
+
+def _hydrate(db: Session, rows) -> List[ItemRow]:
+    """
+    Convierte filas de ``_LIST_COLUMNS`` en :class:`ItemRow` y carga sus
+    categorías e imágenes con **una consulta por relación** filtrada por los
+    ids de la página (sin producto cartesiano categorías × imágenes).
+    """
+    items = [ItemRow(r) for r in rows]
+    if not items:
+        return items
+    by_id = {it.id: it for it in items}
+    ids = list(by_id)
+
+    cats = db.execute(
+        select(item_categories.c.item_id, Category.id, Category.name, Category.parent_id)
+        .join(Category, Category.id == item_categories.c.category_id)
+        .where(item_categories.c.item_id.in_(ids))
+        .order_by(Category.name)
+    )
+    for item_id, cat_id, cat_name, parent_id in cats:
+        by_id[item_id].categories.append(CategoryRow(cat_id, cat_name, parent_id))
+
+    images = db.execute(
+        select(ItemImage.item_id, ItemImage.url)
+        .where(ItemImage.item_id.in_(ids))
+        .order_by(ItemImage.id)
+    )
+    for item_id, url in images:
+        by_id[item_id].image_urls.append(url)
+    return items
+
+
+def _count(db: Session, stmt) -> int:
+    """``COUNT(*)`` de una ``select()`` ya filtrada (sin su ORDER BY)."""
+    return db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
 # ─────────────────────────────── Lectura ────────────────────────────────────
 def get_item(db: Session, item_id: int) -> Optional[Item]:
     """
     Obtiene un ítem por id con categorías **y todas sus imágenes** pre-cargadas.
+
+    Se usa ``selectinload``: con ``joinedload`` SQLite materializa el JOIN
+    anidado item_categories ⋈ categories recorriendo la tabla entera.
     """
     return (
         db.query(Item)
-        .options(joinedload(Item.categories), joinedload(Item.images))
+        .options(selectinload(Item.categories), selectinload(Item.images))
         .filter(Item.id == item_id)
         .first()
     )
 
 
-def _build_items_query(
+def _naive_utc(dt: datetime) -> datetime:
+    """Las fechas se guardan como UTC naive (``datetime.utcnow``)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _overlapping_rental(start: Optional[datetime], end: Optional[datetime]):
+    """
+    ``EXISTS`` de un alquiler no devuelto del ítem que se solape con
+    ``[start, end)``.  Sin *start* se toma "ahora"; sin *end* la franja queda
+    abierta.  Lo resuelve el índice ``ix_rentals_item_window``
+    (item_id, start_at, end_at).  Lanza ValueError si end ≤ start.
+    """
+    start = _naive_utc(start) if start is not None else datetime.utcnow()
+    conds = [
+        Rental.item_id == Item.id,
+        Rental.returned.isnot(True),
+        Rental.end_at > start,
+    ]
+    if end is not None:
+        end = _naive_utc(end)
+        if end <= start:
+            raise ValueError("available_to debe ser posterior a available_from")
+        conds.append(Rental.start_at < end)
+    return exists().where(*conds)
+
+
+def _in_subtrees(category_ids):
+    """``EXISTS`` del ítem en alguna categoría bajo *category_ids* (join por la PK del cierre)."""
+    closure = CategoryClosure.__table__
+    return (
+        exists()
+        .where(item_categories.c.item_id == Item.id)
+        .where(item_categories.c.category_id == closure.c.descendant_id)
+        .where(closure.c.ancestor_id.in_(category_ids))
+    )
+
+
+def _category_clause(db: Session, categories: List[int], mode: str, exclude: List[int]):
+    """
+    Condición sobre ``Item.id`` resuelta con el índice de bits en memoria
+    (ver :mod:`app.services.category_index`).  Cada categoría incluye su
+    subárbol según la tabla de cierre.  Si el conjunto resultante supera
+    ``CATEGORY_INDEX_MAX_IDS`` se delega en ``EXISTS`` para no mandar
+    listas ``IN`` enormes.
+    """
+    categories = list(dict.fromkeys(categories))
+    tree = category_cache.snapshot(db)
+    bits, negated = category_index.match(
+        db,
+        [tree.subtree(cat_id) for cat_id in categories],
+        mode,
+        [cat_id for excluded in exclude for cat_id in tree.subtree(excluded)],
+    )
+    if bits.bit_count() <= settings.CATEGORY_INDEX_MAX_IDS:
+        ids = list(bits)
+        return Item.id.notin_(ids) if negated else Item.id.in_(ids)
+
+    conds = []
+    if categories and mode == "all":
+        conds += [_in_subtrees([cat_id]) for cat_id in categories]
+    elif categories:
+        conds.append(_in_subtrees(categories))
+    if exclude:
+        conds.append(~_in_subtrees(exclude))
+    return and_(*conds)
+
+
+def _apply_filters(
     db: Session,
+    query,
     *,
     name: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     available: Optional[bool] = None,
     categories: Optional[List[int]] = None,
-    order_by: Optional[str] = None,
-    order_dir: Optional[str] = None,
+    category_mode: str = "any",
+    exclude_categories: Optional[List[int]] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
 ):
     """
-    Crea la consulta base aplicando filtros dinámicos y la ordenación.
+    Aplica los filtros dinámicos del listado a *query* (``Query`` ORM o
+    ``select()``) y devuelve ``(query, rank)``.
     """
-    q = db.query(Item).options(joinedload(Item.categories), joinedload(Item.images))
-
     # ── filtros texto / rango precio / disponibilidad ──────────────────────
+    rank = None
     if name:
-        pattern = f"%{name}%"
-        q = q.filter(or_(Item.name.ilike(pattern), Item.description.ilike(pattern)))
+        query, rank = _apply_search(db, query, name)
 
     if min_price is not None:
-        q = q.filter(Item.price_per_h >= min_price)
+        query = query.filter(Item.price_per_h >= min_price)
 
     if max_price is not None:
-        q = q.filter(Item.price_per_h <= max_price)
+        query = query.filter(Item.price_per_h <= max_price)
 
     if available is not None:
-        q = q.filter(Item.available == available)
+        query = query.filter(Item.available == available)
+
+    # ── filtro por categorías (todas / alguna / ninguna) ───────────────────
+    if categories or exclude_categories:
+        query = query.filter(
+            _category_clause(db, categories or [], category_mode, exclude_categories or [])
+        )
+
+    # ── libre en una franja horaria ────────────────────────────────────────
+    if available_from is not None or available_to is not None:
+        query = query.filter(~_overlapping_rental(available_from, available_to))
 
-    # ── filtro por categorías (al menos una coincidente) ───────────────────
-    if categories:
-        q = q.filter(Item.categories.any(Category.id.in_(categories)))
+    return query, rank
+
+
+def _build_items_query(
+    db: Session,
+    *,
+    name: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    available: Optional[bool] = None,
+    categories: Optional[List[int]] = None,
+    category_mode: str = "any",
+    exclude_categories: Optional[List[int]] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    order_by: Optional[str] = None,
+    order_dir: Optional[str] = None,
+):
+    """
+    Crea la consulta base (proyección ``_LIST_COLUMNS``, sin entidades ORM)
+    aplicando filtros dinámicos y la ordenación.
+    """
+    q = select(*_LIST_COLUMNS)
+    q, rank = _apply_filters(
+        db,
+        q,
+        name=name,
+        min_price=min_price,
+        max_price=max_price,
+        available=available,
+        categories=categories,
+        category_mode=category_mode,
+        exclude_categories=exclude_categories,
+        available_from=available_from,
+        available_to=available_to,
+    )
 
     # ── ordenación ─────────────────────────────────────────────────────────
-    return _apply_ordering(q, order_by, order_dir)
+    return _apply_ordering(q, order_by, order_dir, rank)
 
 
 def get_items(
@@ -101,12 +444,19 @@ def get_items(
     max_price: Optional[float] = None,
     available: Optional[bool] = None,
     categories: Optional[List[int]] = None,
+    category_mode: str = "any",
+    exclude_categories: Optional[List[int]] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
     order_by: Optional[str] = None,
     order_dir: Optional[str] = None,
-) -> Tuple[List[Item], int]:
+    with_total: bool = True,
+) -> Tuple[List[ItemRow], Optional[int]]:
     """
     Devuelve la lista paginada de ítems junto con el total de resultados
     antes de la paginación (para cabecera X-Total-Count).
+
+    Con ``with_total=False`` se omite el ``COUNT`` y el total es None.
     """
     q = _build_items_query(
         db,
@@ -115,24 +465,202 @@ def get_items(
         max_price=max_price,
         available=available,
         categories=categories,
+        category_mode=category_mode,
+        exclude_categories=exclude_categories,
+        available_from=available_from,
+        available_to=available_to,
         order_by=order_by,
         order_dir=order_dir,
     )
-    total = q.count()
-    items = q.offset(skip).limit(limit).all()
+    total = _count(db, q) if with_total else None
+    items = _hydrate(db, db.execute(q.offset(skip).limit(limit)))
     return items, total
 
 
-def get_items_by_owner(db: Session, owner_id: int) -> List[Item]:
+def get_items_keyset(
+    db: Session,
+    limit: int = 100,
+    *,
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    available: Optional[bool] = None,
+    categories: Optional[List[int]] = None,
+    category_mode: str = "any",
+    exclude_categories: Optional[List[int]] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    order_by: Optional[str] = None,
+    order_dir: Optional[str] = None,
+    with_total: bool = False,
+) -> Tuple[List[ItemRow], Optional[str], Optional[int]]:
+    """
+    Paginación por cursor: devuelve ``(items, next_cursor, total)``.
+
+    El cursor codifica la última (clave de orden, id) servida, de modo que
+    la página siguiente es un ``WHERE (col, id) > (k, id)`` que aprovecha el
+    índice en lugar de un ``OFFSET`` creciente.  ``next_cursor`` es None en
+    la última página.  Lanza ValueError si el cursor no corresponde a la
+    ordenación pedida.
+    """
+    key, ascending = _keyset_order(order_by, order_dir)
+    after = None
+    if cursor:
+        c_key, c_asc, last_key, last_id = decode_cursor(cursor)
+        if (c_key, c_asc) != (key, ascending):
+            raise ValueError("El cursor no corresponde a la ordenación solicitada")
+        after = (last_key, last_id)
+
+    q = _build_items_query(
+        db,
+        name=name,
+        min_price=min_price,
+        max_price=max_price,
+        available=available,
+        categories=categories,
+        category_mode=category_mode,
+        exclude_categories=exclude_categories,
+        available_from=available_from,
+        available_to=available_to,
+    )
+    total = _count(db, q) if with_total else None
+
+    # pedimos una fila de más para saber si existe página siguiente
+    rows = db.execute(_apply_keyset(q, key, ascending, after).limit(limit + 1)).all()
+    items = _hydrate(db, rows[:limit])
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        last_key = {"price": last.price_per_h, "name": last.name, "id": last.id}[key]
+        next_cursor = encode_cursor(key, ascending, last_key, last.id)
+    return items, next_cursor, total
+
+
+def get_items_by_owner(db: Session, owner_id: int) -> List[ItemRow]:
     """
     Lista todos los ítems propiedad de *owner_id* con categorías e imágenes.
     """
-    return (
-        db.query(Item)
-        .options(joinedload(Item.categories), joinedload(Item.images))
-        .filter(Item.owner_id == owner_id)
-        .all()
+    rows = db.execute(
+        select(*_LIST_COLUMNS).where(Item.owner_id == owner_id).order_by(Item.id)
     )
+    return _hydrate(db, rows)
+
+
+def get_items_by_ids(db: Session, ids: Sequence[int]) -> List[ItemRow]:
+    """Ítems con categorías e imágenes en el orden de *ids* (búsqueda por PK)."""
+    if not ids:
+        return []
+    rows = _hydrate(db, db.execute(select(*_LIST_COLUMNS).where(Item.id.in_(ids))))
+    position = {item_id: i for i, item_id in enumerate(ids)}
+    return sorted(rows, key=lambda it: position[it.id])
+
+
+def _price_bucket(db: Session, size: float):
+    """Índice de tramo ``floor(price / size)`` portable entre motores."""
+    ratio = Item.price_per_h / size
+    if db.get_bind().dialect.name == "sqlite":
+        # CAST trunca y los precios son positivos → equivale a floor()
+        return cast(ratio, Integer)
+    return cast(func.floor(ratio), Integer)
+
+
+def get_item_facets(
+    db: Session,
+    *,
+    name: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    available: Optional[bool] = None,
+    categories: Optional[List[int]] = None,
+    category_mode: str = "any",
+    exclude_categories: Optional[List[int]] = None,
+    available_from: Optional[datetime] = None,
+    available_to: Optional[datetime] = None,
+    price_bucket: float = 10.0,
+) -> dict:
+    """
+    Calcula las facetas del listado en **una sola consulta** (``UNION ALL``
+    de tres agregados):
+
+    · recuento por categoría (incluidas sus subcategorías),
+    · disponibles / no disponibles,
+    · histograma de precios en tramos de *price_bucket*.
+
+    Cada faceta ignora su propio filtro (facetado disyuntivo) para que el
+    sidebar pueda mostrar cuántos resultados habría al marcar otra opción.
+    """
+    filters = dict(
+        name=name,
+        min_price=min_price,
+        max_price=max_price,
+        available=available,
+        categories=categories,
+        category_mode=category_mode,
+        exclude_categories=exclude_categories,
+        available_from=available_from,
+        available_to=available_to,
+    )
+
+    def _base(*columns, skip: tuple[str, ...]):
+        q = select(*columns).select_from(Item)
+        q, _ = _apply_filters(db, q, **{k: v for k, v in filters.items() if k not in skip})
+        return q
+
+    # cada categoría cuenta los ítems de todo su subárbol (como el filtro)
+    closure = CategoryClosure.__table__
+    by_category = (
+        _base(
+            literal("category").label("facet"),
+            Category.id.label("key"),
+            Category.name.label("label"),
+            func.count(Item.id.distinct()).label("n"),
+            skip=("categories",),
+        )
+        .join(item_categories, item_categories.c.item_id == Item.id)
+        .join(closure, closure.c.descendant_id == item_categories.c.category_id)
+        .join(Category, Category.id == closure.c.ancestor_id)
+        .group_by(Category.id, Category.name)
+    )
+    by_availability = _base(
+        literal("available").label("facet"),
+        cast(Item.available, Integer).label("key"),
+        null().label("label"),
+        func.count(Item.id).label("n"),
+        skip=("available",),
+    ).group_by(Item.available)
+
+    bucket = _price_bucket(db, price_bucket)
+    by_price = _base(
+        literal("price").label("facet"),
+        bucket.label("key"),
+        null().label("label"),
+        func.count(Item.id).label("n"),
+        skip=("min_price", "max_price"),
+    ).group_by(bucket)
+
+    facets = {"categories": [], "availability": {"available": 0, "unavailable": 0}, "price": []}
+    for facet, key, label, n in db.execute(union_all(by_category, by_availability, by_price)):
+        if facet == "category":
+            facets["categories"].append({"id": key, "name": label, "count": n})
+        elif facet == "available":
+            facets["availability"]["available" if key else "unavailable"] += n
+        else:
+            facets["price"].append(
+                {"min": key * price_bucket, "max": (key + 1) * price_bucket, "count": n}
+            )
+
+    facets["categories"].sort(key=lambda c: (-c["count"], c["name"]))
+    facets["price"].sort(key=lambda b: b["min"])
+
+    # total con *todos* los filtros: se deduce de la faceta de disponibilidad
+    avail = facets["availability"]
+    if available is None:
+        facets["total"] = avail["available"] + avail["unavailable"]
+    else:
+        facets["total"] = avail["available" if available else "unavailable"]
+    return facets
 
 
 # ─────────────────────────────── Escritura ──────────────────────────────────
@@ -159,11 +687,84 @@ def create_item(db: Session, item_in: ItemCreate, owner_id: int) -> Item:
     db_item.images = [ItemImage(url=str(url)) for url in item_in.image_urls]
 
     db.add(db_item)
+    bump_version(db, ITEMS)
+    content_version = bump_version(db, ITEM_CONTENT)
+    categories_version = bump_version(db, ITEM_CATEGORIES) if item_in.categories else None
     db.commit()
     db.refresh(db_item)
+    if categories_version is not None:
+        category_index.apply(categories_version, {db_item.id: item_in.categories})
+    suggestions.apply(content_version, {db_item.id: db_item.name})
+    doc = ItemDoc(db_item.name, db_item.description, db_item.price_per_h, tuple(item_in.categories or ()))
+    similar_items.apply(content_version, {db_item.id: doc}, category_cache.snapshot(db))
     return db_item
 
 
+def create_items_bulk(db: Session, items_in: Sequence[ItemCreate], owner_id: int) -> List[int]:
+    """
+    Inserta un lote de ítems con sus categorías e imágenes en tres
+    sentencias ``executemany`` (``INSERT … RETURNING`` para los ids) y un
+    único ``commit``.  Devuelve los ids en el orden de *items_in*.
+
+    Las categorías deben venir ya validadas por el llamante (ver
+    :func:`app.crud.category.get_category_ids`).
+    """
+    if not items_in:
+        return []
+
+    ids = list(
+        db.execute(
+            insert(Item).returning(Item.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": it.name,
+                    "description": it.description,
+                    "price_per_h": it.price_per_h,
+                    "image_url": str(it.image_urls[0]),
+                    "owner_id": owner_id,
+                }
+                for it in items_in
+            ],
+        ).scalars()
+    )
+
+    links = [
+        {"item_id": item_id, "category_id": cat_id}
+        for item_id, it in zip(ids, items_in)
+        for cat_id in dict.fromkeys(it.categories or [])
+    ]
+    if links:
+        db.execute(insert(item_categories), links)
+
+    db.execute(
+        insert(ItemImage),
+        [
+            {"item_id": item_id, "url": str(url)}
+            for item_id, it in zip(ids, items_in)
+            for url in it.image_urls
+        ],
+    )
+
+    bump_version(db, ITEMS)
+    content_version = bump_version(db, ITEM_CONTENT)
+    categories_version = bump_version(db, ITEM_CATEGORIES) if links else None
+    db.commit()
+    if categories_version is not None:
+        category_index.apply(
+            categories_version, {item_id: it.categories for item_id, it in zip(ids, items_in) if it.categories}
+        )
+    suggestions.apply(content_version, {item_id: it.name for item_id, it in zip(ids, items_in)})
+    similar_items.apply(
+        content_version,
+        {
+            item_id: ItemDoc(it.name, it.description, it.price_per_h, tuple(it.categories or ()))
+            for item_id, it in zip(ids, items_in)
+        },
+        category_cache.snapshot(db),
+    )
+    return ids
+
+
 def update_item(db: Session, item: Item, item_in: ItemUpdate) -> Item:
     """
     Actualiza los campos presentes en *item_in* (PATCH).
@@ -182,12 +783,31 @@ def update_item(db: Session, item: Item, item_in: ItemUpdate) -> Item:
         item.image_url = str(item_in.image_urls[0])  # sync campo destacado
         item.images = [ItemImage(url=str(url)) for url in item_in.image_urls]
 
+    item.version = (item.version or 0) + 1
+    bump_version(db, ITEMS)
+    content_changed = bool(data) or item_in.categories is not None
+    content_version = bump_version(db, ITEM_CONTENT) if content_changed else None
+    categories_version = bump_version(db, ITEM_CATEGORIES) if item_in.categories is not None else None
     db.commit()
     db.refresh(item)
+    fragments.invalidate(item.id)
+    if categories_version is not None:
+        category_index.apply(categories_version, {item.id: item_in.categories})
+    if content_version is not None:
+        suggestions.apply(content_version, {item.id: item.name} if "name" in data else None)
+        similar_items.apply(content_version, docs_from([item]), category_cache.snapshot(db))
     return item
 
 
 def delete_item(db: Session, item: Item) -> None:
     """Elimina un ítem (y cascada sus imágenes)."""
+    item_id = item.id
     db.delete(item)
+    bump_version(db, ITEMS)
+    content_version = bump_version(db, ITEM_CONTENT)
+    categories_version = bump_version(db, ITEM_CATEGORIES)
     db.commit()
+    fragments.invalidate(item_id)
+    category_index.apply(categories_version, {item_id: ()})
+    suggestions.apply(content_version, {item_id: None})
+    similar_items.apply(content_version, {item_id: None})
@@ -1,13 +1,17 @@
 # app/crud/rental.py
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime
-from typing import List
+from typing import Iterable, List, Optional
 
+from sqlalchemy import DateTime, Float, and_, exists, false, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
 
 from app.models.models import Item, Rental
 from app.schemas.rental import RentalCreate
 
+from .item import _naive_utc, _overlapping_rental
+from .version import ITEMS, bump_version
+
 
 def get_rental(db: Session, rental_id: int) -> Rental | None:
     return db.query(Rental).filter(Rental.id == rental_id).first()
@@ -17,35 +21,177 @@ def get_rentals_by_user(db: Session, renter_id: int) -> List[Rental]:
     return db.query(Rental).filter(Rental.renter_id == renter_id).all()
 
 
-def create_rental(db: Session, renter_id: int, rent_in: RentalCreate) -> Rental:
-    """Crea un alquiler y calcula el depósito como 120 % del coste estimado,
-    redondeado a 2 decimales para evitar errores de coma flotante."""
-    item = db.query(Item).get(rent_in.item_id)  # legacy API, suficiente aquí
-    hours = (rent_in.end_at - rent_in.start_at).total_seconds() / 3600
-    estimated = hours * item.price_per_h
-
-    deposit = float(                      # guardamos como float en la BD
-        Decimal(estimated * 1.2).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+class ItemNotFound(LookupError):
+    """El ítem a alquilar no existe."""
+
+
+class RentalConflict(ValueError):
+    """La franja pedida se solapa con otro alquiler activo del ítem."""
+
+
+def _lock_for_booking(db: Session, item_id: int) -> float | None:
+    """
+    Serializa las reservas concurrentes del mismo ítem entre workers y
+    devuelve su precio por hora ya bloqueado (``None`` si no existe):
+
+    · SQLite → ``BEGIN IMMEDIATE`` (toma el lock de escritura antes de leer).
+    · PostgreSQL y otros → ``SELECT … FOR UPDATE`` sobre la fila del ítem.
+    """
+    price = select(Item.price_per_h).where(Item.id == item_id)
+    conn = db.connection()
+    if conn.dialect.name == "sqlite":
+        # driver_connection: sqlite3 o aiosqlite (sesión async), ambos con in_transaction
+        if not conn.connection.driver_connection.in_transaction:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        price = price.with_for_update()
+    return db.scalar(price)
+
+
+def _deposit(hours: float, price_per_h: float) -> float:
+    """120 % del coste estimado, redondeado a 2 decimales (mitad hacia arriba)."""
+    return float(                          # guardamos como float en la BD
+        Decimal(hours * price_per_h * 1.2).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     )
 
-    db_rental = Rental(
-        renter_id=renter_id,
-        deposit=deposit,
-        returned=False,
-        **rent_in.model_dump(),           # pydantic v2
+
+def _booking_insert(item_id: int, renter_id: int, start: datetime, end: datetime, deposit: float):
+    """``INSERT … SELECT … WHERE NOT EXISTS(solape) RETURNING`` de la reserva."""
+    return (
+        insert(Rental)
+        .from_select(
+            ["item_id", "renter_id", "start_at", "end_at", "deposit", "returned"],
+            select(
+                Item.id,
+                literal(renter_id),
+                literal(start, DateTime),
+                literal(end, DateTime),
+                literal(deposit, Float),
+                false(),
+            ).where(Item.id == item_id, ~_overlapping_rental(start, end)),
+        )
+        .returning(Rental)
     )
 
-    db.add(db_rental)
-    item.available = False
+
+def create_rental(db: Session, renter_id: int, rent_in: RentalCreate) -> Rental:
+    """
+    Reserva atómica: con el ítem bloqueado, un único ``INSERT … SELECT …
+    WHERE NOT EXISTS(solape) RETURNING``.  El depósito (120 % del coste
+    estimado) se calcula en Python con el precio leído bajo el bloqueo.
+
+    El bloqueo va en su propia sentencia a propósito: en PostgreSQL (READ
+    COMMITTED) un ``INSERT … SELECT … FOR UPDATE`` evalúa el ``NOT EXISTS``
+    con la instantánea de antes de esperar al bloqueo y no vería la reserva
+    que otro worker acaba de confirmar; bloqueando primero, el ``INSERT``
+    arranca con una instantánea nueva.  Lo demás va en la misma transacción
+    (la versión ``items``, para los ETags de los filtros por franja) y
+    ``available`` solo se toca si la reserva ya está en curso: las futuras
+    las recoge :func:`sync_availability` cuando empiezan.
+
+    Lanza :class:`ItemNotFound` o :class:`RentalConflict` si no se inserta.
+    """
+    start = _naive_utc(rent_in.start_at)
+    end = _naive_utc(rent_in.end_at)
+    hours = (end - start).total_seconds() / 3600
+
+    price = _lock_for_booking(db, rent_in.item_id)
+    if price is None:
+        db.rollback()
+        raise ItemNotFound(rent_in.item_id)
+    booking = _booking_insert(rent_in.item_id, renter_id, start, end, _deposit(hours, price))
+    db_rental = db.execute(booking).scalar()
+
+    if db_rental is None:
+        db.rollback()
+        raise RentalConflict("El ítem ya está alquilado en esa franja")
+
+    db.expunge(db_rental)                 # RETURNING ya trajo todas las columnas
+    if start <= datetime.utcnow() < end:
+        _update_availability(db, [rent_in.item_id])
+    bump_version(db, ITEMS)
     db.commit()
-    db.refresh(db_rental)
     return db_rental
 
 
 def mark_returned(db: Session, rental: Rental) -> Rental:
-    """Marca el alquiler como devuelto y vuelve a poner el ítem disponible."""
+    """Marca el alquiler como devuelto y recalcula la disponibilidad del ítem."""
     rental.returned = True
-    rental.item.available = True
-    db.commit()
+    db.flush()
+    _commit_availability(db, [rental.item_id], always=True)
     db.refresh(rental)
     return rental
+
+
+# ───────────────────────────── disponibilidad ─────────────────────────────────
+
+
+def _rented_now(now: datetime):
+    """``EXISTS`` de un alquiler no devuelto del ítem en curso en *now*."""
+    return exists().where(
+        Rental.item_id == Item.id,
+        Rental.returned.isnot(True),
+        Rental.start_at <= now,
+        Rental.end_at > now,
+    )
+
+
+def _update_availability(db: Session, item_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    ``available = NOT EXISTS(alquiler en curso)`` en las filas que difieran
+    (de *item_ids* o de todas), subiendo su ``version``.  Filas cambiadas.
+    """
+    free = ~_rented_now(datetime.utcnow())
+    stmt = (
+        update(Item)
+        .where(Item.available.is_distinct_from(free))
+        .values(available=free, version=Item.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if item_ids is not None:
+        stmt = stmt.where(Item.id.in_(list(item_ids)))
+    return db.execute(stmt).rowcount
+
+
+def _commit_availability(db: Session, item_ids=None, always: bool = False) -> int:
+    changed = _update_availability(db, item_ids)
+    if not (changed or always):
+        db.rollback()
+        return 0
+    bump_version(db, ITEMS)               # cambia la disponibilidad listada
+    db.commit()
+    return changed
+
+
+def _started_or_ended(since: datetime, now: datetime):
+    """Ítems con alquileres sin devolver que empezaron o terminaron en ``(since, now]``."""
+    return (
+        select(Rental.item_id)
+        .where(
+            Rental.returned.isnot(True),
+            or_(
+                and_(Rental.start_at > since, Rental.start_at <= now),
+                and_(Rental.end_at > since, Rental.end_at <= now),
+            ),
+        )
+        .distinct()
+    )
+
+
+def sync_availability(
+    db: Session, since: Optional[datetime] = None, now: Optional[datetime] = None
+) -> int:
+    """
+    Recalcula ``available`` de los ítems con alquileres que empezaron o
+    terminaron en ``(since, now]`` sin que nadie escribiera (de todos si
+    *since* es None).  Sin candidatos no se escribe nada, así que no toma el
+    lock de escritura de SQLite.  Idempotente: solo toca las filas que
+    cambian.  Devuelve las filas cambiadas.
+    """
+    if since is None:
+        return _commit_availability(db)
+    item_ids = db.scalars(_started_or_ended(since, now or datetime.utcnow())).all()
+    if not item_ids:
+        db.rollback()
+        return 0
+    return _commit_availability(db, item_ids)
@@ -0,0 +1,47 @@
+# app/crud/token.py
+"""
+Revocación de tokens (logout).  La comprobación por petición no consulta
+esta tabla: la hace el filtro en memoria de ``app.services.revocation``,
+que solo lee aquí las filas nuevas.
+"""
+from __future__ import annotations
+
+import datetime
+from typing import List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.models import RevokedToken
+
+# ────────────────────────────── Lectura ───────────────────────────────────
+
+
+def get_revoked_since(db: Session, last_id: int) -> List[Tuple[int, str, datetime.datetime]]:
+    """``(id, jti, expires_at)`` de las revocaciones con ``id > last_id``."""
+    return db.execute(
+        select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+        .where(RevokedToken.id > last_id)
+        .order_by(RevokedToken.id)
+    ).all()
+
+
+# ───────────────────────────── Escritura ──────────────────────────────────
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime.datetime) -> None:
+    """Registra *jti* como revocado (idempotente) y poda los caducados."""
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    db.execute(
+        dialect.insert(RevokedToken)
+        .values(jti=jti, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["jti"])
+    )
+    prune_revoked_tokens(db, datetime.datetime.utcnow())
+    db.commit()
+
+
+def prune_revoked_tokens(db: Session, now: datetime.datetime) -> int:
+    """Borra las revocaciones de tokens ya caducados (el commit, del llamante)."""
+    return db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now)).rowcount
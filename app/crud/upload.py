@@ -0,0 +1,79 @@
+# app/crud/upload.py
+"""
+Referencias a ficheros de ``uploads/`` guardadas en la BD
+(``item_images.url`` e ``items.image_url``).
+"""
+from __future__ import annotations
+
+from typing import Dict, Set
+from urllib.parse import urlsplit
+
+from sqlalchemy import func, select, union, update
+from sqlalchemy.orm import Session
+
+from app.core.images import UPLOADS_PREFIX
+from app.models.models import Item, ItemImage
+
+from .version import ITEMS, bump_version
+
+
+def upload_name(url: str | None) -> str | None:
+    """Nombre del fichero local al que apunta *url* (None si es externa)."""
+    if not url:
+        return None
+    path = urlsplit(url).path
+    if not path.startswith(UPLOADS_PREFIX):
+        return None
+    name = path[len(UPLOADS_PREFIX):]
+    return name if name and "/" not in name else None
+
+
+# ────────────────────────────── Lectura ───────────────────────────────────
+
+
+def get_referenced_uploads(db: Session) -> Set[str]:
+    """Nombres de fichero referenciados por alguna imagen o ``image_url``."""
+    urls = db.execute(
+        union(
+            select(ItemImage.url.label("url")).where(ItemImage.url.contains(UPLOADS_PREFIX)),
+            select(Item.image_url).where(Item.image_url.contains(UPLOADS_PREFIX)),
+        )
+    ).scalars()
+    return {name for name in map(upload_name, urls) if name}
+
+
+# ───────────────────────────── Escritura ──────────────────────────────────
+
+
+def rename_upload_urls(db: Session, renames: Dict[str, str]) -> int:
+    """
+    Reescribe las URLs ``…/uploads/<viejo>`` → ``…/uploads/<nuevo>`` según
+    *renames* y sube la versión de los ítems afectados.  Devuelve cuántos
+    ítems cambiaron.
+    """
+    touched: Set[int] = set()
+    for old, new in renames.items():
+        old_path, new_path = UPLOADS_PREFIX + old, UPLOADS_PREFIX + new
+        touched.update(
+            db.execute(
+                update(ItemImage)
+                .where(ItemImage.url.endswith(old_path))
+                .values(url=func.replace(ItemImage.url, old_path, new_path))
+                .returning(ItemImage.item_id)
+            ).scalars()
+        )
+        touched.update(
+            db.execute(
+                update(Item)
+                .where(Item.image_url.endswith(old_path))
+                .values(image_url=func.replace(Item.image_url, old_path, new_path))
+                .returning(Item.id)
+            ).scalars()
+        )
+    if touched:
+        db.execute(
+            update(Item).where(Item.id.in_(touched)).values(version=Item.version + 1)
+        )
+        bump_version(db, ITEMS)
+    db.commit()
+    return len(touched)
@@ -34,15 +34,16 @@ def get_user_by_email(db: Session, email: str) -> User | None:
 # ───────────────────────────── Escritura ──────────────────────────────────
 
 
-def create_user(db: Session, user_in: UserCreate) -> User:
+def create_user(db: Session, user_in: UserCreate, hashed_pw: str | None = None) -> User:
     """
     Crea un nuevo usuario con contraseña hasheada y lo devuelve.
+    *hashed_pw* permite pasar un hash ya calculado (pool de hashing).
     Lanza IntegrityError si el username/email ya existen.
     """
     db_user = User(
         username=user_in.username,
         email=user_in.email,
-        hashed_pw=_hash_password(user_in.password),
+        hashed_pw=hashed_pw or _hash_password(user_in.password),
     )
     db.add(db_user)
     db.commit()
@@ -0,0 +1,54 @@
+# app/crud/version.py
+"""
+Versiones de escritura globales por ámbito.
+
+Cada CRUD que modifica ítems (incluidas sus imágenes y su disponibilidad)
+llama a ``bump_version(db, ITEMS)`` antes de su ``commit``; los de categorías
+hacen lo propio con ``CATEGORIES``.  Los lectores comparan la versión para
+invalidar cachés / ETags sin hidratar entidades ORM.
+
+``ITEM_CATEGORIES`` solo avanza cuando cambia a qué categorías pertenece
+algún ítem (alta, baja o edición de sus categorías): sella el índice de
+bits, que así no se reconstruye por un alquiler o un cambio de precio.
+``ITEM_CONTENT`` avanza con altas, bajas y cambios de nombre, descripción,
+precio o categorías, pero no con alquileres ni disponibilidad: sella los
+índices de autocompletado y de similares.
+"""
+from __future__ import annotations
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.models import WriteVersion
+
+ITEMS = "items"
+CATEGORIES = "categories"
+ITEM_CATEGORIES = "item_categories"
+ITEM_CONTENT = "item_content"
+
+
+def get_versions(db: Session, *scopes: str) -> tuple[int, ...]:
+    """Devuelve la versión actual de cada ámbito (0 si aún no existe)."""
+    rows = dict(
+        db.execute(
+            select(WriteVersion.scope, WriteVersion.version).where(WriteVersion.scope.in_(scopes))
+        ).all()
+    )
+    return tuple(rows.get(scope, 0) for scope in scopes)
+
+
+def bump_version(db: Session, scope: str) -> int:
+    """
+    Incrementa la versión de *scope* dentro de la transacción en curso y
+    devuelve el nuevo valor.  El ``commit`` queda a cargo del llamante.
+    """
+    new = db.execute(
+        update(WriteVersion)
+        .where(WriteVersion.scope == scope)
+        .values(version=WriteVersion.version + 1)
+        .returning(WriteVersion.version)
+    ).scalar()
+    if new is None:  # fila sin sembrar (BD creada a mano)
+        db.execute(insert(WriteVersion).values(scope=scope, version=1))
+        new = 1
+    return new
@@ -1,28 +1,53 @@
 # app/deps.py
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
-from app.models.database import SessionLocal
+from app.models.database import AsyncSessionLocal, SessionLocal
 from app.models.models import User
 from app.core.config import settings
+from app.services.principal_cache import Principal, principals
+from app.services.revocation import revocations
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 def get_db():
+    """Sesión síncrona (scripts, CLI); los routers usan :func:`get_async_db`."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """
+    Principal del token.  Si está en la caché no se toca la BD (la sesión
+    es perezosa: no se pide conexión al pool); si no, se busca por el
+    claim ``uid`` (PK) o, en tokens antiguos, por ``sub``.  En ambos casos
+    el ``jti`` se contrasta con la lista de revocación en memoria.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    await db.run_sync(revocations.refresh_if_due)
+
+    principal = principals.get(token)
+    if principal is not None:
+        if principal.jti and revocations.is_revoked(principal.jti):
+            raise credentials_exception
+        return principal
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
@@ -31,7 +56,19 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = await db.get(User, user_id)
+        if user is not None and user.username != username:
+            user = None
+    else:
+        user = await db.scalar(select(User).where(User.username == username).limit(1))
     if user is None:
         raise credentials_exception
-    return user
+    jti = payload.get("jti")
+    if jti and revocations.is_revoked(jti):
+        raise credentials_exception
+
+    principal = Principal.from_user(user, jti)
+    principals.put(token, principal, payload.get("exp"))
+    return principal
@@ -1,11 +1,85 @@
 # app/main.py
+import asyncio
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles          # 🆕
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import crud, models  # noqa: F401
+from app.api import auth, items, rentals, categories, upload, metrics   # 🆕
+from app.api.upload_files import UploadFiles
+from app.core.config import settings
+from app.core.leader import LeaderLock
+from app.deps import get_async_db
+from app.models.database import async_engine
+from app.services.image_variants import renderer
+from app.services.item_suggest import suggestions
+from app.services.password_hasher import hasher
+from app.services.similar_items import similar_items
+
+logger = logging.getLogger(__name__)
+
+
+async def _sync_availability(app: FastAPI) -> None:
+    """
+    Recalcula ``items.available`` cada ``AVAILABILITY_SYNC_SECONDS`` (ver
+    crud.sync_availability), solo en el worker que tenga el flock.  La
+    primera pasada del líder lo recorre todo; las siguientes, solo los
+    alquileres que empezaron o terminaron desde la anterior.
+    """
+    leader = LeaderLock(
+        settings.AVAILABILITY_SYNC_LOCK
+        or os.path.join(tempfile.gettempdir(), "rental-availability.lock")
+    )
+    since = None
+    try:
+        while True:
+            await asyncio.sleep(settings.AVAILABILITY_SYNC_SECONDS)
+            if not leader.acquire():
+                continue
+            now = datetime.utcnow()
+            sessions = app.dependency_overrides.get(get_async_db, get_async_db)()
+            try:
+                await crud.aio.sync_availability(await anext(sessions), since, now)
+                since = now
+            except SQLAlchemyError:
+                logger.warning("No se pudo recalcular la disponibilidad", exc_info=True)
+            finally:
+                await sessions.aclose()
+    finally:
+        leader.release()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # índices en memoria (autocompletado, similares) cargados antes de la
+    # primera petición; la sesión sale de get_async_db (respetando
+    # dependency_overrides, p. ej. en los tests)
+    sessions = app.dependency_overrides.get(get_async_db, get_async_db)()
+    try:
+        db = await anext(sessions)
+        await db.run_sync(suggestions.refresh_if_due)
+        await db.run_sync(similar_items.refresh_if_due)
+    except SQLAlchemyError:
+        logger.warning("Índices en memoria sin precargar (¿BD sin migrar?)", exc_info=True)
+    finally:
+        await sessions.aclose()
+    availability = asyncio.create_task(_sync_availability(app))
+    yield
+    availability.cancel()
+    with suppress(asyncio.CancelledError):
+        await availability
+    # pools de procesos (bcrypt, variantes de imagen): no sobreviven a un --reload
+    await asyncio.to_thread(hasher.shutdown)
+    await asyncio.to_thread(renderer.shutdown)
+    await async_engine.dispose()   # cierra las conexiones asyncpg / aiosqlite del pool
 
-from app import models  # noqa: F401
-from app.api import auth, items, rentals, categories, upload   # 🆕
 
-app = FastAPI(title="rental-mvp")
+app = FastAPI(title="rental-mvp", lifespan=lifespan)
 
 # Routers
 app.include_router(auth.router,       prefix="/api/auth",      tags=["auth"])
@@ -13,6 +87,8 @@ app.include_router(items.router,      prefix="/api/items",     tags=["items"])
 app.include_router(rentals.router,    prefix="/api/rentals",   tags=["rentals"])
 app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
 app.include_router(upload.router,     prefix="/api/upload",    tags=["upload"])  # 🆕
+app.include_router(metrics.router,    prefix="/api/metrics",   tags=["metrics"])
 
-# ► archivos subidos accesibles en /uploads/…
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")         # 🆕
+# ► archivos subidos accesibles en /uploads/… (variantes en /uploads/_v/…),
+#   con caché inmutable y, en producción, entregados por nginx (X-Accel-Redirect)
+app.mount("/uploads", UploadFiles(directory=settings.UPLOAD_DIR, check_dir=False), name="uploads")  # 🆕
@@ -2,4 +2,5 @@
 """
 Al importar `app.models` se registran todos los modelos en `Base.metadata`.
 """
-from .models import User, Category, Item, Rental  # noqa: F401
+from .models import User, Category, CategoryClosure, Item, Rental, WriteVersion, RevokedToken  # noqa: F401
+from . import fts  # noqa: F401  → engancha el índice full-text a create_all
@@ -1,5 +1,7 @@
 # app/models/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -10,8 +12,29 @@ connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith(
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
-    echo=True,  # ponte True en dev para ver SQL en consola
+    echo=settings.SQL_ECHO,  # SQL_ECHO=true en dev para ver el SQL en consola
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# ► Ruta asíncrona (routers): misma BD con driver asyncio.  El engine
+#   síncrono de arriba sigue siendo el de Alembic, la CLI y los tests.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """*url* con el driver asíncrono de su backend (aiosqlite / asyncpg)."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.drivername in ASYNC_DRIVERS.values():
+        return url.render_as_string(hide_password=False)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    echo=settings.SQL_ECHO,
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
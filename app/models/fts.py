@@ -0,0 +1,92 @@
+# app/models/fts.py
+"""
+Índice full-text sobre ``items.name`` / ``items.description``.
+
+· SQLite → tabla virtual FTS5 *external content* (``items_fts``) que los
+  triggers mantienen sincronizada con cada INSERT/UPDATE/DELETE en items.
+· PostgreSQL → índice GIN sobre ``to_tsvector('simple', name || description)``;
+  al ser un índice de expresión no necesita triggers.
+
+Los DDL se enganchan a ``Base.metadata`` para que ``create_all`` (tests,
+entornos de desarrollo) cree también el índice.  En producción lo crea la
+migración ``20261017_0003``, que importa estas mismas listas.
+"""
+from sqlalchemy import DDL, Column, Float, Integer, MetaData, String, Table, event, func
+
+from .models import Item
+
+TS_CONFIG = "simple"
+
+# Tabla virtual (fuera de Base.metadata: la crean los DDL de abajo)
+items_fts = Table(
+    "items_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("items_fts", String),   # columna oculta usada por MATCH
+    Column("rank", Float),         # bm25() – menor es mejor
+)
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, description,
+        content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF name, description ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO items_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS items_fts_au",
+    "DROP TRIGGER IF EXISTS items_fts_ad",
+    "DROP TRIGGER IF EXISTS items_fts_ai",
+    "DROP TABLE IF EXISTS items_fts",
+]
+
+POSTGRES_CREATE = [
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_items_fts ON items USING GIN (
+        to_tsvector('{TS_CONFIG}', coalesce(name, '') || ' ' || coalesce(description, ''))
+    )
+    """,
+]
+
+POSTGRES_DROP = ["DROP INDEX IF EXISTS ix_items_fts"]
+
+
+def items_tsvector():
+    """Expresión tsvector idéntica a la del índice GIN (Postgres)."""
+    return func.to_tsvector(
+        TS_CONFIG,
+        func.coalesce(Item.name, "") + " " + func.coalesce(Item.description, ""),
+    )
+
+
+for _stmt in SQLITE_CREATE:
+    event.listen(Item.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in SQLITE_DROP:
+    event.listen(Item.__table__, "before_drop", DDL(_stmt).execute_if(dialect="sqlite"))
+for _stmt in POSTGRES_CREATE:
+    event.listen(Item.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+for _stmt in POSTGRES_DROP:
+    event.listen(Item.__table__, "before_drop", DDL(_stmt).execute_if(dialect="postgresql"))
@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import datetime
 from sqlalchemy import (
+    DDL,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
+    event,
 )
 from sqlalchemy.orm import relationship
 
@@ -31,6 +34,8 @@ item_categories = Table(
         ForeignKey("categories.id", ondelete="CASCADE"),
         primary_key=True,
     ),
+    # la PK (item_id, category_id) no sirve para buscar por categoría
+    Index("ix_item_categories_category_id", "category_id"),
 )
 
 # ───────── tabla de imágenes ─────────
@@ -42,6 +47,7 @@ class ItemImage(Base):
         Integer,
         ForeignKey("items.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
     url = Column(String, nullable=False)
 
@@ -73,6 +79,12 @@ class Category(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True, index=True, nullable=False)
+    parent_id = Column(
+        Integer,
+        ForeignKey("categories.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
 
     items = relationship(
         "Item",
@@ -81,6 +93,29 @@ class Category(Base):
     )
 
 
+# ───────── jerarquía de categorías (tabla de cierre) ─────────
+class CategoryClosure(Base):
+    """
+    Un par ``(antecesor, descendiente)`` por cada camino del árbol, incluido
+    el de cada categoría consigo misma (``depth`` 0).  Filtrar por un
+    subárbol es un único join por la PK en lugar de una consulta recursiva.
+    """
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    descendant_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # la PK cubre «descendientes de X»; esta, «antecesores de X»
+        Index("ix_category_closure_descendant", "descendant_id", "ancestor_id"),
+    )
+
+
 class Item(Base):
     __tablename__ = "items"
 
@@ -92,11 +127,14 @@ class Item(Base):
     # Imagen destacada (compatibilidad retro)
     image_url = Column(String, nullable=True)
 
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     owner = relationship("User", back_populates="items")
 
     available = Column(Boolean, default=True)
 
+    # versión de fila: se incrementa en cada escritura (cachés de fragmentos)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # relaciones
     categories = relationship(
         "Category",
@@ -110,6 +148,17 @@ class Item(Base):
         order_by="ItemImage.id",
     )
 
+    __table_args__ = (
+        # filtros del listado (available=…) + ordenación por precio
+        Index("ix_items_available_price", "available", "price_per_h"),
+        # keyset por precio sin filtro: recorre (precio, id) en orden y corta
+        # con el LIMIT, sin ordenar la tabla entera en cada página
+        Index("ix_items_price_id", "price_per_h", "id"),
+        # ids nunca reutilizados: el sello de los fragmentos cacheados los da
+        # por únicos (SQLite sin AUTOINCREMENT reasigna el más alto borrado)
+        {"sqlite_autoincrement": True},
+    )
+
     # ──────────────────────── NUEVO ─────────────────────────
     @property
     def image_urls(self) -> List[str]:
@@ -122,7 +171,7 @@ class Rental(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
-    renter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    renter_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     start_at = Column(DateTime, default=datetime.datetime.utcnow)
     end_at = Column(DateTime)
@@ -132,3 +181,47 @@ class Rental(Base):
 
     item = relationship("Item")
     renter = relationship("User", back_populates="rentals")
+
+    __table_args__ = (
+        # solapes por franja horaria (filtro available_from / available_to)
+        Index("ix_rentals_item_window", "item_id", "start_at", "end_at"),
+        # sync_availability: alquileres que empezaron / terminaron desde la última pasada
+        Index("ix_rentals_start_at", "start_at"),
+        Index("ix_rentals_end_at", "end_at"),
+    )
+
+
+# ───────── versiones de escritura (ETag / cachés) ─────────
+class WriteVersion(Base):
+    """
+    Contador monótono por ámbito (``items``, ``categories``, …) que los CRUD de
+    escritura incrementan en la misma transacción.  Al vivir en la BD lo
+    comparten todos los workers de uvicorn.
+    """
+    __tablename__ = "write_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+event.listen(
+    WriteVersion.__table__,
+    "after_create",
+    DDL(
+        "INSERT INTO write_versions (scope, version) "
+        "VALUES ('items', 0), ('categories', 0), ('item_categories', 0), ('item_content', 0)"
+    ),
+)
+
+
+# ───────── tokens revocados (logout) ─────────
+class RevokedToken(Base):
+    """
+    ``jti`` de los JWT revocados.  El ``id`` autoincremental permite a cada
+    worker leer solo las revocaciones nuevas; las filas caducadas se podan.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String, unique=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
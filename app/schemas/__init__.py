@@ -1,9 +1,10 @@
 # app/schemas/__init__.py
 from .user import UserCreate, UserOut
-from .category import CategoryCreate, CategoryOut
-from .item import ItemCreate, ItemUpdate, ItemOut
+from .category import CategoryCreate, CategoryOut, CategoryTree
+from .item import ItemCreate, ItemUpdate, ItemOut, ItemFacets, ItemSuggestion
 from .rental import RentalCreate, RentalOut
 from .token import Token
+from .upload import PresignIn, PresignOut, CompleteIn, UploadOut
 
 __all__ = [
     # users
@@ -12,13 +13,21 @@ __all__ = [
     # categories
     "CategoryCreate",
     "CategoryOut",
+    "CategoryTree",
     # items
     "ItemCreate",
     "ItemUpdate",
     "ItemOut",
+    "ItemFacets",
+    "ItemSuggestion",
     # rentals
     "RentalCreate",
     "RentalOut",
     # auth
     "Token",
+    # uploads
+    "PresignIn",
+    "PresignOut",
+    "CompleteIn",
+    "UploadOut",
 ]
@@ -1,4 +1,5 @@
-# app/schemas/category.py
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -7,12 +8,18 @@ class CategoryBase(BaseModel):
 
 
 class CategoryCreate(CategoryBase):
-    """Crear categoría (solo nombre)."""
-    pass
+    """Crear categoría (nombre único y, opcionalmente, categoría padre)."""
+    parent_id: Optional[int] = None
 
 
 class CategoryOut(CategoryBase):
     id: int
+    parent_id: Optional[int] = None
 
     class Config:
         from_attributes = True
+
+
+class CategoryTree(CategoryOut):
+    """Nodo del árbol de categorías con sus hijas ordenadas por nombre."""
+    children: List["CategoryTree"] = []
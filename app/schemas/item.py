@@ -1,7 +1,9 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field, PositiveFloat, HttpUrl
+from pydantic import BaseModel, Field, PositiveFloat, HttpUrl, computed_field
+
+from app.core.images import variant_urls
 
 from .category import CategoryOut
 
@@ -48,5 +50,42 @@ class ItemOut(ItemBase):
     # campo legacy para no romper clientes antiguos
     image_url: Optional[HttpUrl] = None
 
+    @computed_field
+    @property
+    def image_variants(self) -> List[Dict[str, str]]:
+        """Por cada imagen de ``image_urls``: variante → URL (solo subidas locales)."""
+        return [variant_urls(str(url)) for url in self.image_urls]
+
     class Config:
         from_attributes = True
+
+
+# ─────────────────────────── Facetas ───────────────────────────────────────
+class CategoryFacet(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class AvailabilityFacet(BaseModel):
+    available: int = 0
+    unavailable: int = 0
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class ItemFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    availability: AvailabilityFacet
+    price: List[PriceBucket]
+
+
+# ─────────────────────────── Autocompletado ────────────────────────────────
+class ItemSuggestion(BaseModel):
+    id: int
+    name: str
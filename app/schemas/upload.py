@@ -0,0 +1,33 @@
+# app/schemas/upload.py
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+_KEY_PATTERN = r"^[0-9a-f]{64}\.(jpg|png|gif|webp)$"
+
+
+class PresignIn(BaseModel):
+    content_type: str = Field(..., examples=["image/png"])
+    size: int = Field(..., gt=0, description="Bytes exactos del fichero")
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$", description="SHA-256 (hex) del contenido")
+
+
+class PresignedUpload(BaseModel):
+    url: str
+    method: str = "PUT"
+    headers: Dict[str, str]
+
+
+class PresignOut(BaseModel):
+    key: str
+    # si el contenido ya existe no hay nada que subir: basta con /complete
+    upload: Optional[PresignedUpload] = None
+    expires_in: int
+
+
+class CompleteIn(BaseModel):
+    key: str = Field(..., pattern=_KEY_PATTERN)
+
+
+class UploadOut(BaseModel):
+    url: str
@@ -0,0 +1,2 @@
+# app/services/__init__.py
+# paquete de servicios en memoria (cachés, índices, pools) por worker
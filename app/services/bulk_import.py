@@ -0,0 +1,214 @@
+# app/services/bulk_import.py
+"""
+Importación masiva de ítems desde un cuerpo NDJSON o CSV en streaming.
+
+El cuerpo se trocea en registros a medida que llega (nunca se carga
+entero), cada registro se valida con ``ItemCreate`` y los válidos se
+insertan en lotes de ``chunk_size`` con :func:`app.crud.create_items_bulk`
+(un commit por lote).  Cada fila produce un estado
+``{"row", "status", "id"|"detail"}`` que se envía en cuanto su lote se
+confirma.
+
+Formato CSV (cabecera obligatoria; un campo entre comillas puede ocupar
+varias líneas)::
+
+    name,description,price_per_h,image_urls,categories
+    Taladro,800 W,4.5,http://…/a.png|http://…/b.png,1|3
+"""
+from __future__ import annotations
+
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.schemas.item import ItemCreate
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv"}
+_LIST_SEP = "|"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Divide un flujo de bytes en líneas UTF-8 sin acumular el cuerpo."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+def _split(value: str | None) -> list[str]:
+    return [v.strip() for v in (value or "").replace(" ", _LIST_SEP).split(_LIST_SEP) if v.strip()]
+
+
+def _csv_record(header: list[str], values: list[str]) -> dict:
+    record = dict(zip(header, values))
+    record["image_urls"] = _split(record.get("image_urls"))
+    record["categories"] = [int(c) for c in _split(record.get("categories"))] or None
+    if not record.get("description"):
+        record["description"] = None
+    return record
+
+
+class _LineFeed:
+    """Iterador de líneas al que se le añaden más sobre la marcha."""
+
+    def __init__(self) -> None:
+        self._lines: deque[str] = deque()
+
+    def push(self, line: str) -> None:
+        self._lines.append(line)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+
+async def _iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[str] | None]:
+    """
+    Registros CSV con **un solo** ``csv.reader`` sobre todo el cuerpo.  Al
+    lector solo se le pide el siguiente registro cuando las comillas
+    acumuladas están cerradas (número par), así que un campo con saltos de
+    línea nunca se queda a medias esperando datos que aún no han llegado.
+    Un registro con comillas sin cerrar al final del cuerpo se emite como
+    ``None``.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    quotes = 0
+    async for line in iter_lines(chunks):
+        feed.push(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        quotes = 0
+        values = next(reader)
+        if any(v.strip() for v in values):
+            yield values
+    if quotes % 2:
+        yield None
+
+
+async def iter_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[int, dict]]:
+    """
+    ``(nº de fila, registro)`` por cada registro no vacío.  Los registros
+    ilegibles se emiten como ``{"__error__": detalle}``.
+    """
+    row = 0
+    if content_type in CSV_TYPES:
+        header: list[str] | None = None
+        async for values in _iter_csv(chunks):
+            if header is None:
+                header = [h.strip() for h in values or []]
+                continue
+            row += 1
+            if values is None:
+                yield row, {"__error__": "Registro ilegible: comillas sin cerrar"}
+                continue
+            try:
+                yield row, _csv_record(header, values)
+            except (ValueError, TypeError) as exc:
+                yield row, {"__error__": f"Registro ilegible: {exc}"}
+        return
+
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line)
+        except (ValueError, TypeError) as exc:
+            yield row, {"__error__": f"Registro ilegible: {exc}"}
+
+
+def _validate(record: dict, known_categories: set[int]) -> ItemCreate:
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+    item = ItemCreate.model_validate(record)
+    missing = set(item.categories or []) - known_categories
+    if missing:
+        raise ValueError(f"Categoría(s) inexistente(s): {', '.join(map(str, sorted(missing)))}")
+    return item
+
+
+def _error_detail(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc']))}: {e['msg']}" if e["loc"] else e["msg"]
+            for e in exc.errors()
+        )
+    return str(exc)
+
+
+async def import_items(
+    db: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    owner_id: int,
+    chunk_size: int,
+) -> AsyncIterator[dict]:
+    """
+    Consume el cuerpo y emite el estado de cada fila, en orden de fila, en
+    cuanto se confirma el lote que la contiene: en memoria solo vive el lote
+    en curso.  Las categorías se resuelven con **una** consulta al principio;
+    el trabajo con la BD va por la sesión asíncrona para no bloquear el
+    event loop.
+
+    Se ejecuta mientras se envía la respuesta, después de que FastAPI haya
+    cerrado la sesión de la dependencia; una ``AsyncSession`` cerrada vuelve
+    a abrir conexión al usarse, y ``async with`` la devuelve al terminar.
+    """
+    async with db:
+        known = await crud.aio.get_category_ids(db)
+        # estados desde la primera fila aún sin confirmar, en orden de fila
+        batch: list[dict] = []
+        pending: list[tuple[int, ItemCreate]] = []
+
+        async def flush() -> list[dict]:
+            rows = [row for row, _ in pending]
+            try:
+                ids = await crud.aio.create_items_bulk(db, [it for _, it in pending], owner_id)
+            except Exception as exc:  # noqa: BLE001  → el lote entero falla
+                await db.rollback()
+                done = {r: {"row": r, "status": "error", "detail": str(exc)} for r in rows}
+            else:
+                done = {r: {"row": r, "status": "created", "id": i} for r, i in zip(rows, ids)}
+            out = [done.get(s["row"], s) for s in batch]
+            batch.clear()
+            pending.clear()
+            return out
+
+        async for row, record in iter_records(chunks, content_type):
+            try:
+                pending.append((row, _validate(record, known)))
+                batch.append({"row": row})
+            except (ValueError, ValidationError) as exc:
+                error = {"row": row, "status": "error", "detail": _error_detail(exc)}
+                if not pending:
+                    yield error
+                    continue
+                batch.append(error)
+            if len(batch) >= chunk_size:
+                for status in await flush():
+                    yield status
+
+        if pending:
+            for status in await flush():
+                yield status
+
+
+async def ndjson(statuses: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for status in statuses:
+        yield json.dumps(status).encode() + b"\n"
@@ -0,0 +1,141 @@
+# app/services/category_cache.py
+"""
+Caché de categorías compartida por los workers vía la versión de escritura.
+
+Las categorías casi nunca cambian, pero se listan en cada carga de página y
+se validan en cada alta/edición de ítem.  Este worker guarda una instantánea
+inmutable (lista ordenada por nombre, ``id → nombre``, árbol y subárboles
+según ``category_closure``) sellada con la versión ``categories`` de
+``write_versions``.  Cada acceso lee esa versión
+(una fila por clave primaria) y solo recarga si otro worker — o este — la ha
+incrementado con ``bump_version``; así la invalidación llega a todos los
+procesos sin canal adicional.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.models import Category, CategoryClosure
+from app.schemas.category import CategoryOut, CategoryTree
+from app.services.write_versions import categories_version
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """Estado de las categorías en una versión concreta."""
+
+    version: int
+    ordered: tuple[CategoryOut, ...]     # por nombre, como ``get_categories``
+    by_id: dict[int, CategoryOut]
+    tree: tuple[CategoryTree, ...]       # raíces, hijas anidadas por nombre
+    descendants: dict[int, frozenset[int]]  # subárbol (incluida la propia)
+
+    def subtree(self, category_id: int) -> frozenset[int]:
+        return self.descendants.get(category_id, frozenset((category_id,)))
+
+    def ancestors(self, category_id: int) -> list[int]:
+        """Antecesores de *category_id*, del padre hacia la raíz."""
+        chain: list[int] = []
+        cat = self.by_id.get(category_id)
+        while cat is not None and cat.parent_id is not None and cat.parent_id not in chain:
+            chain.append(cat.parent_id)
+            cat = self.by_id.get(cat.parent_id)
+        return chain
+
+
+def _build_tree(rows) -> tuple[CategoryTree, ...]:
+    """Árbol a partir de ``(id, nombre, padre)`` ya ordenadas por nombre."""
+    nodes = {cid: CategoryTree(id=cid, name=name, parent_id=parent) for cid, name, parent in rows}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id)
+        (parent.children if parent is not None else roots).append(node)
+    return tuple(roots)
+
+
+def _detached(out: CategoryOut) -> Category:
+    cat = Category(id=out.id, name=out.name, parent_id=out.parent_id)
+    make_transient_to_detached(cat)
+    return cat
+
+
+class CategoryCache:
+    """Instantánea de categorías por worker, revalidada contra la BD."""
+
+    def __init__(self):
+        self._snapshot: Snapshot | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.reloads = 0
+
+    def snapshot(self, db: Session) -> Snapshot:
+        """Instantánea vigente; recarga si la versión de la BD ha cambiado."""
+        version = categories_version(db)
+        snap = self._snapshot
+        if snap is not None and snap.version == version:
+            self.hits += 1
+            return snap
+
+        rows = db.execute(
+            select(Category.id, Category.name, Category.parent_id).order_by(Category.name)
+        ).all()
+        descendants: dict[int, set[int]] = {}
+        for ancestor, descendant in db.execute(
+            select(CategoryClosure.ancestor_id, CategoryClosure.descendant_id)
+        ):
+            descendants.setdefault(ancestor, set()).add(descendant)
+        ordered = tuple(
+            CategoryOut(id=cid, name=name, parent_id=parent) for cid, name, parent in rows
+        )
+        snap = Snapshot(
+            version=version,
+            ordered=ordered,
+            by_id={cat.id: cat for cat in ordered},
+            tree=_build_tree(rows),
+            descendants={cid: frozenset(ids) for cid, ids in descendants.items()},
+        )
+        with self._lock:
+            self.reloads += 1
+            self._snapshot = snap
+        return snap
+
+    def list(self, db: Session) -> tuple[CategoryOut, ...]:
+        return self.snapshot(db).ordered
+
+    def tree(self, db: Session) -> tuple[CategoryTree, ...]:
+        return self.snapshot(db).tree
+
+    def lookup(self, db: Session, ids: Iterable[int]) -> list[Category]:
+        """
+        Instancias ``Category`` persistentes para *ids* sin consultar la tabla
+        (``merge(load=False)`` asocia a la sesión instancias desacopladas con
+        los datos cacheados).
+        Lanza ``ValueError`` si alguna no existe.
+        """
+        ids = list(dict.fromkeys(ids))
+        snap = self.snapshot(db)
+        missing = [cid for cid in ids if cid not in snap.by_id]
+        if missing:
+            raise ValueError(f"Categoría(s) inexistente(s): {', '.join(map(str, missing))}")
+        return [db.merge(_detached(snap.by_id[cid]), load=False) for cid in ids]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "version": snap.version if snap else None,
+            "size": len(snap.by_id) if snap else 0,
+            "hits": self.hits,
+            "reloads": self.reloads,
+        }
+
+
+categories = CategoryCache()
@@ -0,0 +1,208 @@
+# app/services/category_index.py
+"""
+Índice de bits ``categoría → ítems`` en memoria para filtrar el listado.
+
+Cada categoría guarda un :class:`Bitmap`: los ids se reparten en trozos de
+2¹⁶ (al estilo de los *roaring bitmaps*) y cada trozo con algún ítem es un
+``int`` de Python con un bit por id.  Así la memoria crece con los rangos
+de ids ocupados, no con el mayor id, y «todas», «alguna» y «ninguna» de
+varias categorías se resuelven con ``&``, ``|`` y ``-`` por trozo en C en
+lugar de un ``EXISTS`` por fila candidata.  El resultado entra en la
+consulta SQL como ``Item.id IN (…)`` / ``NOT IN (…)``.
+
+El índice va sellado con la versión ``item_categories`` de
+``write_versions``, que solo avanza cuando cambian las categorías de algún
+ítem (no con alquileres, precios ni disponibilidad):
+
+· las escrituras de este worker aplican su cambio con :meth:`apply` y
+  avanzan el sello si era justo la versión anterior;
+· si el sello no coincide (escritura en otro worker) se reconstruye entero
+  con una lectura de ``item_categories``.
+"""
+from __future__ import annotations
+
+import threading
+from functools import reduce
+from operator import and_, or_
+from typing import Iterable, Iterator, Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import item_categories
+from app.services.write_versions import item_categories_version
+
+MODES = ("any", "all")
+CHUNK_BITS = 16
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Posiciones de los bits a 1 de *bits* en orden ascendente."""
+    text = bin(bits)[:1:-1]          # sin «0b» y con el bit 0 primero
+    pos = text.find("1")
+    while pos != -1:
+        yield pos
+        pos = text.find("1", pos + 1)
+
+
+class Bitmap:
+    """
+    Conjunto inmutable de ids: ``{nº de trozo: bits del trozo}`` sin trozos
+    vacíos.  Los operadores devuelven un ``Bitmap`` nuevo.
+    """
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks: Optional[dict[int, int]] = None):
+        self.chunks = chunks or {}
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        chunks = dict(self.chunks)
+        for key, word in other.chunks.items():
+            chunks[key] = chunks.get(key, 0) | word
+        return Bitmap(chunks)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        small, large = sorted((self.chunks, other.chunks), key=len)
+        return Bitmap(
+            {key: both for key, word in small.items() if (both := word & large.get(key, 0))}
+        )
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap(
+            {key: rest for key, word in self.chunks.items() if (rest := word & ~other.chunks.get(key, 0))}
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self.chunks):
+            base = key << CHUNK_BITS
+            for pos in iter_bits(self.chunks[key]):
+                yield base + pos
+
+    def __bool__(self) -> bool:
+        return bool(self.chunks)
+
+    def bit_count(self) -> int:
+        return sum(word.bit_count() for word in self.chunks.values())
+
+    def with_id(self, item_id: int, present: bool) -> "Bitmap":
+        """Copia con *item_id* dentro (o fuera); ``self`` si no cambia."""
+        key, bit = item_id >> CHUNK_BITS, 1 << (item_id & _CHUNK_MASK)
+        old = self.chunks.get(key, 0)
+        new = old | bit if present else old & ~bit
+        if new == old:
+            return self
+        chunks = dict(self.chunks)
+        if new:
+            chunks[key] = new
+        else:
+            del chunks[key]
+        return Bitmap(chunks)
+
+
+EMPTY = Bitmap()
+
+
+class CategoryBitmapIndex:
+    """Bitsets de ítems por categoría, por worker y revalidados contra la BD."""
+
+    def __init__(self):
+        self._version: int | None = None
+        self._bits: dict[int, Bitmap] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+        self.applied = 0
+
+    # ───────────────────────────── Lectura ─────────────────────────────────
+    def _current(self, db: Session) -> dict[int, Bitmap]:
+        version = item_categories_version(db)
+        with self._lock:
+            if self._version == version:
+                self.hits += 1
+                return self._bits
+
+        chunks: dict[int, dict[int, int]] = {}
+        for item_id, cat_id in db.execute(
+            select(item_categories.c.item_id, item_categories.c.category_id)
+        ):
+            words = chunks.setdefault(cat_id, {})
+            key = item_id >> CHUNK_BITS
+            words[key] = words.get(key, 0) | (1 << (item_id & _CHUNK_MASK))
+        bits = {cat_id: Bitmap(words) for cat_id, words in chunks.items()}
+        with self._lock:
+            self.rebuilds += 1
+            self._version, self._bits = version, bits
+        return bits
+
+    def match(
+        self,
+        db: Session,
+        categories: Iterable[Iterable[int]] = (),
+        mode: str = "any",
+        exclude: Iterable[int] = (),
+    ) -> tuple[Bitmap, bool]:
+        """
+        Combina las categorías pedidas y devuelve ``(bitset, negado)``.
+        Cada elemento de *categories* es un grupo de ids (una categoría y
+        su subárbol) que cuenta como una sola:
+
+        · con *categories*: ítems con todos (``all``) o alguno (``any``) de
+          los grupos y ninguna categoría de *exclude*; ``negado`` es False.
+        · solo *exclude*: ítems de alguna excluida con ``negado`` True (el
+          llamante filtra ``NOT IN``).
+        """
+        if mode not in MODES:
+            raise ValueError(f"category_mode debe ser uno de: {', '.join(MODES)}")
+        bits = self._current(db)
+
+        def _union(ids: Iterable[int]) -> Bitmap:
+            return reduce(or_, (bits.get(c, EMPTY) for c in ids), EMPTY)
+
+        excluded = _union(exclude)
+        wanted = [_union(group) for group in categories]
+        if not wanted:
+            return excluded, True
+        combined = reduce(and_ if mode == "all" else or_, wanted)
+        return combined - excluded, False
+
+    # ──────────────────────────── Escritura ────────────────────────────────
+    def apply(self, version: int, changes: Optional[Mapping[int, Iterable[int]]] = None) -> None:
+        """
+        Aplica tras el ``commit`` la escritura que produjo *version* (de
+        ``item_categories``):
+        *changes* asigna a cada ítem su nuevo conjunto de categorías (vacío
+        si se borró).  Si el índice no estaba en ``version - 1`` se deja
+        desfasado y la próxima lectura lo reconstruye.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                return
+            bits = dict(self._bits)      # copia: los lectores no ven medio cambio
+            for item_id, cats in (changes or {}).items():
+                cats = set(cats)
+                for cat_id in set(bits) | cats:
+                    old = bits.get(cat_id, EMPTY)
+                    new = old.with_id(item_id, cat_id in cats)
+                    if new is not old:
+                        bits[cat_id] = new
+            self._version, self._bits = version, bits
+            self.applied += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version, self._bits = None, {}
+
+    def stats(self) -> dict:
+        return {
+            "version": self._version,
+            "categories": len(self._bits),
+            "chunks": sum(len(b.chunks) for b in self._bits.values()),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "applied": self.applied,
+        }
+
+
+category_index = CategoryBitmapIndex()
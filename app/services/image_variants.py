@@ -0,0 +1,112 @@
+# app/services/image_variants.py
+"""
+Generación de variantes de imagen en un pool de procesos.
+
+Redimensionar y codificar WebP/AVIF es CPU puro, así que va a un
+``ProcessPoolExecutor`` propio (como el hash de contraseñas), nunca al
+event loop ni al threadpool.  Tras cada subida se encargan todas las
+variantes en segundo plano; si alguna falta cuando se pide, ``/uploads``
+(``app.api.upload_files``) la genera en ese momento y la deja en disco
+para las siguientes.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+from app.core.images import VARIANTS, variant_relpath
+
+
+# ──────────────────────── trabajo (se ejecuta en el hijo) ────────────────────
+
+
+def _render(src: str, dst: str, max_side: int, fmt: str, quality: int) -> None:
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((max_side, max_side))
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or "A" in im.getbands() else "RGB")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.{os.getpid()}.part"
+        im.save(tmp, format=fmt, quality=quality)
+    os.replace(tmp, dst)
+
+
+# ─────────────────────────────── servicio ─────────────────────────────────────
+
+
+class VariantRenderer:
+    """Pool perezoso; agrupa las peticiones simultáneas de la misma variante."""
+
+    def __init__(self, workers: int | None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.generated = 0
+        self.failed = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def ensure(self, directory: str, name: str, variant: str) -> str:
+        """
+        Ruta de *variant* para el original *name*, generándola si no existe.
+        Lanza ``FileNotFoundError`` si el original no está.
+        """
+        dst = os.path.join(directory, variant_relpath(name, variant))
+        if os.path.exists(dst):
+            return dst
+        src = os.path.join(directory, name)
+        if not os.path.isfile(src):
+            raise FileNotFoundError(src)
+
+        future = self._inflight.get(dst)
+        if future is None:
+            spec = VARIANTS[variant]
+            loop = asyncio.get_running_loop()
+            future = asyncio.ensure_future(
+                loop.run_in_executor(self._executor(), _render, src, dst, *spec)
+            )
+            self._inflight[dst] = future
+            future.add_done_callback(lambda f: self._done(dst, f))
+        await asyncio.shield(future)
+        return dst
+
+    def _done(self, dst: str, future: asyncio.Future) -> None:
+        self._inflight.pop(dst, None)
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.generated += 1
+
+    async def render_all(self, directory: str, name: str) -> None:
+        """Genera todas las variantes de *name* (tarea de fondo tras la subida)."""
+        await asyncio.gather(
+            *(self.ensure(directory, name, variant) for variant in VARIANTS),
+            return_exceptions=True,
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {"generated": self.generated, "failed": self.failed, "in_flight": len(self._inflight)}
+
+
+renderer = VariantRenderer(settings.IMAGE_VARIANT_WORKERS)
+
@@ -0,0 +1,74 @@
+# app/services/item_fragments.py
+"""
+Caché de fragmentos JSON de ``ItemOut``.
+
+Serializar cada fila (``HttpUrl`` por imagen, ``CategoryOut`` anidados…)
+domina la CPU en páginas grandes.  Guardamos los bytes JSON ya validados de
+cada ítem, sellados con ``(item.version, versión de categorías)``; si el
+sello no coincide se re-serializa y se sustituye la entrada.
+El listado se monta uniendo fragmentos sin volver a pasar por pydantic.
+
+La caché es por worker; como el sello viaja en la propia fila leída de la
+BD, una escritura hecha en otro worker invalida la entrada igualmente.  Los
+ids de ítem nunca se reutilizan (``AUTOINCREMENT`` en SQLite, secuencia en
+PostgreSQL), así que un alta no puede heredar el fragmento de una baja.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from app.core.config import settings
+from app.schemas.item import ItemOut
+
+
+class FragmentCache:
+    """LRU ``item_id → (sello, bytes JSON)`` segura entre hilos."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[int, tuple[tuple, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fragment(self, item, shared_versions: tuple[int, ...]) -> bytes:
+        """
+        Bytes JSON de *item* (ORM o fila ligera con atributos de ItemOut).
+        *shared_versions* son las versiones compartidas (categorías).
+        """
+        stamp = (item.version, *shared_versions)
+        with self._lock:
+            entry = self._data.get(item.id)
+            if entry is not None and entry[0] == stamp:
+                self._data.move_to_end(item.id)
+                self.hits += 1
+                return entry[1]
+
+        data = ItemOut.model_validate(item).model_dump_json().encode()
+        with self._lock:
+            self.misses += 1
+            self._data[item.id] = (stamp, data)
+            self._data.move_to_end(item.id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return data
+
+    def render(self, items: Iterable, shared_versions: tuple[int, ...]) -> bytes:
+        """Array JSON con los fragmentos de *items* en orden."""
+        return b"[" + b",".join(self.fragment(it, shared_versions) for it in items) + b"]"
+
+    def invalidate(self, item_id: int) -> None:
+        with self._lock:
+            self._data.pop(item_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+fragments = FragmentCache(settings.ITEM_FRAGMENT_CACHE_SIZE)
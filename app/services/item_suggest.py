@@ -0,0 +1,187 @@
+# app/services/item_suggest.py
+"""
+Índice de prefijos en memoria para el autocompletado de nombres de ítem.
+
+Dos arrays ordenados de ``(clave, id)`` con las claves normalizadas
+(minúsculas, sin tildes, espacios colapsados):
+
+· ``_names``: el nombre completo → «tal» encuentra «Taladro percutor»;
+· ``_words``: el nombre desde cada palabra siguiente → «perc» también.
+
+Una consulta es un ``bisect`` más un recorrido de como mucho *limit*
+entradas por array, sin tocar la BD.  Las escrituras de este worker se
+aplican al momento (:meth:`apply`); las de otros workers se detectan por la
+versión ``item_content`` de ``write_versions`` (que no avanzan alquileres ni
+cambios de disponibilidad), consultada como mucho cada
+``ITEM_SUGGEST_REFRESH_SECONDS``; si cambió, se reconstruye el índice.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import unicodedata
+from typing import Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Item
+from app.services.write_versions import item_content_version
+
+# a partir de cuántos cambios compensa reordenar en bloque (importaciones)
+_BATCH = 64
+
+
+def fold(text: str) -> str:
+    """Clave de comparación: sin diacríticos, ``casefold`` y espacios simples."""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+def _keys(name: str) -> tuple[str, tuple[str, ...]]:
+    """Clave del nombre completo y claves desde cada palabra posterior."""
+    key = fold(name)
+    starts = [i + 1 for i, ch in enumerate(key) if ch == " "]
+    return key, tuple(key[i:] for i in starts)
+
+
+class SuggestIndex:
+    """Arrays ordenados por clave normalizada, por worker."""
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._names: list[tuple[str, int]] = []
+        self._words: list[tuple[str, int]] = []
+        self._items: dict[int, str] = {}     # id → nombre tal cual se muestra
+        self._version: int | None = None
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.rebuilds = 0
+        self.applied = 0
+
+    # ───────────────────────────── Lectura ─────────────────────────────────
+    def suggest(self, q: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Hasta *limit* ``(id, nombre)``: primero prefijos del nombre, luego de palabras."""
+        prefix = fold(q)
+        if not prefix:
+            return []
+        found: dict[int, str] = {}
+        with self._lock:
+            for array in (self._names, self._words):
+                i = bisect.bisect_left(array, (prefix,))
+                while i < len(array) and len(found) < limit:
+                    key, item_id = array[i]
+                    if not key.startswith(prefix):
+                        break
+                    found.setdefault(item_id, self._items[item_id])
+                    i += 1
+        return list(found.items())
+
+    def refresh_if_due(self, db: Session) -> None:
+        """
+        Reconstruye el índice si la versión de contenido cambió desde la última
+        comprobación (como mucho una lectura cada ``refresh_seconds``).
+        Nunca bloquea: si otro hilo ya está refrescando se sirve lo actual.
+        """
+        now = time.monotonic()
+        due = self._checked_at is None or now - self._checked_at >= self.refresh_seconds
+        if not due or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            version = item_content_version(db)
+            if version != self._version:
+                self.rebuild(db, version)
+            self._checked_at = now
+        finally:
+            self._refresh_lock.release()
+
+    def rebuild(self, db: Session, version: int) -> None:
+        items = dict(db.execute(select(Item.id, Item.name)).all())
+        names, words = [], []
+        for item_id, name in items.items():
+            key, tails = _keys(name)
+            names.append((key, item_id))
+            words.extend((tail, item_id) for tail in tails)
+        names.sort()
+        words.sort()
+        with self._lock:
+            self._names, self._words, self._items = names, words, items
+            self._version = version
+            self.rebuilds += 1
+
+    # ──────────────────────────── Escritura ────────────────────────────────
+    def apply(self, version: int, changes: Optional[Mapping[int, Optional[str]]] = None) -> None:
+        """
+        Aplica tras el ``commit`` la escritura que produjo *version*:
+        *changes* da el nuevo nombre de cada ítem (``None`` si se borró).
+        Si el índice no estaba en ``version - 1`` se deja como está y el
+        próximo refresco lo reconstruye.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                return
+            changes = changes or {}
+            if len(changes) >= _BATCH:
+                self._replace_many(changes)
+            else:
+                for item_id, name in changes.items():
+                    self._remove(item_id)
+                    if name is not None:
+                        self._insert(item_id, name)
+            self._version = version
+            self.applied += 1
+
+    def _insert(self, item_id: int, name: str) -> None:
+        key, tails = _keys(name)
+        bisect.insort(self._names, (key, item_id))
+        for tail in tails:
+            bisect.insort(self._words, (tail, item_id))
+        self._items[item_id] = name
+
+    def _remove(self, item_id: int) -> None:
+        name = self._items.pop(item_id, None)
+        if name is None:
+            return
+        key, tails = _keys(name)
+        for array, entries in ((self._names, (key,)), (self._words, tails)):
+            for entry in entries:
+                i = bisect.bisect_left(array, (entry, item_id))
+                if i < len(array) and array[i] == (entry, item_id):
+                    del array[i]
+
+    def _replace_many(self, changes: Mapping[int, Optional[str]]) -> None:
+        """Filtra y reordena una vez (timsort aprovecha lo ya ordenado)."""
+        names = [e for e in self._names if e[1] not in changes]
+        words = [e for e in self._words if e[1] not in changes]
+        for item_id, name in changes.items():
+            self._items.pop(item_id, None)
+            if name is None:
+                continue
+            key, tails = _keys(name)
+            names.append((key, item_id))
+            words.extend((tail, item_id) for tail in tails)
+            self._items[item_id] = name
+        names.sort()
+        words.sort()
+        self._names, self._words = names, words
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names, self._words, self._items = [], [], {}
+            self._version = self._checked_at = None
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._items),
+            "version": self._version,
+            "rebuilds": self.rebuilds,
+            "applied": self.applied,
+        }
+
+
+suggestions = SuggestIndex(settings.ITEM_SUGGEST_REFRESH_SECONDS)
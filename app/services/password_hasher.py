@@ -0,0 +1,140 @@
+# app/services/password_hasher.py
+"""
+Hash / verificación de contraseñas fuera del event loop y del threadpool.
+
+bcrypt es CPU puro: ejecutado en un endpoint síncrono retiene uno de los
+tokens del threadpool compartido de anyio durante todo el coste del hash y
+una ráfaga de logins deja sin hilos al resto de rutas del worker.  Aquí lo
+mandamos a un ``ProcessPoolExecutor`` propio (tamaño = núcleos) con una
+cola acotada: si ya hay ``workers + PASSWORD_HASH_QUEUE`` peticiones en
+vuelo se rechaza con :class:`HasherBusy` (la API responde 503 +
+``Retry-After``) en lugar de acumular latencia sin límite.
+
+``PASSWORD_HASH_WORKERS=0`` desactiva el pool y vuelve al threadpool.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import user as user_crud
+
+
+class HasherBusy(RuntimeError):
+    """La cola de hashing está llena; reintentar más tarde."""
+
+
+# ───────────────────── trabajos (se ejecutan en el hijo) ─────────────────────
+
+
+def _timed(fn, *args):
+    started = time.monotonic()          # reloj del sistema: comparable entre procesos
+    result = fn(*args)
+    return result, started, time.monotonic() - started
+
+
+def _hash_job(password: str):
+    return _timed(user_crud._hash_password, password)
+
+
+def _verify_job(password: str, hashed: str):
+    return _timed(user_crud.verify_password, password, hashed)
+
+
+# ─────────────────────────────── métricas ─────────────────────────────────────
+
+
+class _Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count, self.total, self.max = 0, 0.0, 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        avg = self.total / self.count if self.count else 0.0
+        return {"count": self.count, "avg_ms": round(avg * 1000, 3), "max_ms": round(self.max * 1000, 3)}
+
+
+# ─────────────────────────────── servicio ─────────────────────────────────────
+
+
+class PasswordHasher:
+    """Pool de procesos perezoso con admisión acotada y métricas."""
+
+    def __init__(self, workers: int | None, queue_size: int):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.capacity = self.workers + queue_size
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.hash_time = _Timing()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: el hijo no hereda hilos ni conexiones del worker web
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def _run(self, job, *args):
+        with self._lock:
+            if self._in_flight >= max(self.capacity, 1):
+                self.rejected += 1
+                raise HasherBusy("Demasiadas peticiones de autenticación en curso")
+            self._in_flight += 1
+        try:
+            submitted = time.monotonic()
+            if self.workers:
+                loop = asyncio.get_running_loop()
+                result, started, elapsed = await loop.run_in_executor(self._executor(), job, *args)
+            else:
+                result, started, elapsed = await run_in_threadpool(job, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self.queue_wait.add(max(started - submitted, 0.0))
+            self.hash_time.add(elapsed)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_job, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_verify_job, password, hashed)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "rejected": self.rejected,
+                "queue_wait": self.queue_wait.as_dict(),
+                "hash_time": self.hash_time.as_dict(),
+            }
+
+
+hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
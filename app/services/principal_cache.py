@@ -0,0 +1,121 @@
+# app/services/principal_cache.py
+"""
+Caché de principales autenticados (TTL + LRU) para ``get_current_user``.
+
+La clave es el SHA-256 del token (nunca guardamos el token en claro) y el
+valor un :class:`Principal` inmutable, independiente de cualquier sesión
+SQLAlchemy.  Cada entrada caduca a los ``PRINCIPAL_CACHE_TTL`` segundos o al
+expirar el propio token, lo que ocurra antes.
+
+Las modificaciones y borrados de ``User`` hechos por el ORM en este worker
+invalidan al momento las entradas del usuario; en otros workers el TTL
+acota cuánto tiempo puede servirse un principal desactualizado.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Usuario autenticado tal y como lo ven los endpoints."""
+
+    id: int
+    username: str
+    email: str
+    jti: str | None = None      # identificador del token (revocación)
+
+    @classmethod
+    def from_user(cls, user: User, jti: str | None = None) -> "Principal":
+        return cls(id=user.id, username=user.username, email=user.email, jti=jti)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class PrincipalCache:
+    """LRU ``digest(token) → (caducidad, Principal)`` segura entre hilos."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[bytes, tuple[float, Principal]] = OrderedDict()
+        self._by_user: dict[int, set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Principal | None:
+        key = token_digest(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, principal: Principal, token_exp: float | None = None) -> None:
+        """Guarda *principal*; *token_exp* es el ``exp`` del JWT (epoch)."""
+        expires = time.monotonic() + self.ttl
+        if token_exp is not None:
+            expires = min(expires, time.monotonic() + (token_exp - time.time()))
+        key = token_digest(token)
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (expires, principal)
+            self._by_user.setdefault(principal.id, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._discard(next(iter(self._data)))
+
+    def _discard(self, key: bytes) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            keys = self._by_user.get(entry[1].id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[entry[1].id]
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._discard(token_digest(token))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+principals = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+
+
+# ───────────────────── invalidación por cambios en User ──────────────────────
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    principals.invalidate_user(target.id)
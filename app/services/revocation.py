@@ -0,0 +1,131 @@
+# app/services/revocation.py
+"""
+Lista de revocación de JWT en memoria (por worker).
+
+Comprobar la tabla ``revoked_tokens`` en cada petición añadiría una
+consulta al camino crítico.  En su lugar cada worker mantiene:
+
+· un **filtro de Bloom** (``bytearray`` de ``REVOCATION_BLOOM_BITS`` bits,
+  ``k`` posiciones derivadas del SHA-256 del ``jti``): un "no" es seguro y
+  cuesta O(k), sin BD;
+· un **conjunto exacto** ``jti → exp`` que descarta los falsos positivos.
+
+La primera comprobación del worker lo reconstruye entero desde la BD;
+después, como mucho cada ``REVOCATION_REFRESH_SECONDS``, se leen solo las
+filas con ``id`` mayor que la última vista.  Las entradas cuyo token ya
+caducó se podan del conjunto y, si hace falta, el filtro se regenera.
+"""
+from __future__ import annotations
+
+import calendar
+import hashlib
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+
+
+class BloomFilter:
+    """Filtro de Bloom de tamaño fijo sin borrado."""
+
+    def __init__(self, bits: int, hashes: int = 7):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode()).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], "big") % self.bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """Filtro de Bloom + conjunto exacto, refrescado de forma incremental."""
+
+    def __init__(self, bloom_bits: int, refresh_seconds: float):
+        self.bloom_bits = bloom_bits
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bloom = BloomFilter(self.bloom_bits)
+            self._exact: dict[str, float] = {}
+            self._last_id = 0
+            self._refreshed_at: float | None = None
+            self.bloom_negatives = 0
+            self.false_positives = 0
+
+    # ─────────────── comprobación (camino crítico) ───────────────
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        exp = self._exact.get(jti)
+        if exp is None:
+            self.false_positives += 1
+            return False
+        return exp > time.time()
+
+    # ─────────────────────── mantenimiento ───────────────────────
+
+    def add(self, jti: str, exp: float) -> None:
+        """Revocación local inmediata (el logout de este worker)."""
+        with self._lock:
+            self._exact[jti] = exp
+            self._bloom.add(jti)
+
+    def refresh_if_due(self, db: Session) -> None:
+        """
+        Lee las revocaciones nuevas si toca.  Nunca bloquea: si otro hilo
+        ya está refrescando, se sigue con el estado actual.
+        """
+        due = self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+        if not due or not self._lock.acquire(blocking=False):
+            return
+        try:
+            rows = crud.get_revoked_since(db, self._last_id)
+            for row_id, jti, expires_at in rows:
+                self._exact[jti] = calendar.timegm(expires_at.utctimetuple())
+                self._bloom.add(jti)
+                self._last_id = row_id
+            self._prune()
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [jti for jti, exp in self._exact.items() if exp <= now]
+        if not expired:
+            return
+        for jti in expired:
+            del self._exact[jti]
+        # el Bloom no admite borrados: se regenera con lo que sigue vigente
+        bloom = BloomFilter(self.bloom_bits)
+        for jti in self._exact:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._exact),
+            "last_id": self._last_id,
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+        }
+
+
+revocations = RevocationList(settings.REVOCATION_BLOOM_BITS, settings.REVOCATION_REFRESH_SECONDS)
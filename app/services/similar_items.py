@@ -0,0 +1,273 @@
+# app/services/similar_items.py
+"""
+Índice vectorial en memoria para «ítems similares».
+
+Cada ítem es una fila de tres bloques guardados como matrices NumPy:
+
+· texto: frecuencias de términos de nombre + descripción (normalizados como
+  en el autocompletado) proyectadas por *hashing* a ``SIMILAR_TEXT_DIM``
+  columnas; el IDF se aplica al consultar a partir de las frecuencias de
+  documento que se mantienen al escribir, así no hay que re-ponderar filas;
+· categorías: la categoría y sus antecesores (peso ½ por nivel), por
+  *hashing* a ``CATEGORY_DIM`` columnas y normalizado;
+· precio: ``log(price_per_h)``.
+
+La similitud es una combinación ponderada de coseno de texto, coseno de
+categorías y cercanía de precio, calculada para todas las filas a la vez y
+con ``argpartition`` para el top-k.
+
+Igual que el autocompletado, las escrituras de este worker se aplican al
+momento y las de otros se detectan por la versión ``item_content``
+(consultada como mucho cada ``SIMILAR_REFRESH_SECONDS``), que provoca una
+reconstrucción; los alquileres y la disponibilidad no la avanzan.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Item, item_categories
+from app.services.category_cache import Snapshot, categories
+from app.services.item_suggest import fold
+from app.services.write_versions import item_content_version
+
+CATEGORY_DIM = 64
+WEIGHTS = (0.6, 0.3, 0.1)        # texto, categorías, precio
+_TOKEN = re.compile(r"\w{2,}")
+_STATE = ("_ids", "_text", "_cats", "_logp", "_df", "_rows", "_n", "_norms")
+
+
+class ItemDoc(NamedTuple):
+    """Lo que el índice necesita de un ítem."""
+
+    name: str
+    description: Optional[str]
+    price_per_h: float
+    categories: tuple[int, ...]
+
+
+def _tokens(doc: ItemDoc) -> list[str]:
+    return _TOKEN.findall(fold(f"{doc.name} {doc.description or ''}"))
+
+
+class SimilarIndex:
+    """Matrices de rasgos por worker con top-k por coseno vectorizado."""
+
+    def __init__(self, refresh_seconds: float, text_dim: int):
+        self.refresh_seconds = refresh_seconds
+        self.text_dim = text_dim
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._version: int | None = None
+        self._checked_at: float | None = None
+        self.rebuilds = 0
+        self.applied = 0
+        self._reset(0)
+
+    def _reset(self, capacity: int) -> None:
+        capacity = max(capacity, 64)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._text = np.zeros((capacity, self.text_dim), dtype=np.float32)
+        self._cats = np.zeros((capacity, CATEGORY_DIM), dtype=np.float32)
+        self._logp = np.zeros(capacity, dtype=np.float32)
+        self._df = np.zeros(self.text_dim, dtype=np.float64)
+        self._rows: dict[int, int] = {}
+        self._n = 0
+        self._norms: np.ndarray | None = None   # ‖fila · idf‖, se invalida al escribir
+
+    # ─────────────────────────── vectorización ─────────────────────────────
+    def _vectorize(self, doc: ItemDoc, tree: Optional[Snapshot]):
+        text = np.zeros(self.text_dim, dtype=np.float32)
+        for token, count in Counter(_tokens(doc)).items():
+            text[zlib.crc32(token.encode()) % self.text_dim] += 1 + math.log(count)
+
+        cats = np.zeros(CATEGORY_DIM, dtype=np.float32)
+        for cat_id in doc.categories:
+            cats[cat_id % CATEGORY_DIM] += 1.0
+            for depth, ancestor in enumerate(tree.ancestors(cat_id) if tree else (), 1):
+                cats[ancestor % CATEGORY_DIM] += 0.5 ** depth
+        norm = np.linalg.norm(cats)
+        if norm:
+            cats /= norm
+        return text, cats, math.log(max(doc.price_per_h, 0.01))
+
+    # ──────────────────────────── Escritura ────────────────────────────────
+    def _put(self, item_id: int, doc: ItemDoc, tree: Optional[Snapshot]) -> None:
+        self._drop(item_id)
+        if self._n == len(self._ids):
+            self._grow()
+        text, cats, logp = self._vectorize(doc, tree)
+        row = self._n
+        self._ids[row], self._text[row], self._cats[row], self._logp[row] = item_id, text, cats, logp
+        self._df += text > 0
+        self._rows[item_id] = row
+        self._n += 1
+
+    def _drop(self, item_id: int) -> None:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        self._df -= self._text[row] > 0
+        last = self._n - 1
+        if row != last:   # la última fila ocupa el hueco
+            moved = int(self._ids[last])
+            self._ids[row], self._text[row] = self._ids[last], self._text[last]
+            self._cats[row], self._logp[row] = self._cats[last], self._logp[last]
+            self._rows[moved] = row
+        self._text[last] = 0
+        self._n = last
+
+    def _grow(self) -> None:
+        capacity = len(self._ids) * 2
+        self._ids = np.resize(self._ids, capacity)
+        for name in ("_text", "_cats"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+        self._logp = np.resize(self._logp, capacity)
+
+    def apply(
+        self,
+        version: int,
+        changes: Optional[Mapping[int, Optional[ItemDoc]]] = None,
+        tree: Optional[Snapshot] = None,
+    ) -> None:
+        """
+        Aplica tras el ``commit`` la escritura que produjo *version*
+        (*changes*: ``id → ItemDoc``, ``None`` si se borró).  Si el índice no
+        estaba en ``version - 1`` se deja y el próximo refresco lo reconstruye.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                return
+            for item_id, doc in (changes or {}).items():
+                if doc is None:
+                    self._drop(item_id)
+                else:
+                    self._put(item_id, doc, tree)
+            if changes:
+                self._norms = None
+            self._version = version
+            self.applied += 1
+
+    def refresh_if_due(self, db: Session) -> None:
+        """Reconstruye si la versión de contenido cambió (como mucho cada ``refresh_seconds``)."""
+        now = time.monotonic()
+        due = self._checked_at is None or now - self._checked_at >= self.refresh_seconds
+        if not due or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            version = item_content_version(db)
+            if version != self._version:
+                self.rebuild(db, version)
+            self._checked_at = now
+        finally:
+            self._refresh_lock.release()
+
+    def rebuild(self, db: Session, version: int) -> None:
+        tree = categories.snapshot(db)
+        cats: dict[int, list[int]] = {}
+        for item_id, cat_id in db.execute(
+            select(item_categories.c.item_id, item_categories.c.category_id)
+        ):
+            cats.setdefault(item_id, []).append(cat_id)
+        rows = db.execute(
+            select(Item.id, Item.name, Item.description, Item.price_per_h)
+        ).all()
+        fresh = SimilarIndex(self.refresh_seconds, self.text_dim)
+        fresh._reset(len(rows))
+        for item_id, name, description, price in rows:
+            fresh._put(item_id, ItemDoc(name, description, price, tuple(cats.get(item_id, ()))), tree)
+        with self._lock:   # se construye aparte y se sustituye de golpe
+            for attr in _STATE:
+                setattr(self, attr, getattr(fresh, attr))
+            self._version = version
+            self.rebuilds += 1
+
+    # ───────────────────────────── Lectura ─────────────────────────────────
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._rows
+
+    def similar(
+        self,
+        item_id: int,
+        k: int = 8,
+        doc: Optional[ItemDoc] = None,
+        tree: Optional[Snapshot] = None,
+    ) -> Optional[list[int]]:
+        """
+        Ids de los *k* ítems más parecidos a *item_id* (excluido él mismo).
+        Si el ítem aún no está indexado se usa *doc* para vectorizarlo; sin
+        *doc* devuelve ``None`` (comprobarlo y buscar bajo el mismo lock
+        evita la carrera con una baja concurrente).
+        """
+        with self._lock:
+            row = self._rows.get(item_id)
+            if row is None and doc is None:
+                return None
+            n = self._n
+            if n == 0:
+                return []
+            if row is not None:
+                q_text, q_cats, q_logp = self._text[row], self._cats[row], self._logp[row]
+            else:
+                q_text, q_cats, q_logp = self._vectorize(doc, tree)
+
+            idf = np.log((1 + n) / (1 + self._df)).astype(np.float32) + 1
+            idf2 = idf * idf
+            text = self._text[:n]
+            if self._norms is None:
+                self._norms = np.sqrt((text * text) @ idf2)
+            q_norm = math.sqrt(float((q_text * q_text) @ idf2)) or 1.0
+            cos_text = (text @ (q_text * idf2)) / (self._norms * q_norm + 1e-9)
+            cos_cats = self._cats[:n] @ q_cats
+            price = np.exp(-np.abs(self._logp[:n] - q_logp))
+
+            w_text, w_cats, w_price = WEIGHTS
+            score = w_text * cos_text + w_cats * cos_cats + w_price * price
+            if row is not None:
+                score[row] = -np.inf
+            ids = self._ids[:n]
+
+            k = min(k, n - (row is not None))
+            if k <= 0:
+                return []
+            top = np.argpartition(-score, k - 1)[:k]
+            top = top[np.argsort(-score[top], kind="stable")]
+            return [int(i) for i in ids[top]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(0)
+            self._version = self._checked_at = None
+
+    def stats(self) -> dict:
+        return {
+            "items": self._n,
+            "version": self._version,
+            "bytes": int(self._text.nbytes + self._cats.nbytes + self._ids.nbytes + self._logp.nbytes),
+            "rebuilds": self.rebuilds,
+            "applied": self.applied,
+        }
+
+
+def docs_from(items: Iterable) -> dict[int, ItemDoc]:
+    """``id → ItemDoc`` a partir de entidades ``Item`` con sus categorías."""
+    return {
+        it.id: ItemDoc(it.name, it.description, it.price_per_h, tuple(c.id for c in it.categories))
+        for it in items
+    }
+
+
+similar_items = SimilarIndex(settings.SIMILAR_REFRESH_SECONDS, settings.SIMILAR_TEXT_DIM)
@@ -0,0 +1,37 @@
+# app/services/write_versions.py
+"""
+Versiones de escritura (``write_versions``) para los índices en memoria.
+
+``app.crud`` importa estos servicios para avisarles de sus escrituras, así
+que ellos no pueden importar ``app.crud`` al cargarse: la importación se
+difiere a la primera llamada.
+"""
+from sqlalchemy.orm import Session
+
+
+def items_version(db: Session) -> int:
+    from app.crud.version import ITEMS, get_versions
+
+    (version,) = get_versions(db, ITEMS)
+    return version
+
+
+def item_categories_version(db: Session) -> int:
+    from app.crud.version import ITEM_CATEGORIES, get_versions
+
+    (version,) = get_versions(db, ITEM_CATEGORIES)
+    return version
+
+
+def item_content_version(db: Session) -> int:
+    from app.crud.version import ITEM_CONTENT, get_versions
+
+    (version,) = get_versions(db, ITEM_CONTENT)
+    return version
+
+
+def categories_version(db: Session) -> int:
+    from app.crud.version import CATEGORIES, get_versions
+
+    (version,) = get_versions(db, CATEGORIES)
+    return version
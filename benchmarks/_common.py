@@ -0,0 +1,94 @@
+# benchmarks/_common.py
+"""
+Utilidades compartidas por los benchmarks: BD SQLite temporal sembrada
+con ``N`` ítems (2 categorías y 2 imágenes cada uno) y cronometraje.
+
+Los scripts se ejecutan desde la raíz del repo:
+
+    python -m benchmarks.bench_listing
+"""
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.models import Category, Item, ItemImage, User, item_categories
+
+
+def make_engine(path: str | None = None):
+    """Engine SQLite en fichero (temporal si no se indica *path*)."""
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="bench-")
+        os.close(fd)
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+    )
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def seed(engine, n_items: int, n_categories: int = 20, batch: int = 5_000) -> None:
+    """Inserta *n_items* ítems con 2 categorías y 2 imágenes cada uno."""
+    rnd = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "username": "bench", "email": "b@e.nch", "hashed_pw": "x"}])
+        conn.execute(insert(Category), [{"id": c, "name": f"cat{c}"} for c in range(1, n_categories + 1)])
+        for start in range(1, n_items + 1, batch):
+            ids = range(start, min(start + batch, n_items + 1))
+            conn.execute(
+                insert(Item),
+                [
+                    {
+                        "id": i,
+                        "name": f"Item {i}",
+                        "description": f"Herramienta número {i}",
+                        "price_per_h": round(rnd.uniform(1, 100), 2),
+                        "image_url": f"http://img.example.com/{i}-0.png",
+                        "owner_id": 1,
+                        "available": rnd.random() > 0.2,
+                        "version": 1,
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                insert(item_categories),
+                [
+                    {"item_id": i, "category_id": c}
+                    for i in ids
+                    for c in rnd.sample(range(1, n_categories + 1), 2)
+                ],
+            )
+            conn.execute(
+                insert(ItemImage),
+                [{"item_id": i, "url": f"http://img.example.com/{i}-{k}.png"} for i in ids for k in range(2)],
+            )
+
+
+def dispose(engine) -> None:
+    """Cierra el engine y borra el fichero SQLite temporal."""
+    engine.dispose()
+    os.remove(engine.url.database)
+
+
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """Mediana en milisegundos de *repeat* ejecuciones de *fn*."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
@@ -0,0 +1,157 @@
+# benchmarks/bench_async.py
+"""
+Peticiones concurrentes por worker: ruta síncrona (``Session`` en el
+threadpool, como antes) frente a la asíncrona (``AsyncSession`` sobre
+aiosqlite, como ahora) para el detalle de un ítem.
+
+    python -m benchmarks.bench_async [CONCURRENCIA ...]   # por defecto 20 50 100 200
+
+Cada petición hace el trabajo de ``GET /api/items/{id}`` (versiones, ítem,
+serialización) más un ``SELECT sleep_ms(RTT_MS)`` que simula la ida y vuelta
+de red a un Postgres remoto: la función SQLite duerme en el hilo de la
+conexión, sin el GIL, igual que un driver esperando al socket.  Ambas rutas
+usan un pool de ``POOL_SIZE`` conexiones, así que el tope de la síncrona es
+el threadpool de AnyIO (40 hilos) y el de la asíncrona, el pool.
+
+Se mide el máximo de peticiones dentro del handler a la vez, el throughput
+y la latencia mediana, con clientes httpx en el mismo proceso (ASGI).
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.models.database import async_database_url
+
+from ._common import dispose, make_engine, seed, session_factory
+
+N_ITEMS = 10_000
+RTT_MS = 5
+POOL_SIZE = 200
+REQUESTS_PER_CLIENT = 20
+RTT = text("SELECT sleep_ms(:ms)")
+
+
+def _sleep_ms(ms: int) -> int:
+    time.sleep(ms / 1000)
+    return ms
+
+
+def _register_sleep(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, _record):
+        dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+
+class Gauge:
+    """Peticiones dentro del handler ahora mismo y el máximo alcanzado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def build_app(sync_engine, async_engine, gauge: Gauge) -> FastAPI:
+    SyncSession = session_factory(sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+    app = FastAPI()
+
+    def sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    @app.get("/sync/{item_id}")
+    def before(item_id: int, db: Session = Depends(sync_db)):
+        with gauge:
+            crud.get_versions(db, crud.ITEMS, crud.CATEGORIES)
+            db.execute(RTT, {"ms": RTT_MS})
+            return schemas.ItemOut.model_validate(crud.get_item(db, item_id))
+
+    @app.get("/async/{item_id}")
+    async def after(item_id: int, db: AsyncSession = Depends(async_db)):
+        with gauge:
+            await crud.aio.get_versions(db, crud.ITEMS, crud.CATEGORIES)
+            await db.execute(RTT, {"ms": RTT_MS})
+            item = await crud.aio.get_item(db, item_id)
+            return await crud.aio.dump(db, schemas.ItemOut, item)
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, concurrency: int) -> tuple[float, float]:
+    """``(peticiones/s, mediana ms)`` con *concurrency* clientes en bucle."""
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(offset: int) -> None:
+            for i in range(REQUESTS_PER_CLIENT):
+                item_id = (offset * REQUESTS_PER_CLIENT + i) % N_ITEMS + 1
+                t0 = time.perf_counter()
+                r = await client.get(f"{path}/{item_id}")
+                latencies.append((time.perf_counter() - t0) * 1000)
+                r.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(c) for c in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    return len(latencies) / elapsed, statistics.median(latencies)
+
+
+async def run(levels: list[int]) -> None:
+    seeded = make_engine()
+    seed(seeded, N_ITEMS)
+    seeded.dispose()
+    url = seeded.url.render_as_string()
+    # mismo tamaño de pool en ambas rutas: el límite es el modelo de ejecución
+    pool = {"pool_size": POOL_SIZE, "max_overflow": 0}
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool)
+    async_engine = create_async_engine(async_database_url(url), **pool)
+    _register_sleep(sync_engine)
+    _register_sleep(async_engine.sync_engine)
+
+    print(f"\n== {N_ITEMS} ítems · RTT simulado {RTT_MS} ms · pool {POOL_SIZE} ==")
+    print(f"{'clientes':>9} │ {'sync máx':>8}{'req/s':>8}{'p50 ms':>8} │ {'async máx':>9}{'req/s':>8}{'p50 ms':>8}")
+    for concurrency in levels:
+        row = []
+        for path in ("/sync", "/async"):
+            gauge = Gauge()
+            app = build_app(sync_engine, async_engine, gauge)
+            rps, p50 = await drive(app, path, concurrency)
+            row += [gauge.peak, rps, p50]
+        print(
+            f"{concurrency:>9} │ {row[0]:>8}{row[1]:>8.0f}{row[2]:>8.1f} │ {row[3]:>9}{row[4]:>8.0f}{row[5]:>8.1f}"
+        )
+
+    await async_engine.dispose()
+    dispose(sync_engine)
+
+
+if __name__ == "__main__":
+    levels = [int(a) for a in sys.argv[1:]] or [20, 50, 100, 200]
+    asyncio.run(run(levels))
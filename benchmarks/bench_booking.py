@@ -0,0 +1,83 @@
+# benchmarks/bench_booking.py
+"""
+Reservas por segundo con ``crud.create_rental`` atómico.
+
+    python -m benchmarks.bench_booking [THREADS] [BOOKINGS]
+
+· ``disjoint``: cada hilo reserva franjas distintas del mismo ítem (todas
+  deben entrar).
+· ``contended``: todos los hilos piden la misma franja en rondas (solo una
+  reserva por ronda debe entrar; el resto recibe 409).
+"""
+from __future__ import annotations
+
+import datetime
+import sys
+import threading
+import time
+
+from app import crud, schemas
+from app.models.models import Item, Rental, User
+
+from ._common import dispose, make_engine, session_factory
+
+
+def _setup():
+    engine = make_engine()
+    Session = session_factory(engine)
+    with Session() as db:
+        db.add(User(id=1, username="bench", email="b@e.nch", hashed_pw="x"))
+        db.add(Item(id=1, name="Hormigonera", price_per_h=10, owner_id=1))
+        db.commit()
+    return engine, Session
+
+
+def _run(threads: int, bookings: int, same_slot: bool) -> None:
+    engine, Session = _setup()
+    base = datetime.datetime(2030, 1, 1)
+    per_thread = bookings // threads
+    counts = {"ok": 0, "conflict": 0}
+    lock = threading.Lock()
+
+    def worker(tid: int):
+        ok = conflict = 0
+        with Session() as db:
+            for k in range(per_thread):
+                slot = k if same_slot else tid * per_thread + k
+                start = base + datetime.timedelta(hours=2 * slot)
+                rent_in = schemas.RentalCreate(
+                    item_id=1, start_at=start, end_at=start + datetime.timedelta(hours=1)
+                )
+                try:
+                    crud.create_rental(db, 1, rent_in)
+                    ok += 1
+                except crud.RentalConflict:
+                    conflict += 1
+        with lock:
+            counts["ok"] += ok
+            counts["conflict"] += conflict
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    with Session() as db:
+        stored = db.query(Rental).count()
+    label = "contended" if same_slot else "disjoint"
+    attempts = counts["ok"] + counts["conflict"]
+    print(
+        f"{label:<10} hilos={threads:<3} intentos={attempts:<6} ok={counts['ok']:<6} "
+        f"409={counts['conflict']:<6} guardadas={stored:<6} {attempts / elapsed:8.0f} reservas/s"
+    )
+    dispose(engine)
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    bookings = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    _run(threads, bookings, same_slot=False)
+    _run(threads, bookings, same_slot=True)
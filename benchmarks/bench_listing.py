@@ -0,0 +1,73 @@
+# benchmarks/bench_listing.py
+"""
+Listado de ítems: hidratación ORM con ``joinedload`` (ruta anterior) frente a
+la proyección ligera de ``crud.get_items`` (select de columnas + 2 consultas
+por lote + filas con ``__slots__``).
+
+    python -m benchmarks.bench_listing [N ...]      # por defecto 10000 100000
+
+Mide latencia mediana y pico de memoria (tracemalloc) de una página,
+incluyendo el COUNT, para distintos tamaños de página y profundidades.
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+
+from sqlalchemy.orm import joinedload
+
+from app import crud
+from app.models.models import Item
+
+from ._common import dispose, make_engine, seed, session_factory, timed
+
+
+def legacy_get_items(db, skip: int, limit: int):
+    """Réplica de la ruta previa (entidades ORM + joinedload + Query.count)."""
+    q = (
+        db.query(Item)
+        .options(joinedload(Item.categories), joinedload(Item.images))
+        .filter(Item.available == True)  # noqa: E712
+        .order_by(Item.price_per_h)
+    )
+    total = q.count()
+    return q.offset(skip).limit(limit).all(), total
+
+
+def lean_get_items(db, skip: int, limit: int):
+    return crud.get_items(db, skip=skip, limit=limit, available=True, order_by="price", order_dir="asc")
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def run(n_items: int) -> None:
+    engine = make_engine()
+    seed(engine, n_items)
+    Session = session_factory(engine)
+
+    print(f"\n== {n_items} ítems ==")
+    print(f"{'ruta':<8}{'limit':>7}{'skip':>8}{'ms (p50)':>11}{'pico KiB':>11}")
+    for limit in (100, 1000):
+        for skip in (0, n_items // 2):
+            for label, fn in (("orm", legacy_get_items), ("lean", lean_get_items)):
+                def call():
+                    with Session() as db:
+                        items, _ = fn(db, skip, limit)
+                        assert len(items) <= limit
+
+                ms = timed(call, repeat=10)
+                kib = peak_kib(call)
+                print(f"{label:<8}{limit:>7}{skip:>8}{ms:>11.2f}{kib:>11.0f}")
+    dispose(engine)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,98 @@
+# benchmarks/bench_login_storm.py
+"""
+Latencia de ``GET /api/items/`` durante una tormenta de logins.
+
+    python -m benchmarks.bench_login_storm [LOGINS] [LISTINGS]
+
+Compara bcrypt en el threadpool de anyio (``PASSWORD_HASH_WORKERS=0``, el
+comportamiento anterior) con el pool de procesos acotado.  Se lanzan
+*LOGINS* logins concurrentes y, a la vez, *LISTINGS* listados secuenciales;
+se informa de la mediana / p95 del listado y de cuántos logins recibieron
+503.
+"""
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.api import auth as auth_api
+from app.crud.user import _hash_password
+from app.deps import get_db
+from app.main import app
+from app.models.models import User
+from app.services.password_hasher import PasswordHasher
+
+from ._common import dispose, make_engine, seed, session_factory
+
+
+def _p95(samples: list[float]) -> float:
+    return sorted(samples)[int(len(samples) * 0.95) - 1]
+
+
+async def _listing_latencies(client: httpx.AsyncClient, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = await client.get("/api/items/", params={"limit": 20, "with_total": False})
+        r.raise_for_status()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+async def _login(client: httpx.AsyncClient) -> int:
+    r = await client.post("/api/auth/token", data={"username": "storm", "password": "pwd"})
+    return r.status_code
+
+
+async def _scenario(logins: int, listings: int) -> tuple[list[float], dict]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _listing_latencies(client, 5)                     # calentamiento
+        storm = [asyncio.create_task(_login(client)) for _ in range(logins)]
+        await asyncio.sleep(0.05)
+        samples = await _listing_latencies(client, listings)
+        codes = await asyncio.gather(*storm)
+    return samples, {code: codes.count(code) for code in set(codes)}
+
+
+def main(logins: int = 200, listings: int = 50) -> None:
+    engine = make_engine()
+    seed(engine, 2_000)
+    Session = session_factory(engine)
+    with Session() as db:
+        db.add(User(username="storm", email="s@t.orm", hashed_pw=_hash_password("pwd")))
+        db.commit()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        baseline, _ = asyncio.run(_scenario(0, listings))
+        print(f"sin logins        mediana={statistics.median(baseline):7.1f} ms  p95={_p95(baseline):7.1f} ms")
+        for label, hasher in (
+            ("threadpool", PasswordHasher(0, queue_size=10_000)),
+            ("process pool", PasswordHasher(None, queue_size=32)),
+        ):
+            auth_api.hasher = hasher
+            samples, codes = asyncio.run(_scenario(logins, listings))
+            print(
+                f"{label:<17} mediana={statistics.median(samples):7.1f} ms  p95={_p95(samples):7.1f} ms"
+                f"  logins={codes}  hash={hasher.stats()['hash_time']}"
+            )
+            hasher.shutdown()
+    finally:
+        app.dependency_overrides.clear()
+        dispose(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,42 @@
+# benchmarks/bench_similar.py
+"""
+Índice de ítems similares: tiempo de construcción, memoria y latencia del
+top-k (coseno vectorizado con NumPy sobre todas las filas).
+
+    python -m benchmarks.bench_similar [N ...]      # por defecto 10000 100000
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from app.core.config import settings
+from app.services.similar_items import SimilarIndex
+
+from ._common import dispose, make_engine, seed, session_factory, timed
+
+
+def run(n_items: int) -> None:
+    engine = make_engine()
+    seed(engine, n_items)
+    Session = session_factory(engine)
+
+    index = SimilarIndex(refresh_seconds=60, text_dim=settings.SIMILAR_TEXT_DIM)
+    with Session() as db:
+        t0 = time.perf_counter()
+        index.refresh_if_due(db)
+        build_ms = (time.perf_counter() - t0) * 1000
+    stats = index.stats()
+
+    print(f"\n== {n_items} ítems ==")
+    print(f"construcción: {build_ms:.0f} ms · matrices: {stats['bytes'] / 2**20:.1f} MiB")
+    for k in (8, 50):
+        ms = timed(lambda: index.similar(n_items // 2, k), repeat=50)
+        print(f"top-{k:<3} {ms:>8.2f} ms (p50)")
+    dispose(engine)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,51 @@
+# benchmarks/bench_suggest.py
+"""
+Autocompletado: listado con ``name=`` (ruta que usaba la caja de búsqueda en
+cada tecla) frente al índice de prefijos en memoria de ``/api/items/suggest``.
+
+    python -m benchmarks.bench_suggest [N ...]      # por defecto 10000 100000
+
+Mide la latencia mediana por consulta para varios prefijos, además del
+tiempo de construcción del índice.
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from app import crud
+from app.services.item_suggest import SuggestIndex
+
+from ._common import dispose, make_engine, seed, session_factory, timed
+
+PREFIXES = ("i", "item 1", "item 4242", "zzz")
+
+
+def run(n_items: int) -> None:
+    engine = make_engine()
+    seed(engine, n_items)
+    Session = session_factory(engine)
+
+    index = SuggestIndex(refresh_seconds=60)
+    with Session() as db:
+        t0 = time.perf_counter()
+        index.refresh_if_due(db)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"\n== {n_items} ítems (índice construido en {build_ms:.0f} ms) ==")
+    print(f"{'prefijo':<12}{'listado ms':>12}{'índice µs':>12}")
+    for prefix in PREFIXES:
+        def listing():
+            with Session() as db:
+                crud.get_items(db, limit=10, name=prefix, with_total=False)
+
+        listing_ms = timed(listing, repeat=10)
+        index_us = timed(lambda: index.suggest(prefix, 10), repeat=1_000) * 1000
+        print(f"{prefix!r:<12}{listing_ms:>12.2f}{index_us:>12.1f}")
+    dispose(engine)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,115 @@
+# benchmarks/bench_uploads.py
+"""
+Latencia de ``GET /api/items/`` con subidas de imágenes en paralelo.
+
+    python -m benchmarks.bench_uploads [UPLOADS] [MB]
+
+Compara el manejador anterior (``UploadFile`` + ``shutil.copyfileobj``
+síncrono dentro del ``async def``) con el actual (multipart incremental y
+escrituras en hilos).  Se lanzan *UPLOADS* subidas de *MB* MiB a la vez que
+una secuencia de listados.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+from fastapi import UploadFile
+
+from app.api import upload as upload_api
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.deps import get_db
+from app.main import app
+from app.models.models import User
+
+from ._common import dispose, make_engine, seed, session_factory
+
+PNG_HEAD = b"\x89PNG\r\n\x1a\n"
+
+
+async def _legacy_upload(file: UploadFile):
+    """Copia del manejador anterior, solo para comparar."""
+    path = os.path.join(upload_api.UPLOAD_DIR, f"{uuid.uuid4()}.png")
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return {"ok": True}
+
+
+app.post("/bench/legacy-upload")(_legacy_upload)
+
+
+def _p95(samples: list[float]) -> float:
+    return sorted(samples)[int(len(samples) * 0.95) - 1]
+
+
+async def _listings(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.get("/api/items/", params={"limit": 20, "with_total": False})
+        r.raise_for_status()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+async def _scenario(url: str | None, uploads: int, payload: bytes, auth: dict) -> tuple[list[float], float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        stop = asyncio.Event()
+        listing = asyncio.create_task(_listings(client, stop))
+        t0 = time.perf_counter()
+        if url:
+            responses = await asyncio.gather(
+                *(client.post(url, files={"file": ("x.png", payload, "image/png")}, headers=auth) for _ in range(uploads))
+            )
+            assert all(r.status_code < 300 for r in responses), responses[0].text
+        else:
+            await asyncio.sleep(1)
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        return await listing, elapsed
+
+
+def main(uploads: int = 8, mb: int = 8) -> None:
+    engine = make_engine()
+    seed(engine, 2_000)
+    Session = session_factory(engine)
+    with Session() as db:
+        user = db.get(User, 1)
+        auth = {"Authorization": f"Bearer {create_access_token(user.username, user.id)}"}
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    payload = PNG_HEAD + os.urandom(mb * 1024 * 1024 - len(PNG_HEAD))
+    settings.UPLOAD_MAX_BYTES = len(payload)
+    app.dependency_overrides[get_db] = override_get_db
+    upload_dir, upload_api.UPLOAD_DIR = upload_api.UPLOAD_DIR, tempfile.mkdtemp(prefix="bench-uploads-")
+    try:
+        for label, url in (("sin subidas", None), ("anterior", "/bench/legacy-upload"), ("streaming", "/api/upload/")):
+            samples, elapsed = asyncio.run(_scenario(url, uploads, payload, auth))
+            print(
+                f"{label:<12} listados={len(samples):4d}  mediana={statistics.median(samples):7.1f} ms"
+                f"  p95={_p95(samples):7.1f} ms  max={max(samples):7.1f} ms  subidas={elapsed:5.2f} s"
+            )
+    finally:
+        shutil.rmtree(upload_api.UPLOAD_DIR, ignore_errors=True)
+        upload_api.UPLOAD_DIR = upload_dir
+        app.dependency_overrides.clear()
+        dispose(engine)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -1,5 +1,7 @@
+import { useEffect, useState } from 'react';
 import { Disclosure } from '@headlessui/react';
 import useCategories, { Category } from '../../features/categories/useCategories';
+import { useSuggestions } from '../../features/items/useSuggestions';
 
 type Filters = {
   name?: string;
@@ -18,6 +20,16 @@ type Props = {
 export default function FiltersSidebar({ value, onChange, onReset }: Props) {
   const { data: cats } = useCategories();
 
+  /* el texto solo filtra el listado al confirmar (Enter / salir del campo);
+     mientras se escribe se piden sugerencias ligeras */
+  const [draft, setDraft] = useState(value.name ?? '');
+  const suggestions = useSuggestions(draft);
+  useEffect(() => setDraft(value.name ?? ''), [value.name]);
+  const commitName = () => {
+    const name = draft.trim() || undefined;
+    if (name !== value.name) onChange({ ...value, name });
+  };
+
   const toggleCat = (id: number) => {
     const list = new Set(value.categories ?? []);
     list.has(id) ? list.delete(id) : list.add(id);
@@ -30,9 +42,17 @@ export default function FiltersSidebar({ value, onChange, onReset }: Props) {
       <input
         placeholder="Buscar…"
         className="form-input w-full"
-        value={value.name ?? ''}
-        onChange={e => onChange({ ...value, name: e.target.value || undefined })}
+        list="item-suggestions"
+        value={draft}
+        onChange={e => setDraft(e.target.value)}
+        onKeyDown={e => e.key === 'Enter' && commitName()}
+        onBlur={commitName}
       />
+      <datalist id="item-suggestions">
+        {suggestions.map(s => (
+          <option key={s.id} value={s.name} />
+        ))}
+      </datalist>
 
       {/* Price */}
       <Disclosure defaultOpen>
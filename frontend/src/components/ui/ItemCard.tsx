@@ -13,8 +13,9 @@ import ItemDetailModal from "./ItemDetailModal";
 export default function ItemCard({ item }: { item: Item }) {
   const [open, setOpen] = useState(false);
 
-  /* -------- portada (1ª del array o la legacy) -------- */
-  const cover = item.image_urls?.[0] ?? item.image_url;
+  /* -------- portada (miniatura de la 1ª, la 1ª o la legacy) -------- */
+  const cover =
+    item.image_variants?.[0]?.thumb ?? item.image_urls?.[0] ?? item.image_url;
 
   const imgSrc = resolveImage(
     cover,
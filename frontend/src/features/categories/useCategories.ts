@@ -1,7 +1,7 @@
 import { useQuery } from "@tanstack/react-query";
 import { api } from "../../api";
 
-export type Category = { id: number; name: string };
+export type Category = { id: number; name: string; parent_id?: number | null };
 
 export default function useCategories() {
   const { data, isLoading } = useQuery<Category[]>({
@@ -12,6 +12,7 @@ import toast from 'react-hot-toast';
 import useCategories, { Category } from '../categories/useCategories';
 import { useAuth } from '../../hooks/useAuth';
 import { api } from '../../api';
+import { uploadImage } from './uploadImage';
 
 /* -------------------------------------------------------------------------- */
 /*                               schema + types                               */
@@ -85,20 +86,10 @@ export default function AddItemModal({ open, onClose, onCreated }: Props) {
     }
 
     try {
-      /* 1.- subimos imágenes (paralelo) */
+      /* 1.- subimos imágenes (paralelo, directo al almacenamiento) */
       let image_urls: string[] = [];
       if (data.images.length) {
-        const uploads = await Promise.all(
-          data.images.map(async img => {
-            const fd = new FormData();
-            fd.append('file', img);
-            const r = await api.post<{ url: string }>('/upload/', fd, {
-              headers: { 'Content-Type': 'multipart/form-data' }
-            });
-            return r.data.url;
-          })
-        );
-        image_urls = uploads;
+        image_urls = await Promise.all(data.images.map(uploadImage));
       }
 
       /* 2.- creamos ítem */
@@ -0,0 +1,49 @@
+/* -------------------------------------------------------------------------- */
+/*  src/features/items/uploadImage.ts                                         */
+/* -------------------------------------------------------------------------- */
+import { api } from "../../api";
+
+type Presign = {
+  key: string;
+  upload: { url: string; method: string; headers: Record<string, string> } | null;
+};
+
+async function sha256Hex(file: File): Promise<string> {
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("");
+}
+
+/**
+ * Sube una imagen directamente al almacenamiento (URL prefirmada) y
+ * devuelve su URL pública.  Sin WebCrypto (HTTP sin TLS) cae al multipart
+ * clásico a través de la API.
+ */
+export async function uploadImage(file: File): Promise<string> {
+  if (!globalThis.crypto?.subtle) {
+    const fd = new FormData();
+    fd.append("file", file);
+    const r = await api.post<{ url: string }>("/upload/", fd, {
+      headers: { "Content-Type": "multipart/form-data" }
+    });
+    return r.data.url;
+  }
+
+  const { data } = await api.post<Presign>("/upload/presign", {
+    content_type: file.type,
+    size: file.size,
+    sha256: await sha256Hex(file)
+  });
+
+  /* ya existe ese contenido → no hay nada que subir */
+  if (data.upload) {
+    const put = await fetch(data.upload.url, {
+      method: data.upload.method,
+      headers: data.upload.headers,
+      body: file
+    });
+    if (!put.ok) throw new Error(`Subida rechazada (${put.status})`);
+  }
+
+  const r = await api.post<{ url: string }>("/upload/complete", { key: data.key });
+  return r.data.url;
+}
@@ -13,6 +13,8 @@ export type Item = {
   image_url?: string;
   /** varias (nuevo)   */
   image_urls?: string[];
+  /** por imagen: variante (thumb, medium, thumb_avif) → URL */
+  image_variants?: Record<string, string>[];
 
   categories?: { id: number; name: string }[];
 };
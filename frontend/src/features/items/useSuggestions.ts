@@ -0,0 +1,20 @@
+import { useQuery } from "@tanstack/react-query";
+import { api } from "../../api";
+
+export type Suggestion = { id: number; name: string };
+
+/** Autocompletado de nombres (índice de prefijos del backend). */
+export function useSuggestions(q: string, limit = 8) {
+  const term = q.trim();
+  const { data } = useQuery<Suggestion[]>({
+    queryKey: ["items-suggest", term, limit],
+    queryFn: () =>
+      api
+        .get<Suggestion[]>("/items/suggest", { params: { q: term, limit } })
+        .then(r => r.data),
+    enabled: term.length > 0,
+    staleTime: 30_000
+  });
+
+  return term ? data ?? [] : [];
+}
@@ -2,31 +2,44 @@
 Fixtures de prueba para FastAPI.
 
 Para evitar colisiones entre tests, cada test recibe su propia base SQLite
-en memoria.  Usamos un StaticPool para que todas las peticiones que se
-ejecutan dentro del mismo test compartan la misma conexión.
+en un fichero temporal: el test la usa con una sesión síncrona y la app,
+como en producción, con ``AsyncSession`` sobre aiosqlite.
 """
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.models.database import Base
-from app.deps import get_db
+from app.models.database import Base, async_database_url
+from app.deps import get_async_db, get_db
+from app.services.category_cache import categories
+from app.services.category_index import category_index
+from app.services.item_fragments import fragments
+from app.services.item_suggest import suggestions
+from app.services.similar_items import similar_items
+from app.services.principal_cache import principals
+from app.services.revocation import revocations
 
 
 @pytest.fixture()
-def db():
+def database_url(tmp_path_factory):
+    # directorio propio: algunos tests inspeccionan tmp_path
+    return f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+
+
+@pytest.fixture()
+def db(database_url):
     """
-    Crea una base de datos SQLite en memoria exclusiva para el test
-    y devuelve una sesión SQLAlchemy conectada a ella.
+    Crea una base de datos SQLite exclusiva para el test y devuelve una
+    sesión SQLAlchemy (síncrona) conectada a ella.
     """
     engine = create_engine(
-        "sqlite://",
+        database_url,
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,           # <<— comparte conexión en el test
     )
     Base.metadata.create_all(bind=engine)
 
@@ -41,14 +54,23 @@ def db():
         yield session
     finally:
         session.close()
+        engine.dispose()
 
 
 @pytest.fixture()
-def client(db):
+def client(db, database_url):
     """
-    Devuelve un TestClient que usa la sesión `db` anterior para todas
-    las dependencias `get_db` dentro de la app.
+    Devuelve un TestClient cuyas dependencias `get_async_db` abren una
+    ``AsyncSession`` (aiosqlite) sobre la misma base que `db`, y `get_db`
+    reutiliza la propia sesión `db`.
     """
+    # NullPool: las conexiones aiosqlite no sobreviven al event loop del TestClient
+    engine = create_async_engine(async_database_url(database_url), poolclass=NullPool)
+    TestingAsyncSession = async_sessionmaker(engine, autoflush=False)
+
+    async def override_get_async_db():
+        async with TestingAsyncSession() as session:
+            yield session
 
     def override_get_db():
         try:
@@ -56,8 +78,18 @@ def client(db):
         finally:
             pass
 
-    # Sobrescribimos la dependencia
+    # Sobrescribimos las dependencias
+    app.dependency_overrides[get_async_db] = override_get_async_db
     app.dependency_overrides[get_db] = override_get_db
 
+    # las cachés en memoria son por proceso y cada test usa una BD nueva
+    fragments.clear()
+    categories.clear()
+    category_index.clear()
+    suggestions.clear()
+    similar_items.clear()
+    principals.clear()
+    revocations.clear()
+
     with TestClient(app) as c:
         yield c
@@ -1,6 +1,7 @@
 import datetime
 from urllib.parse import parse_qs, urlparse
 
+import pytest
 from fastapi import status
 
 
@@ -39,6 +40,78 @@ def test_signup_login(client):
     assert token, "No se devolvió access_token"
 
 
+def test_login_rejected_with_503_when_hasher_saturated(client, monkeypatch):
+    from app.services.password_hasher import hasher
+
+    _signup(client, "carol", "carol@example.com", "pwd")
+    wrong = client.post("/api/auth/token", data={"username": "carol", "password": "nope"})
+    assert wrong.status_code == status.HTTP_401_UNAUTHORIZED
+
+    rejected = hasher.rejected
+    monkeypatch.setattr(hasher, "capacity", 0)
+    monkeypatch.setattr(hasher, "_in_flight", 1)
+    r = client.post("/api/auth/token", data={"username": "carol", "password": "pwd"})
+    assert r.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert r.headers["Retry-After"] == "1"
+    monkeypatch.undo()
+
+    metrics = client.get("/api/metrics/").json()["password_hasher"]
+    assert metrics["rejected"] == rejected + 1
+    assert metrics["hash_time"]["count"] >= 2
+    assert _login(client, "carol", "pwd")
+
+
+def test_principal_cache_hits_and_user_invalidation(client, db):
+    from jose import jwt
+
+    from app.core.config import settings
+    from app.models.models import User
+
+    _signup(client, "dave", "dave@example.com", "pwd")
+    token = _login(client, "dave", "pwd")
+    assert jwt.get_unverified_claims(token)["uid"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    before = client.get("/api/metrics/").json()["principal_cache"]
+    assert client.get("/api/items/me", headers=auth).status_code == 200
+    assert client.get("/api/items/me", headers=auth).status_code == 200
+    after = client.get("/api/metrics/").json()["principal_cache"]
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    # renombrar al usuario invalida su principal: el token (sub=dave) deja de valer
+    user = db.query(User).filter_by(username="dave").one()
+    user.username = "david"
+    db.commit()
+    assert client.get("/api/items/me", headers=auth).status_code == 401
+
+    db.delete(user)
+    db.commit()
+    legacy = jwt.encode({"sub": "david"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    r = client.get("/api/items/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert r.status_code == 401
+
+
+def test_logout_revokes_token_across_workers(client, db):
+    from app.models.models import RevokedToken
+    from app.services.revocation import revocations
+
+    _signup(client, "erin", "erin@example.com", "pwd")
+    auth = {"Authorization": f"Bearer {_login(client, 'erin', 'pwd')}"}
+    other = {"Authorization": f"Bearer {_login(client, 'erin', 'pwd')}"}
+    assert client.get("/api/items/me", headers=auth).status_code == 200
+
+    assert client.post("/api/auth/logout", headers=auth).status_code == 204
+    assert client.get("/api/items/me", headers=auth).status_code == 401
+    assert client.get("/api/items/me", headers=other).status_code == 200
+    assert db.query(RevokedToken).count() == 1
+
+    # otro worker: arranca vacío y reconstruye el filtro desde la BD
+    revocations.clear()
+    assert client.get("/api/items/me", headers=auth).status_code == 401
+    assert revocations.stats()["revoked"] == 1
+
+
 # ---------------------------------------------------------------------------
 # items + rentals flow
 # ---------------------------------------------------------------------------
@@ -169,3 +242,1018 @@ def test_items_pagination_headers(client):
     assert r2.status_code == 200
     assert len(r2.json()) == 1
     assert 'rel="prev"' in r2.headers.get("Link", "")
+
+
+# ---------------------------------------------------------------------------
+# paginación por cursor (keyset)
+# ---------------------------------------------------------------------------
+
+def _auth(client, username):
+    _signup(client, username, f"{username}@example.com", "pwd")
+    return {"Authorization": f"Bearer {_login(client, username, 'pwd')}"}
+
+
+def _create_item(client, auth, **fields):
+    payload = {"image_urls": ["http://img.example.com/a.png"], **fields}
+    r = client.post("/api/items/", json=payload, headers=auth)
+    assert r.status_code == status.HTTP_201_CREATED, r.text
+    return r.json()
+
+
+def test_items_cursor_pagination(client):
+    """Recorre todas las páginas siguiendo Link rel=next sin X-Total-Count."""
+    auth = _auth(client, "cur")
+    # precios repetidos para forzar el desempate por id
+    for i, price in enumerate([3, 1, 2, 2, 1]):
+        _create_item(client, auth, name=f"Item{i}", price_per_h=price)
+
+    url = "/api/items/?cursor=&limit=2&order_by=price&order_dir=asc"
+    seen = []
+    while url:
+        r = client.get(url)
+        assert r.status_code == 200
+        assert "X-Total-Count" not in r.headers
+        seen.extend((it["price_per_h"], it["id"]) for it in r.json())
+        link = r.headers.get("Link")
+        url = link.split(";")[0].strip("<>") if link else None
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+    # un cursor de otra ordenación se rechaza
+    r = client.get("/api/items/?cursor=&limit=2&order_by=price&order_dir=asc")
+    next_url = r.headers["Link"].split(";")[0].strip("<>")
+    cursor = parse_qs(urlparse(next_url).query)["cursor"][0]
+    r = client.get(f"/api/items/?cursor={cursor}&order_by=name")
+    assert r.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# búsqueda full-text
+# ---------------------------------------------------------------------------
+
+def test_items_fulltext_search_and_relevance(client):
+    auth = _auth(client, "fts")
+    drill = _create_item(client, auth, name="Taladro percutor", description="Bosch 800 W", price_per_h=4)
+    saw = _create_item(client, auth, name="Sierra", description="Para taladro no sirve", price_per_h=3)
+    _create_item(client, auth, name="Martillo", description="mango madera", price_per_h=2)
+
+    # prefijo + sin acentos, sobre nombre y descripción
+    r = client.get("/api/items/?name=tala&order_by=relevance")
+    assert r.status_code == 200
+    assert [it["id"] for it in r.json()] == [drill["id"], saw["id"]]
+
+    # las actualizaciones mantienen el índice al día
+    client.patch(f"/api/items/{saw['id']}", json={"description": "madera"}, headers=auth)
+    r = client.get("/api/items/?name=taladro")
+    assert [it["id"] for it in r.json()] == [drill["id"]]
+
+    client.delete(f"/api/items/{drill['id']}", headers=auth)
+    assert client.get("/api/items/?name=taladro").json() == []
+
+
+# ---------------------------------------------------------------------------
+# autocompletado (índice de prefijos)
+# ---------------------------------------------------------------------------
+
+def test_items_suggest_prefix_index(client, db, monkeypatch):
+    from app.crud.version import ITEM_CONTENT, ITEMS, bump_version
+    from app.models.models import Item
+    from app.services.item_suggest import suggestions
+
+    auth = _auth(client, "sug")
+    drill = _create_item(client, auth, name="Taladro percutor", price_per_h=4)
+    _create_item(client, auth, name="Cortacésped", price_per_h=15)
+    saw = _create_item(client, auth, name="Tabla de surf", price_per_h=9)
+
+    def suggest(q, **params):
+        r = client.get("/api/items/suggest", params={"q": q, **params})
+        assert r.status_code == 200, r.text
+        return [s["name"] for s in r.json()]
+
+    assert suggest("ta") == ["Tabla de surf", "Taladro percutor"]
+    assert suggest("ta", limit=1) == ["Tabla de surf"]
+    assert suggest("CORTACES") == ["Cortacésped"]
+    assert suggest("perc") == ["Taladro percutor"]           # prefijo de palabra
+    assert suggest("xyz") == []
+    assert client.get("/api/items/suggest?q=").status_code == 422
+
+    # las escrituras de este worker se aplican sin reconstruir
+    rebuilds = suggestions.rebuilds
+    client.patch(f"/api/items/{drill['id']}", json={"name": "Martillo"}, headers=auth)
+    client.delete(f"/api/items/{saw['id']}", headers=auth)
+    assert suggest("ta") == []
+    assert suggest("mart") == ["Martillo"]
+    assert suggestions.rebuilds == rebuilds
+
+    # un alquiler (u otra escritura sin cambios de contenido) no reconstruye
+    monkeypatch.setattr(suggestions, "refresh_seconds", 0)
+    bump_version(db, ITEMS)
+    db.commit()
+    assert suggest("mart") == ["Martillo"]
+    assert suggestions.rebuilds == rebuilds
+
+    # alta hecha por "otro worker": se ve al vencer el intervalo de refresco
+    db.add(Item(name="Tienda", price_per_h=3, owner_id=1, image_url="http://img.example.com/a.png"))
+    bump_version(db, ITEMS)
+    bump_version(db, ITEM_CONTENT)
+    db.commit()
+    assert suggest("tie") == ["Tienda"]
+    assert suggestions.rebuilds == rebuilds + 1
+
+
+# ---------------------------------------------------------------------------
+# ítems similares (índice vectorial)
+# ---------------------------------------------------------------------------
+
+def test_similar_items_from_vector_index(client, db, monkeypatch):
+    from app.crud.version import ITEM_CONTENT, ITEMS, bump_version
+    from app.models.models import Item
+    from app.services.similar_items import similar_items
+
+    auth = _auth(client, "sim")
+    tools = client.post("/api/categories/", json={"name": "Herramientas"}).json()["id"]
+    drills = client.post("/api/categories/", json={"name": "Taladros", "parent_id": tools}).json()["id"]
+    camping = client.post("/api/categories/", json={"name": "Acampada"}).json()["id"]
+
+    drill = _create_item(client, auth, name="Taladro percutor", description="Taladro con percutor 800W",
+                         price_per_h=6, categories=[drills])
+    cordless = _create_item(client, auth, name="Taladro inalámbrico", description="Taladro a batería",
+                            price_per_h=5, categories=[drills])
+    sander = _create_item(client, auth, name="Lijadora", description="Lijadora orbital",
+                          price_per_h=4, categories=[tools])
+    tent = _create_item(client, auth, name="Tienda de campaña", description="Para 4 personas",
+                        price_per_h=20, categories=[camping])
+
+    def similar(item_id, **params):
+        r = client.get(f"/api/items/{item_id}/similar", params=params)
+        assert r.status_code == 200, r.text
+        return [it["id"] for it in r.json()]
+
+    assert similar(drill["id"]) == [cordless["id"], sander["id"], tent["id"]]
+    assert similar(drill["id"], limit=1) == [cordless["id"]]
+    assert client.get("/api/items/999/similar").status_code == 404
+
+    client.delete(f"/api/items/{cordless['id']}", headers=auth)
+    assert similar(drill["id"])[0] == sander["id"]
+
+    # alquileres / disponibilidad (solo ``items``): sin reconstrucción
+    rebuilds = similar_items.rebuilds
+    monkeypatch.setattr(similar_items, "refresh_seconds", 0)
+    bump_version(db, ITEMS)
+    db.commit()
+    assert similar(drill["id"])[0] == sander["id"]
+    assert similar_items.rebuilds == rebuilds
+    monkeypatch.setattr(similar_items, "refresh_seconds", 3600)
+
+    # alta de "otro worker" aún no indexada: se vectoriza a partir de la fila
+    other = Item(name="Taladro de columna", description="Taladro fijo", price_per_h=7,
+                 owner_id=1, image_url="http://img.example.com/a.png")
+    db.add(other)
+    bump_version(db, ITEMS)
+    bump_version(db, ITEM_CONTENT)
+    db.commit()
+    assert other.id not in similar_items
+    assert similar(other.id)[0] == drill["id"]
+
+    # baja concurrente entre la comprobación y la búsqueda: sin KeyError / 500
+    assert similar_items.similar(other.id) is None
+    monkeypatch.setattr(type(similar_items), "__contains__", lambda self, item_id: True)
+    assert similar(other.id)[0] == drill["id"]
+
+
+# ---------------------------------------------------------------------------
+# facetas
+# ---------------------------------------------------------------------------
+
+def test_item_facets(client):
+    auth = _auth(client, "fac")
+    tools = client.post("/api/categories/", json={"name": "Herramientas"}).json()["id"]
+    garden = client.post("/api/categories/", json={"name": "Jardín"}).json()["id"]
+
+    _create_item(client, auth, name="Taladro", price_per_h=4, categories=[tools])
+    _create_item(client, auth, name="Sierra", price_per_h=12, categories=[tools])
+    _create_item(client, auth, name="Cortacésped", price_per_h=15, categories=[tools, garden])
+
+    r = client.get(f"/api/items/facets?categories={garden}&price_bucket=10")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total"] == 1
+    assert data["availability"] == {"available": 1, "unavailable": 0}
+    assert data["price"] == [{"min": 10.0, "max": 20.0, "count": 1}]
+    # la faceta de categorías ignora su propio filtro
+    assert {c["id"]: c["count"] for c in data["categories"]} == {tools: 3, garden: 1}
+
+
+# ---------------------------------------------------------------------------
+# filtro por categorías (índice de bits)
+# ---------------------------------------------------------------------------
+
+def test_items_category_modes_with_bitmap_index(client, db, monkeypatch):
+    from app.core.config import settings
+    from app.crud.version import ITEM_CATEGORIES, ITEMS, bump_version
+    from app.models.models import item_categories
+    from app.services.category_index import category_index
+
+    auth = _auth(client, "bits")
+    tools = client.post("/api/categories/", json={"name": "Herramientas"}).json()["id"]
+    garden = client.post("/api/categories/", json={"name": "Jardín"}).json()["id"]
+    drill = _create_item(client, auth, name="Taladro", price_per_h=4, categories=[tools])
+    mower = _create_item(client, auth, name="Cortacésped", price_per_h=15, categories=[tools, garden])
+    rake = _create_item(client, auth, name="Rastrillo", price_per_h=2, categories=[garden])
+    _create_item(client, auth, name="Tienda", price_per_h=9)
+
+    def names(query):
+        r = client.get(f"/api/items/?order_by=name&order_dir=asc&{query}")
+        assert r.status_code == 200, r.text
+        return [it["name"] for it in r.json()]
+
+    both = f"categories={tools}&categories={garden}"
+    assert names(both) == ["Cortacésped", "Rastrillo", "Taladro"]
+    assert names(f"{both}&category_mode=all") == ["Cortacésped"]
+    assert names(f"categories={tools}&exclude_categories={garden}") == ["Taladro"]
+    assert names(f"exclude_categories={tools}") == ["Rastrillo", "Tienda"]
+    assert client.get("/api/items/?category_mode=some").status_code == 422
+
+    # las escrituras de este worker actualizan el índice sin reconstruirlo
+    rebuilds = category_index.rebuilds
+    client.patch(f"/api/items/{drill['id']}", json={"categories": [garden]}, headers=auth)
+    client.delete(f"/api/items/{rake['id']}", headers=auth)
+    assert names(f"categories={garden}") == ["Cortacésped", "Taladro"]
+    assert category_index.rebuilds == rebuilds
+
+    # escrituras que no tocan categorías (precio, alquiler en otro worker…)
+    client.patch(f"/api/items/{mower['id']}", json={"price_per_h": 16}, headers=auth)
+    bump_version(db, ITEMS)
+    db.commit()
+    assert names(f"categories={garden}") == ["Cortacésped", "Taladro"]
+    assert category_index.rebuilds == rebuilds
+
+    # cambio hecho por "otro worker": solo se entera por la versión
+    db.execute(item_categories.delete().where(item_categories.c.item_id == mower["id"]))
+    bump_version(db, ITEM_CATEGORIES)
+    db.commit()
+    assert names(f"categories={garden}") == ["Taladro"]
+    assert category_index.rebuilds == rebuilds + 1
+
+    # conjuntos grandes → EXISTS en SQL con el mismo resultado
+    monkeypatch.setattr(settings, "CATEGORY_INDEX_MAX_IDS", 0)
+    assert names(f"categories={tools}&categories={garden}&category_mode=all") == []
+    assert names(f"exclude_categories={garden}") == ["Cortacésped", "Tienda"]
+
+
+def test_category_bitmap_chunks_follow_populated_ids():
+    from app.services.category_index import EMPTY
+
+    sparse = EMPTY.with_id(3, True).with_id(10**9, True).with_id(10**9 + 1, True)
+    assert len(sparse.chunks) == 2                 # no 10⁹ bits: dos trozos de 2¹⁶
+    other = EMPTY.with_id(10**9, True).with_id(7, True)
+    assert list(sparse & other) == [10**9]
+    assert list(sparse | other) == [3, 7, 10**9, 10**9 + 1]
+    assert list(sparse - other) == [3, 10**9 + 1]
+    assert (sparse - sparse).chunks == {} and sparse.bit_count() == 3
+    assert sparse.with_id(3, True) is sparse
+
+
+def test_category_tree_and_subtree_filter(client, monkeypatch):
+    from app.core.config import settings
+
+    auth = _auth(client, "tree")
+
+    def cat(name, parent=None):
+        r = client.post("/api/categories/", json={"name": name, "parent_id": parent})
+        assert r.status_code == status.HTTP_201_CREATED, r.text
+        return r.json()["id"]
+
+    power = cat("Eléctricas")
+    drills = cat("Taladros", power)
+    hammer = cat("Percutores", drills)
+    garden = cat("Jardín")
+    assert client.post("/api/categories/", json={"name": "X", "parent_id": 999}).status_code == 400
+
+    tree = client.get("/api/categories/?tree=true").json()
+    assert [n["name"] for n in tree] == ["Eléctricas", "Jardín"]
+    assert tree[0]["children"][0]["name"] == "Taladros"
+    assert tree[0]["children"][0]["children"] == [
+        {"id": hammer, "name": "Percutores", "parent_id": drills, "children": []}
+    ]
+
+    _create_item(client, auth, name="Percutor", price_per_h=8, categories=[hammer])
+    _create_item(client, auth, name="Taladro", price_per_h=5, categories=[drills, garden])
+    _create_item(client, auth, name="Amoladora", price_per_h=6, categories=[power])
+
+    def names(query):
+        return sorted(it["name"] for it in client.get(f"/api/items/?{query}").json())
+
+    for limit in (settings.CATEGORY_INDEX_MAX_IDS, 0):  # índice en memoria y EXISTS en SQL
+        monkeypatch.setattr(settings, "CATEGORY_INDEX_MAX_IDS", limit)
+        assert names(f"categories={power}") == ["Amoladora", "Percutor", "Taladro"]
+        assert names(f"categories={drills}") == ["Percutor", "Taladro"]
+        assert names(f"categories={drills}&categories={garden}&category_mode=all") == ["Taladro"]
+        assert names(f"categories={power}&exclude_categories={drills}") == ["Amoladora"]
+
+    facets = client.get("/api/items/facets").json()["categories"]
+    assert {c["id"]: c["count"] for c in facets} == {power: 3, drills: 2, hammer: 1, garden: 1}
+
+
+# ---------------------------------------------------------------------------
+# ETag / GET condicional
+# ---------------------------------------------------------------------------
+
+def test_items_etag_and_detail(client):
+    auth = _auth(client, "etag")
+    item = _create_item(client, auth, name="Taladro", price_per_h=4)
+
+    r = client.get("/api/items/?limit=10")
+    etag = r.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in r.headers["Cache-Control"]
+
+    r = client.get("/api/items/?limit=10", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+
+    # otra query string → otro ETag
+    assert client.get("/api/items/?limit=5").headers["ETag"] != etag
+
+    # detalle
+    r = client.get(f"/api/items/{item['id']}")
+    assert r.status_code == 200
+    assert r.json()["name"] == "Taladro"
+    detail_etag = r.headers["ETag"]
+    assert client.get(f"/api/items/{item['id']}", headers={"If-None-Match": detail_etag}).status_code == 304
+    assert client.get("/api/items/999999").status_code == 404
+
+    # una escritura invalida los ETags
+    client.patch(f"/api/items/{item['id']}", json={"price_per_h": 5}, headers=auth)
+    r = client.get("/api/items/?limit=10", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()[0]["price_per_h"] == 5
+    assert client.get(f"/api/items/{item['id']}", headers={"If-None-Match": detail_etag}).status_code == 200
+
+
+def test_items_etag_expires_with_availability_window(client, monkeypatch):
+    from app.core import http_cache
+
+    _auth(client, "franja")
+    now = [1_000_000_005.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+
+    url = "/api/items/?available_to=2100-01-01T00:00:00"
+    r = client.get(url)
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "public, max-age=15"
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    # sin filtros de disponibilidad el ETag no depende de la hora
+    plain = client.get("/api/items/").headers
+
+    now[0] += 30  # siguiente franja: una reserva puede haber empezado
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/items/").headers["ETag"] == plain["ETag"]
+    assert plain["Cache-Control"] == "public, max-age=30"
+
+
+# ---------------------------------------------------------------------------
+# caché de categorías
+# ---------------------------------------------------------------------------
+
+def test_category_cache_follows_write_version(client, db):
+    from app.crud.version import CATEGORIES, bump_version
+    from app.models.models import Category
+    from app.services.category_cache import categories
+
+    auth = _auth(client, "catcache")
+    tools = client.post("/api/categories/", json={"name": "Herramientas"}).json()["id"]
+    assert [c["name"] for c in client.get("/api/categories/").json()] == ["Herramientas"]
+    hits = categories.hits
+    _create_item(client, auth, name="Taladro", price_per_h=4, categories=[tools, tools])
+    assert categories.hits > hits
+
+    # alta hecha por "otro worker": no toca la caché de este, solo la versión
+    db.add(Category(name="Acampada"))
+    bump_version(db, CATEGORIES)
+    db.commit()
+    camping = db.query(Category).filter_by(name="Acampada").one().id
+
+    assert [c["name"] for c in client.get("/api/categories/").json()] == ["Acampada", "Herramientas"]
+    item = _create_item(client, auth, name="Tienda", price_per_h=9, categories=[camping])
+    assert [c["name"] for c in item["categories"]] == ["Acampada"]
+
+    r = client.post("/api/items/", json={"name": "X", "price_per_h": 1, "categories": [999],
+                                         "image_urls": ["http://img.example.com/a.png"]}, headers=auth)
+    assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ---------------------------------------------------------------------------
+# caché de fragmentos ItemOut
+# ---------------------------------------------------------------------------
+
+def test_item_fragment_cache_invalidation(client, db):
+    from app.crud.version import ITEMS, get_versions, bump_version
+    from app.api.items import FRAGMENT_SCOPES
+    from app.models.models import Item
+    from app.services.item_fragments import fragments
+
+    auth = _auth(client, "frag")
+    item = _create_item(client, auth, name="Taladro", price_per_h=4)
+
+    first = client.get("/api/items/").json()
+    hits = fragments.hits
+    assert client.get("/api/items/").json() == first
+    assert fragments.hits > hits
+
+    # update_item cambia la versión de fila → fragmento nuevo
+    client.patch(f"/api/items/{item['id']}", json={"name": "Taladro PRO"}, headers=auth)
+    assert client.get("/api/items/").json()[0]["name"] == "Taladro PRO"
+    assert client.get("/api/items/me", headers=auth).json()[0]["name"] == "Taladro PRO"
+
+    # baja y alta en "otro worker": el id no se reutiliza (AUTOINCREMENT), así
+    # que el alta no hereda el fragmento cacheado del borrado
+    hammer = _create_item(client, auth, name="Martillo", price_per_h=2)
+    assert len(client.get("/api/items/").json()) == 2          # fragmento cacheado
+    shared = get_versions(db, *FRAGMENT_SCOPES)
+    db.query(Item).filter_by(id=hammer["id"]).delete()
+    bump_version(db, ITEMS)
+    fresh = Item(name="Sierra", price_per_h=3, owner_id=1, image_url="http://img.example.com/a.png")
+    db.add(fresh)
+    bump_version(db, ITEMS)
+    db.commit()
+    assert fresh.id > hammer["id"] and fresh.version == 1
+    assert {it["name"] for it in client.get("/api/items/").json()} == {"Taladro PRO", "Sierra"}
+
+    # borrar no invalida los fragmentos del resto de ítems
+    client.delete(f"/api/items/{fresh.id}", headers=auth)
+    assert get_versions(db, *FRAGMENT_SCOPES) == shared
+    hits = fragments.hits
+    assert [it["name"] for it in client.get("/api/items/").json()] == ["Taladro PRO"]
+    assert fragments.hits > hits
+
+
+# ---------------------------------------------------------------------------
+# disponibilidad por franja horaria
+# ---------------------------------------------------------------------------
+
+def test_items_available_time_window(client):
+    auth = _auth(client, "win")
+    renter = _auth(client, "renter")
+    drill = _create_item(client, auth, name="Taladro", price_per_h=4)
+    saw = _create_item(client, auth, name="Sierra", price_per_h=3)
+
+    sat = datetime.datetime(2030, 6, 1, 10, 0)
+    r = client.post(
+        "/api/rentals/",
+        json={
+            "item_id": drill["id"],
+            "start_at": sat.isoformat(),
+            "end_at": (sat + datetime.timedelta(hours=4)).isoformat(),
+        },
+        headers=renter,
+    )
+    assert r.status_code == status.HTTP_201_CREATED
+
+    def free(start, end):
+        r = client.get(
+            "/api/items/",
+            params={"available_from": start.isoformat(), "available_to": end.isoformat()},
+        )
+        assert r.status_code == 200
+        return {it["id"] for it in r.json()}
+
+    assert free(sat + datetime.timedelta(hours=1), sat + datetime.timedelta(hours=2)) == {saw["id"]}
+    # franjas contiguas no se solapan
+    assert free(sat + datetime.timedelta(hours=4), sat + datetime.timedelta(hours=6)) == {drill["id"], saw["id"]}
+    assert client.get(
+        "/api/items/", params={"available_from": sat.isoformat(), "available_to": sat.isoformat()}
+    ).status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# reservas: solapes → 409
+# ---------------------------------------------------------------------------
+
+def test_rental_overlap_conflict(client):
+    owner = _auth(client, "own")
+    renter = _auth(client, "rent")
+    item = _create_item(client, owner, name="Escalera", price_per_h=2.5)
+
+    start = datetime.datetime(2030, 1, 1, 10, 0)
+
+    def book(offset_h, hours):
+        s = start + datetime.timedelta(hours=offset_h)
+        return client.post(
+            "/api/rentals/",
+            json={
+                "item_id": item["id"],
+                "start_at": s.isoformat(),
+                "end_at": (s + datetime.timedelta(hours=hours)).isoformat(),
+            },
+            headers=renter,
+        )
+
+    r = book(0, 3)
+    assert r.status_code == status.HTTP_201_CREATED
+    assert r.json()["deposit"] == round(3 * 2.5 * 1.2, 2)
+
+    assert book(2, 2).status_code == status.HTTP_409_CONFLICT
+    assert book(3, 1).status_code == status.HTTP_201_CREATED   # contigua
+
+    # una reserva futura no marca el ítem como no disponible
+    assert client.get(f"/api/items/{item['id']}").json()["available"] is True
+
+    r = client.post(
+        "/api/rentals/",
+        json={"item_id": 999, "start_at": start.isoformat(), "end_at": (start + datetime.timedelta(hours=1)).isoformat()},
+        headers=renter,
+    )
+    assert r.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_availability_follows_active_rentals(client, db):
+    from app import crud
+    from app.models.models import Rental
+
+    owner = _auth(client, "disp")
+    item = _create_item(client, owner, name="Andamio", price_per_h=4)
+    now = datetime.datetime.utcnow()
+
+    def book(start, hours):
+        return client.post(
+            "/api/rentals/",
+            json={
+                "item_id": item["id"],
+                "start_at": start.isoformat(),
+                "end_at": (start + datetime.timedelta(hours=hours)).isoformat(),
+            },
+            headers=owner,
+        ).json()["id"]
+
+    def available():
+        return client.get(f"/api/items/{item['id']}").json()["available"]
+
+    current = book(now - datetime.timedelta(minutes=5), 1)
+    future = book(now + datetime.timedelta(hours=3), 1)
+    assert available() is False
+
+    # la reserva futura empieza mientras la actual sigue en curso (p. ej. se
+    # amplió): devolver una no libera el ítem
+    db.query(Rental).filter_by(id=future).update({"start_at": now - datetime.timedelta(minutes=1)})
+    db.commit()
+    client.post(f"/api/rentals/{current}/return", headers=owner)
+    assert available() is False
+
+    client.post(f"/api/rentals/{future}/return", headers=owner)
+    assert available() is True
+
+    # una franja que empieza sin que nadie escriba la recoge la sincronización,
+    # que solo mira lo que empezó o terminó desde la pasada anterior
+    later = book(now + datetime.timedelta(hours=5), 1)
+    db.query(Rental).filter_by(id=later).update({"start_at": now - datetime.timedelta(minutes=1)})
+    db.commit()
+    assert available() is True
+    assert crud.sync_availability(db, since=now, now=datetime.datetime.utcnow()) == 0
+    assert available() is True
+    assert crud.sync_availability(db, since=now - datetime.timedelta(minutes=2)) == 1
+    assert crud.sync_availability(db) == 0          # idempotente
+    assert available() is False
+
+
+def test_availability_sync_runs_in_a_single_worker(tmp_path):
+    from app.core.leader import LeaderLock
+
+    path = str(tmp_path / "sync.lock")
+    leader, follower = LeaderLock(path), LeaderLock(path)
+    assert leader.acquire() is True
+    assert leader.acquire() is True                 # reentrante en el líder
+    assert follower.acquire() is False
+    leader.release()                                # p. ej. el worker muere
+    assert follower.acquire() is True
+    follower.release()
+
+
+# ---------------------------------------------------------------------------
+# sesión asíncrona (AsyncSession en todos los routers)
+# ---------------------------------------------------------------------------
+
+def test_routers_only_use_async_session(client):
+    from app.deps import get_db
+    from app.main import app
+    from app.models.database import async_database_url
+
+    def sync_session_used():
+        raise AssertionError("una ruta ha pedido la sesión síncrona")
+        yield
+
+    app.dependency_overrides[get_db] = sync_session_used
+
+    owner = _auth(client, "asy")
+    cat = client.post("/api/categories/", json={"name": "Async"}).json()
+    item = _create_item(client, owner, name="Compresor", price_per_h=3, categories=[cat["id"]])
+    assert item["categories"] == [{"id": cat["id"], "name": "Async", "parent_id": None}]
+
+    r = client.patch(f"/api/items/{item['id']}", json={"name": "Compresor 50 L"}, headers=owner)
+    assert r.json()["name"] == "Compresor 50 L"      # serializado tras el commit
+    start = datetime.datetime(2030, 1, 1, 10, 0)
+    r = client.post(
+        "/api/rentals/",
+        json={"item_id": item["id"], "start_at": start.isoformat(), "end_at": (start + datetime.timedelta(hours=1)).isoformat()},
+        headers=owner,
+    )
+    rental = r.json()["id"]
+    assert client.post(f"/api/rentals/{rental}/return", headers=owner).json()["returned"] is True
+    assert [i["id"] for i in client.get("/api/items/", params={"categories": cat["id"]}).json()] == [item["id"]]
+    assert client.delete(f"/api/items/{item['id']}", headers=owner).status_code == 204
+
+    assert async_database_url("sqlite:///./rental.db") == "sqlite+aiosqlite:///./rental.db"
+    assert async_database_url("postgresql+psycopg2://u:p@db/rental") == "postgresql+asyncpg://u:p@db/rental"
+
+
+# ---------------------------------------------------------------------------
+# importación masiva
+# ---------------------------------------------------------------------------
+
+def test_items_bulk_import_ndjson_and_csv(client):
+    import json
+
+    auth = _auth(client, "bulk")
+    cat = client.post("/api/categories/", json={"name": "Bulk"}).json()["id"]
+
+    rows = [
+        {"name": f"Tool {i}", "price_per_h": i + 1, "image_urls": ["http://img.example.com/t.png"], "categories": [cat]}
+        for i in range(5)
+    ]
+    rows.insert(2, {"name": "Sin imagen", "price_per_h": 1})
+    rows.append({"name": "Cat mala", "price_per_h": 1, "image_urls": ["http://img.example.com/t.png"], "categories": [999]})
+    body = "\n".join(json.dumps(r) for r in rows) + "\nno-es-json\n"
+
+    r = client.post(
+        "/api/items/bulk?chunk_size=2",
+        content=body,
+        headers={**auth, "Content-Type": "application/x-ndjson"},
+    )
+    assert r.status_code == 200
+    # nginx no debe acumular la respuesta (ver location = /api/items/bulk)
+    assert r.headers["X-Accel-Buffering"] == "no"
+    assert r.headers["Cache-Control"] == "no-store"
+    statuses = [json.loads(line) for line in r.text.splitlines()]
+    assert [s["row"] for s in statuses] == list(range(1, 9))
+    assert [s["status"] for s in statuses].count("created") == 5
+    assert {s["row"] for s in statuses if s["status"] == "error"} == {3, 7, 8}
+
+    csv_body = (
+        "name,description,price_per_h,image_urls,categories\n"
+        f'"Sierra, circular",,7.5,http://img.example.com/a.png|http://img.example.com/b.png,{cat}\n'
+        'Lijadora,"orbital\n""multi"" línea",3,http://img.example.com/c.png,\n'
+    )
+    r = client.post("/api/items/bulk", content=csv_body, headers={**auth, "Content-Type": "text/csv"})
+    created, multiline = [json.loads(line) for line in r.text.splitlines()]
+    assert created["status"] == multiline["status"] == "created"
+    assert multiline["row"] == 2
+    assert client.get(f"/api/items/{multiline['id']}").json()["description"] == 'orbital\n"multi" línea'
+
+    item = client.get(f"/api/items/{created['id']}").json()
+    assert item["name"] == "Sierra, circular"
+    assert len(item["image_urls"]) == 2
+    assert item["categories"] == [{"id": cat, "name": "Bulk", "parent_id": None}]
+    assert client.get("/api/items/", params={"categories": cat}).headers["X-Total-Count"] == "6"
+
+    r = client.post("/api/items/bulk", content="{}", headers={**auth, "Content-Type": "application/json"})
+    assert r.status_code == 415
+
+
+def test_nginx_streams_bulk_import_without_buffering():
+    import pathlib
+    import re
+
+    conf = (pathlib.Path(__file__).parents[1] / "frontend" / "nginx.conf").read_text()
+    block = re.search(r"location = /api/items/bulk \{(.*?)\}", conf, re.S)
+    assert block, "falta la location exacta para /api/items/bulk"
+    directives = {" ".join(line.split()).rstrip(";") for line in block.group(1).splitlines()}
+    assert {"proxy_request_buffering off", "proxy_buffering off", "proxy_cache off"} <= directives
+
+
+# ---------------------------------------------------------------------------
+# subida de imágenes
+# ---------------------------------------------------------------------------
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+@pytest.fixture()
+def upload_dir(tmp_path, monkeypatch):
+    """Redirige /api/upload y el mount /uploads a un directorio temporal."""
+    from app.api import upload
+    from app.core.config import settings
+    from app.core.storage import LocalStorage
+    from app.main import app
+
+    monkeypatch.setattr(settings, "PUBLIC_BASE_URL", "http://testserver")   # origen del TestClient
+    monkeypatch.setattr(upload, "storage", LocalStorage(str(tmp_path)))
+    (mount,) = [r for r in app.routes if getattr(r, "name", None) == "uploads"]
+    monkeypatch.setattr(mount.app, "directory", str(tmp_path))
+    monkeypatch.setattr(mount.app, "all_directories", [str(tmp_path)])
+    return tmp_path
+
+
+def test_upload_streams_sniffs_and_limits(client, upload_dir, monkeypatch):
+    from app.core.config import settings
+
+    tmp_path = upload_dir
+    auth = _auth(client, "uploader")
+
+    # la extensión la decide la firma, no el nombre ni el Content-Type
+    r = client.post("/api/upload/", files={"file": ("foto.jpg", PNG, "text/plain")}, headers=auth)
+    assert r.status_code == status.HTTP_201_CREATED, r.text
+    name = r.json()["url"].rsplit("/", 1)[1]
+    assert name.endswith(".png")
+    assert (tmp_path / name).read_bytes() == PNG
+
+    r = client.post("/api/upload/", files={"file": ("x.png", b"<?php echo 1; ?>", "image/png")}, headers=auth)
+    assert r.status_code == 400
+
+    # cuerpo cortado antes del boundary final: no se da por buena la imagen
+    body = (
+        b"--xyz\r\nContent-Disposition: form-data; name=\"file\"; filename=\"t.png\"\r\n"
+        b"Content-Type: image/png\r\n\r\n" + PNG[:40]
+    )
+    r = client.post(
+        "/api/upload/",
+        content=body,
+        headers={**auth, "Content-Type": "multipart/form-data; boundary=xyz"},
+    )
+    assert r.status_code == 400
+    r = client.post(
+        "/api/upload/",
+        content=body + b"\r\n--xyz--\r\n",
+        headers={**auth, "Content-Type": "multipart/form-data; boundary=xyz"},
+    )
+    assert r.status_code == status.HTTP_201_CREATED, r.text
+    complete = r.json()["url"].rsplit("/", 1)[1]
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 32)
+    r = client.post("/api/upload/", files={"file": ("big.png", PNG, "image/png")}, headers=auth)
+    assert r.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    # ni restos .part ni ficheros rechazados
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([name, complete])
+
+
+def test_uploaded_image_variants_are_exposed_and_generated_lazily(client, upload_dir):
+    import io
+
+    from PIL import Image
+
+    png = io.BytesIO()
+    Image.new("RGB", (1200, 900), "orange").save(png, format="PNG")
+    auth = _auth(client, "photographer")
+    url = client.post("/api/upload/", files={"file": ("a.png", png.getvalue(), "image/png")}, headers=auth).json()["url"]
+
+    item = _create_item(client, auth, name="Cámara", price_per_h=9, image_urls=[url, "http://img.example.com/x.png"])
+    variants = item["image_variants"]
+    assert set(variants[0]) == {"thumb", "medium", "thumb_avif"}
+    assert variants[1] == {}
+
+    thumb_path = urlparse(variants[0]["thumb"]).path
+    for generated in (upload_dir / "_v").rglob("*.webp"):
+        generated.unlink()                       # fuerza la generación bajo demanda
+    r = client.get(thumb_path)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(r.content)).size == (320, 240)
+
+    assert client.get("/uploads/_v/thumb/nope.png.webp").status_code == 404
+    assert client.get("/uploads/_v/thumb/..%2Fa.png.webp").status_code == 404
+
+
+def test_image_variants_only_for_own_uploads(monkeypatch):
+    from app.core.config import settings
+    from app.core.images import variant_urls
+
+    monkeypatch.setattr(settings, "PUBLIC_BASE_URL", "https://rental.example.com")
+    assert variant_urls("/uploads/a.png")["thumb"] == "/uploads/_v/thumb/a.png.webp"
+    assert variant_urls("https://RENTAL.example.com/uploads/a.png")["thumb"] == (
+        "https://RENTAL.example.com/uploads/_v/thumb/a.png.webp"
+    )
+    for foreign in (
+        "https://evil.example.com/uploads/a.png",
+        "//evil.example.com/uploads/a.png",
+        "http://rental.example.com/uploads/a.png",      # otro esquema, otro origen
+        "https://rental.example.com:8443/uploads/a.png",
+    ):
+        assert variant_urls(foreign) == {}, foreign
+
+    monkeypatch.setattr(settings, "PUBLIC_BASE_URL", None)
+    assert variant_urls("https://rental.example.com/uploads/a.png") == {}
+    assert variant_urls("/uploads/a.png") != {}
+
+
+def test_uploads_are_content_addressed_migrated_and_collected(client, db, upload_dir):
+    import hashlib
+    import os
+
+    from app.cli.uploads import migrate_uploads
+    from app.core.uploads import collect_garbage
+    from app import crud
+
+    auth = _auth(client, "dedup")
+    first = client.post("/api/upload/", files={"file": ("a.png", PNG, "image/png")}, headers=auth).json()["url"]
+    again = client.post("/api/upload/", files={"file": ("b.png", PNG, "image/png")}, headers=auth).json()["url"]
+    assert first == again
+    assert first.endswith(f"/uploads/{hashlib.sha256(PNG).hexdigest()}.png")
+
+    # ficheros con el esquema antiguo <uuid>.<ext>, dos de ellos idénticos
+    other = PNG + b"otra"
+    for legacy, data in (("old-1.png", PNG), ("old-2.png", other), ("old-3.png", other)):
+        (upload_dir / legacy).write_bytes(data)
+    item = _create_item(client, auth, name="Legacy", price_per_h=1, image_urls=["http://testserver/uploads/old-2.png"])
+
+    renames = migrate_uploads(db, str(upload_dir))
+    assert set(renames) == {"old-1.png", "old-2.png", "old-3.png"}
+    assert renames["old-2.png"] == renames["old-3.png"]
+    moved = client.get(f"/api/items/{item['id']}").json()["image_urls"]
+    assert moved == [f"http://testserver/uploads/{renames['old-2.png']}"]
+    assert migrate_uploads(db, str(upload_dir)) == {}          # idempotente
+
+    # GC: solo sobrevive lo referenciado (o lo reciente)
+    referenced = crud.get_referenced_uploads(db)
+    assert referenced == {renames["old-2.png"]}
+    assert collect_garbage(str(upload_dir), referenced, grace_seconds=3600) == []
+    for path in upload_dir.iterdir():
+        os.utime(path, (0, 0))
+    removed = collect_garbage(str(upload_dir), referenced, grace_seconds=3600)
+    assert sorted(removed) == sorted({renames["old-1.png"]})
+    assert sorted(p.name for p in upload_dir.iterdir()) == [renames["old-2.png"]]
+
+
+def test_uploads_served_immutable_with_etag_range_and_x_accel(client, upload_dir, monkeypatch):
+    import hashlib
+
+    from app.core.config import settings
+
+    auth = _auth(client, "cdn")
+    url = client.post("/api/upload/", files={"file": ("a.png", PNG, "image/png")}, headers=auth).json()["url"]
+    path = urlparse(url).path
+
+    r = client.get(path)
+    assert r.status_code == 200 and r.content == PNG
+    assert r.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert r.headers["ETag"] == f'"{hashlib.sha256(PNG).hexdigest()}"'
+
+    assert client.get(path, headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+    r = client.get(path, headers={"Range": "bytes=0-7"})
+    assert r.status_code == 206
+    assert r.content == PNG[:8]
+    assert r.headers["Content-Range"] == f"bytes 0-7/{len(PNG)}"
+
+    monkeypatch.setattr(settings, "UPLOADS_X_ACCEL_PREFIX", "/_uploads/")
+    r = client.get(path)
+    assert r.status_code == 200 and r.content == b""
+    assert r.headers["X-Accel-Redirect"] == "/_uploads" + path.removeprefix("/uploads")
+    assert r.headers["Content-Type"] == "image/png"
+    assert r.headers["ETag"] == f'"{hashlib.sha256(PNG).hexdigest()}"'
+
+
+def test_nginx_serves_uploads_with_the_backend_etag():
+    import pathlib
+    import re
+
+    conf = (pathlib.Path(__file__).parents[1] / "frontend" / "nginx.conf").read_text()
+    block = re.search(r"location /_uploads/ \{(.*?)\}", conf, re.S)
+    assert block, "falta la location interna /_uploads/"
+    directives = {" ".join(line.split()).rstrip(";") for line in block.group(1).splitlines()}
+    assert {"etag off", "add_header ETag $upstream_http_etag always"} <= directives
+
+
+def test_presigned_direct_upload_local_backend(client, upload_dir):
+    import hashlib
+
+    auth = _auth(client, "direct")
+    sha = hashlib.sha256(PNG).hexdigest()
+    body = {"content_type": "image/png", "size": len(PNG), "sha256": sha}
+
+    presign = client.post("/api/upload/presign", json=body, headers=auth).json()
+    assert presign["key"] == f"{sha}.png"
+    upload = presign["upload"]
+    assert upload["method"] == "PUT"
+
+    # el PUT no lleva Authorization: lo autoriza la URL firmada
+    path = urlparse(upload["url"]).path
+    assert client.put(path, content=PNG[:-1] + b"x", headers=upload["headers"]).status_code == 400
+    assert client.post("/api/upload/complete", json={"key": presign["key"]}, headers=auth).status_code == 404
+    assert client.put(path, content=PNG, headers=upload["headers"]).status_code == 200
+
+    r = client.post("/api/upload/complete", json={"key": presign["key"]}, headers=auth)
+    assert r.status_code == 200
+    assert r.json()["url"].endswith(f"/uploads/{sha}.png")
+
+    # mismo contenido otra vez: nada que subir, pero el GC vuelve a dar gracia
+    import os
+
+    from app.core.uploads import collect_garbage
+
+    stored = upload_dir / f"{sha}.png"
+    os.utime(stored, (0, 0))
+    assert client.post("/api/upload/presign", json=body, headers=auth).json()["upload"] is None
+    assert stored.stat().st_mtime > 0
+    os.utime(stored, (0, 0))
+    assert client.post("/api/upload/complete", json={"key": presign["key"]}, headers=auth).status_code == 200
+    assert collect_garbage(str(upload_dir), set(), grace_seconds=3600) == []
+    assert client.put(path + "x", content=PNG).status_code == 400
+
+
+def test_resumable_upload_session(client, upload_dir, monkeypatch):
+    import hashlib
+
+    from app.core.resumable import SessionStore
+
+    store = SessionStore(str(upload_dir / "sessions"), ttl=60)
+    monkeypatch.setattr("app.api.upload.sessions", store)
+    auth = _auth(client, "mobile")
+    data = PNG + b"\x01" * 100
+
+    r = client.post("/api/upload/sessions", headers={**auth, "Upload-Length": str(len(data))})
+    assert r.status_code == 201
+    assert r.headers["Tus-Resumable"] == "1.0.0"
+    session = urlparse(r.headers["Location"]).path
+
+    def patch(offset, chunk, who=auth):
+        headers = {**who, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"}
+        return client.patch(session, content=chunk, headers=headers)
+
+    assert patch(0, data[:50]).headers["Upload-Offset"] == "50"
+    # reintento con un offset viejo (p. ej. tras un corte): 409 con el bueno
+    stale = patch(0, data[:50])
+    assert stale.status_code == 409 and stale.headers["Upload-Offset"] == "50"
+    assert client.head(session, headers=auth).headers["Upload-Offset"] == "50"
+    assert client.head(session, headers=_auth(client, "intruso")).status_code == 404
+    assert client.post(session + "/finalize", headers=auth).status_code == 409
+
+    assert patch(50, data[50:]).status_code == 204
+    r = client.post(session + "/finalize", headers=auth)
+    assert r.status_code == 200
+    sha = hashlib.sha256(data).hexdigest()
+    assert r.json()["url"].endswith(f"/uploads/{sha}.png")
+    assert (upload_dir / f"{sha}.png").read_bytes() == data
+    assert client.head(session, headers=auth).status_code == 404
+
+    # no imagen → se rechaza en el primer trozo; sesiones caducadas → fuera
+    r = client.post("/api/upload/sessions", headers={**auth, "Upload-Length": "64"})
+    session = urlparse(r.headers["Location"]).path
+    assert patch(0, b"%PDF-1.7" + b"\x00" * 8).status_code == 400
+    assert client.head(session, headers=auth).status_code == 404
+
+    store.ttl = -1
+    client.post("/api/upload/sessions", headers={**auth, "Upload-Length": "64"})
+    assert store.sweep() == 1
+    assert list((upload_dir / "sessions").iterdir()) == []
+
+
+def test_resumable_sessions_share_volume_and_survive_exdev(client, upload_dir, monkeypatch):
+    import errno
+    import os
+
+    from app.core.config import settings
+    from app.core.resumable import SESSIONS_DIR
+    from app.core.storage import LocalStorage
+
+    # por defecto las sesiones viven dentro del volumen de subidas …
+    if settings.UPLOAD_SESSIONS_DIR is None:
+        assert os.path.dirname(SESSIONS_DIR) == settings.UPLOAD_DIR
+
+    # … y si no, finalizar copia en lugar de fallar con EXDEV
+    sessions_dir = upload_dir / ".sessions"
+    sessions_dir.mkdir()
+    part = sessions_dir / "abc.part"
+    part.write_bytes(PNG)
+    real_replace = os.replace
+
+    def cross_device(src, dst):
+        if str(src).startswith(str(sessions_dir)):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", cross_device)
+    key = LocalStorage(str(upload_dir)).store_file(str(part))
+    assert (upload_dir / key).read_bytes() == PNG
+    assert not part.exists()
+    assert not [p for p in upload_dir.iterdir() if p.name.endswith(".part")]
+
+    # el directorio de sesiones no se publica en /uploads
+    (sessions_dir / "abc.png").write_bytes(PNG)
+    assert client.get("/uploads/.sessions/abc.png").status_code == 404
+    assert client.get(f"/uploads/{key}").status_code == 200
+
+
+def test_lifespan_shuts_down_process_pools(db, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services.image_variants import renderer
+    from app.services.password_hasher import hasher
+
+    closed = []
+    monkeypatch.setattr(hasher, "shutdown", lambda: closed.append("hasher"))
+    monkeypatch.setattr(renderer, "shutdown", lambda: closed.append("image_variants"))
+    with TestClient(app):
+        assert closed == []
+    assert closed == ["hasher", "image_variants"]
@@ -0,0 +1,233 @@
+"""
+Regresión de planes de consulta.
+
+Cada escenario ejecuta una función de ``app.crud`` sobre un dataset
+sembrado, captura el SQL emitido y lo pasa por ``EXPLAIN QUERY PLAN``
+(SQLite) o ``EXPLAIN (FORMAT JSON)`` con ``enable_seqscan = off``
+(PostgreSQL, solo si ``TEST_POSTGRES_URL`` está definida).  El test falla
+si algún paso recorre una tabla completa sin índice.
+
+Los listados sin ningún filtro selectivo (p. ej. ``GET /api/items`` a
+secas o las facetas) quedan fuera: ahí el recorrido es intencionado y lo
+acota el ``LIMIT``.
+"""
+import datetime
+import json
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, schemas
+from app.models.database import Base
+from app.models.models import Category, CategoryClosure, Item, ItemImage, Rental, User
+from app.services.category_cache import categories
+from app.services.category_index import category_index
+
+N_ITEMS = 300
+
+FUTURE = datetime.datetime(2031, 1, 1)
+
+SCENARIOS = {
+    "get_item": lambda db: crud.get_item(db, 7),
+    "get_items_available_by_price": lambda db: crud.get_items(
+        db, available=True, order_by="price", order_dir="asc"
+    ),
+    "get_items_keyset": lambda db: crud.get_items_keyset(
+        db,
+        cursor=crud.item.encode_cursor("price", True, 50.0, 10),
+        available=True,
+        order_by="price",
+        order_dir="asc",
+    ),
+    "get_items_keyset_price_asc": lambda db: crud.get_items_keyset(
+        db, cursor=crud.item.encode_cursor("price", True, 50.0, 10), order_by="price", order_dir="asc"
+    ),
+    "get_items_keyset_price_desc": lambda db: crud.get_items_keyset(
+        db, cursor=crud.item.encode_cursor("price", False, 50.0, 10), order_by="price", order_dir="desc"
+    ),
+    "get_items_price_range": lambda db: crud.get_items(
+        db, available=True, min_price=10, max_price=20, with_total=False
+    ),
+    "get_items_search": lambda db: crud.get_items(db, name="Item 1", with_total=False),
+    "get_items_category_and_window": lambda db: crud.get_items(
+        db,
+        available=True,
+        categories=[1],
+        available_from=FUTURE,
+        available_to=FUTURE + datetime.timedelta(hours=2),
+    ),
+    "get_items_by_owner": lambda db: crud.get_items_by_owner(db, 2),
+    "get_rental": lambda db: crud.get_rental(db, 1),
+    "get_rentals_by_user": lambda db: crud.get_rentals_by_user(db, 2),
+    "get_user_by_username": lambda db: crud.get_user_by_username(db, "user1"),
+    "get_user_by_email": lambda db: crud.get_user_by_email(db, "user1@example.com"),
+    "get_category": lambda db: crud.get_category(db, 1),
+    "create_rental": lambda db: crud.create_rental(
+        db,
+        2,
+        schemas.RentalCreate(
+            item_id=5, start_at=FUTURE, end_at=FUTURE + datetime.timedelta(hours=1)
+        ),
+    ),
+    "sync_availability_since": lambda db: crud.sync_availability(
+        db, since=datetime.datetime(2030, 1, 1, 5), now=datetime.datetime(2030, 1, 1, 6)
+    ),
+}
+
+
+def _seed(db) -> None:
+    db.add_all(
+        [User(id=u, username=f"user{u}", email=f"user{u}@example.com", hashed_pw="x") for u in (1, 2, 3)]
+    )
+    db.add_all([Category(id=c, name=f"cat{c}") for c in range(1, 11)])
+    db.add_all([CategoryClosure(ancestor_id=c, descendant_id=c, depth=0) for c in range(1, 11)])
+    db.flush()
+    cats = {c.id: c for c in db.query(Category)}
+    for i in range(1, N_ITEMS + 1):
+        item = Item(
+            id=i,
+            name=f"Item {i}",
+            description="herramienta",
+            price_per_h=float(i % 97) + 1,
+            owner_id=1 + i % 3,
+            available=i % 5 != 0,
+            categories=[cats[1 + i % 10], cats[1 + (i * 7) % 10]] if i % 10 != (i * 7) % 10 else [cats[1 + i % 10]],
+            images=[ItemImage(url=f"http://img.example.com/{i}.png")],
+        )
+        db.add(item)
+    start = datetime.datetime(2030, 1, 1)
+    for r in range(1, 200):
+        db.add(
+            Rental(
+                item_id=1 + r % N_ITEMS,
+                renter_id=1 + r % 3,
+                start_at=start + datetime.timedelta(hours=r),
+                end_at=start + datetime.timedelta(hours=r + 2),
+                deposit=1.0,
+            )
+        )
+    db.commit()
+
+
+def _capture(engine, fn, db) -> list[tuple[str, object]]:
+    statements: list[tuple[str, object]] = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", statement, re.I):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+    return statements
+
+
+# ───────────────────────── SQLite ─────────────────────────────────────────
+# "SCAN t" a secas (sin USING INDEX / VIRTUAL TABLE) = recorrido completo
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)( LEFT-JOIN)?$")
+_SQLITE_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+
+
+def _sqlite_full_scans(conn, statement, parameters) -> list[str]:
+    details = [d for *_, d in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    # recorrer el resultado de una subconsulta ya acotada no es un full scan
+    subqueries = {m.group(1) for d in details if (m := _SQLITE_SUBQUERY.match(d))}
+    return [
+        d for d in details
+        if (m := _SQLITE_FULL_SCAN.match(d)) and m.group(1) not in subqueries
+    ]
+
+
+@pytest.fixture(scope="module")
+def seeded_sqlite():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        _seed(db)
+        # la caché y el índice de categorías se cargan con recorridos
+        # intencionados (una vez por versión); los dejamos ya cargados
+        categories.clear()
+        category_index.clear()
+        category_index.match(db, [categories.snapshot(db).subtree(1)])
+    yield engine, Session
+    engine.dispose()
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_sqlite_plans_use_indexes(seeded_sqlite, scenario):
+    engine, Session = seeded_sqlite
+    with Session() as db:
+        statements = _capture(engine, SCENARIOS[scenario], db)
+        db.rollback()
+    assert statements, "el escenario no emitió SQL"
+
+    with engine.connect() as conn:
+        offenders = {
+            stmt: scans
+            for stmt, params in statements
+            if (scans := _sqlite_full_scans(conn, stmt, params))
+        }
+    assert not offenders, f"{scenario}: recorrido completo sin índice → {offenders}"
+
+
+# ───────────────────────── PostgreSQL ─────────────────────────────────────
+def _pg_seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(_pg_seq_scans(child))
+    return found
+
+
+@pytest.fixture(scope="module")
+def seeded_postgres():
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL no definida")
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        _seed(db)
+        # la caché y el índice de categorías se cargan con recorridos
+        # intencionados (una vez por versión); los dejamos ya cargados
+        categories.clear()
+        category_index.clear()
+        category_index.match(db, [categories.snapshot(db).subtree(1)])
+    yield engine, Session
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_postgres_plans_use_indexes(seeded_postgres, scenario):
+    engine, Session = seeded_postgres
+    with Session() as db:
+        statements = _capture(engine, SCENARIOS[scenario], db)
+        db.rollback()
+
+    with engine.connect() as conn:
+        # con datasets pequeños el planner prefiere Seq Scan aunque haya
+        # índice; desactivándolo solo aparece si de verdad no existe
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        offenders = {}
+        for stmt, params in statements:
+            # EXPLAIN sin ANALYZE no ejecuta: también vale para INSERT/UPDATE
+            raw = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {stmt}", params).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            if scans := _pg_seq_scans(plan):
+                offenders[stmt] = scans
+    assert not offenders, f"{scenario}: Seq Scan → {offenders}"
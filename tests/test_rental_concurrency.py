@@ -0,0 +1,80 @@
+"""
+Reservas concurrentes sobre el mismo ítem: con muchas peticiones en
+paralelo (cada una con su propia conexión, como harían los workers) solo
+una puede ganar la franja.
+"""
+import datetime
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.models.database import Base
+from app.models.models import Item, Rental, User
+
+N_THREADS = 16
+
+
+@pytest.fixture()
+def file_sessionmaker(tmp_path):
+    """BD SQLite en fichero: las conexiones concurrentes compiten por el lock."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'race.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def test_parallel_bookings_only_one_wins(file_sessionmaker):
+    with file_sessionmaker() as db:
+        db.add(User(id=1, username="owner", email="o@w.n", hashed_pw="x"))
+        db.add(Item(id=1, name="Hormigonera", price_per_h=10, owner_id=1))
+        db.commit()
+
+    start = datetime.datetime(2030, 5, 1, 9, 0)
+    rent_in = schemas.RentalCreate(item_id=1, start_at=start, end_at=start + datetime.timedelta(hours=2))
+
+    barrier = threading.Barrier(N_THREADS)
+    results: list[str] = []
+    lock = threading.Lock()
+
+    def book():
+        with file_sessionmaker() as db:
+            barrier.wait()
+            try:
+                crud.create_rental(db, 1, rent_in)
+                outcome = "ok"
+            except crud.RentalConflict:
+                outcome = "conflict"
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=book) for _ in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count("ok") == 1
+    assert results.count("conflict") == N_THREADS - 1
+    with file_sessionmaker() as db:
+        assert db.query(Rental).count() == 1
+
+
+def test_booking_compiles_for_postgres_and_rounds_half_up():
+    from sqlalchemy.dialects import postgresql
+
+    from app.crud.rental import _booking_insert, _deposit
+
+    start = datetime.datetime(2030, 5, 1, 9, 0)
+    stmt = _booking_insert(1, 2, start, start + datetime.timedelta(hours=1), 12.0)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "round(" not in sql.lower()         # PG no tiene round(double precision, int)
+    assert "NOT (EXISTS" in sql and "RETURNING" in sql
+
+    assert _deposit(1, 1.125 / 1.2) == 1.13    # ROUND_HALF_UP como antes
+    assert _deposit(2, 4.5) == 10.8
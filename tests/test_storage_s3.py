@@ -0,0 +1,67 @@
+"""
+Backend S3 contra un servidor compatible local (``moto`` en modo servidor,
+equivalente a un MinIO de pruebas).  Se omite si moto / boto3 no están
+instalados.
+"""
+import hashlib
+import socket
+
+import httpx
+import pytest
+
+pytest.importorskip("boto3")
+moto_server = pytest.importorskip("moto.server")
+
+from app.core.storage import S3Storage  # noqa: E402
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+BUCKET = "rental-test"
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture()
+def s3_storage(s3_endpoint, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    storage = S3Storage(BUCKET, s3_endpoint, "us-east-1", None)
+    storage.client.create_bucket(Bucket=BUCKET)
+    return storage
+
+
+def test_presigned_put_goes_straight_to_bucket(client, s3_storage, monkeypatch):
+    from app.api import upload
+
+    monkeypatch.setattr(upload, "storage", s3_storage)
+    client.post("/api/auth/signup", json={"username": "s3", "email": "s3@example.com", "password": "pwd"})
+    token = client.post("/api/auth/token", data={"username": "s3", "password": "pwd"}).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    sha = hashlib.sha256(PNG).hexdigest()
+    body = {"content_type": "image/png", "size": len(PNG), "sha256": sha}
+    presign = client.post("/api/upload/presign", json=body, headers=auth).json()
+    upload_spec = presign["upload"]
+    assert upload_spec["url"].startswith(s3_storage.public_base_url.rsplit("/", 1)[0])
+
+    # tamaño y checksum van firmados: S3 / MinIO rechazan otro contenido
+    # (moto no verifica el checksum, por eso solo se comprueba la firma)
+    signed = httpx.URL(upload_spec["url"]).params["X-Amz-SignedHeaders"].split(";")
+    assert {"content-length", "content-type", "x-amz-checksum-sha256"} <= set(signed)
+    ok = httpx.put(upload_spec["url"], content=PNG, headers=upload_spec["headers"])
+    assert ok.status_code == 200, ok.text
+
+    r = client.post("/api/upload/complete", json={"key": presign["key"]}, headers=auth)
+    assert r.status_code == 200
+    assert r.json()["url"] == f"{s3_storage.public_base_url}/{sha}.png"
+    assert s3_storage.head(presign["key"], 8) == (len(PNG), PNG[:8])
+
+    assert client.post("/api/upload/presign", json=body, headers=auth).json()["upload"] is None